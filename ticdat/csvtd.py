@@ -4,8 +4,10 @@ PEP8
 """
 
 import os
-from ticdat.utils import DataFrame, create_generic_free, numericish, case_space_to_pretty
+from ticdat.utils import DataFrame, create_generic_free, numericish, case_space_to_pretty, dateutil_adjuster
 from ticdat.utils import freezable_factory, TicDatError, verify, containerish, dictish
+from ticdat.utils import verify_duplicates_option, duplicates_read_result, primary_keys_from_columns
+from ticdat.utils import map_jobs_with_workers
 from collections import defaultdict
 from itertools import product
 
@@ -36,7 +38,7 @@ class CsvTicFactory(freezable_factory(object, "_isFrozen")) :
         self.tic_dat_factory = tic_dat_factory
         self._isFrozen = True
     def create_tic_dat(self, dir_path, dialect='excel', headers_present = True,
-                       freeze_it = False, encoding=None):
+                       freeze_it = False, encoding=None, duplicates="last_wins", max_workers=None):
         """
         Create a TicDat object from the csv files in a directory
 
@@ -51,7 +53,16 @@ class CsvTicFactory(freezable_factory(object, "_isFrozen")) :
 
         :param freeze_it: boolean. should the returned object be frozen?
 
-        :return: a TicDat object populated by the matching files.
+        :param duplicates: how to handle rows with duplicated primary keys, which are found while reading.
+                           "last_wins" : the last row read wins, and no duplicate checking is performed.
+                           "raise" : raise a TicDatError if any duplicates are found.
+                           "report" : return the pair of the TicDat object (for which the last row read wins)
+                                      and a find_duplicates style dictionary.
+
+        :param max_workers: None or a positive integer. If greater than 1, up to this many files are read
+                            concurrently, by threads.
+
+        :return: a TicDat object populated by the matching files (or a pair, see the duplicates argument).
 
         caveats: Missing files resolve to an empty table, but missing fields on
                  matching files throw an Exception.
@@ -74,12 +85,14 @@ class CsvTicFactory(freezable_factory(object, "_isFrozen")) :
                "headers need to be present to read generic tables")
         verify(DataFrame or not tdf.generic_tables,
                "Strange absence of pandas despite presence of generic tables")
-        rtn = self.tic_dat_factory.TicDat(**self._create_tic_dat(dir_path, dialect,
-                                                                  headers_present, encoding))
+        verify_duplicates_option(duplicates)
+        columns = self._create_tic_dat(dir_path, dialect, headers_present, encoding, max_workers)
+        rtn = self.tic_dat_factory.TicDat.from_trusted_columns(**columns)
         rtn = self.tic_dat_factory._parameter_table_post_read_adjustment(rtn)
         if freeze_it:
-            return self.tic_dat_factory.freeze_me(rtn)
-        return rtn
+            rtn = self.tic_dat_factory.freeze_me(rtn)
+        return duplicates_read_result(rtn, duplicates, duplicates != "last_wins" and
+                                      primary_keys_from_columns(tdf, columns))
     def _read_cell(self, table, field, x):
         def _inner_rtn(x):
             if table == "parameters" and self.tic_dat_factory.parameters:
@@ -101,11 +114,59 @@ class CsvTicFactory(freezable_factory(object, "_isFrozen")) :
                     return x
             return x
         return self.tic_dat_factory._general_read_cell(table, field, _inner_rtn(x))
-    def _create_tic_dat(self, dir_path, dialect, headers_present, encoding):
+    def _cell_reader(self, table, field):
+        # a function equivalent to x -> _read_cell(table, field, x), with the data type, default value and
+        # infinity flag logic resolved once per field rather than once per cell
+        tdf = self.tic_dat_factory
+        try:
+            none_rtn = tdf._general_read_cell(table, field, None)
+        except TicDatError: # _read_cell raises only when it is given a cell that needs this value
+            return lambda x: self._read_cell(table, field, x)
+        if table == "parameters" and tdf.parameters:
+            return lambda x: x
+        dv = tdf.default_values.get(table, {}).get(field, ["LIST", "NOT", "POSSIBLE"])
+        dt = tdf.data_types.get(table, {}).get(field)
+        empty_is_none = bool((dt and dt.nullable) or (not dt and dv is None) or numericish(none_rtn))
+        should_try_float = bool((dt and dt.number_allowed) or (not dt and numericish(dv)) or
+                                (table in tdf.generic_tables))
+        must_be_int = bool(dt and dt.must_be_int)
+        datetime = bool(table != "parameters" and dt and dt.datetime)
+        flag = tdf.infinity_io_flag if table != "parameters" and numericish(tdf.infinity_io_flag) else None
+        def read_string(x):
+            if datetime:
+                rtn = dateutil_adjuster(x)
+                if rtn is not None:
+                    return rtn
+            return x
+        def rtn(x):
+            if x is None or (x == "" and empty_is_none):
+                return none_rtn
+            if not should_try_float:
+                return read_string(x)
+            try:
+                x = float(x)
+            except ValueError:
+                return read_string(x)
+            if must_be_int:
+                try:
+                    if int(x) == x:
+                        x = int(x)
+                except (ValueError, OverflowError):
+                    pass
+            if flag is not None:
+                if x >= flag:
+                    return float("inf")
+                if x <= -flag:
+                    return -float("inf")
+            return x
+        return rtn
+    def _create_tic_dat(self, dir_path, dialect, headers_present, encoding, max_workers=None):
         verify(dialect in csv.list_dialects(), "Invalid dialect %s"%dialect)
         verify(os.path.isdir(dir_path), "Invalid directory path %s"%dir_path)
-        rtn =  {t : self._create_table(dir_path, t, dialect, headers_present, encoding)
-                for t in self.tic_dat_factory.all_tables}
+        file_paths = self._get_file_paths(dir_path, self.tic_dat_factory.all_tables)
+        tables = sorted(self.tic_dat_factory.all_tables)
+        rtn = dict(zip(tables, map_jobs_with_workers(self._create_table, [(file_paths.get(t), t, dialect,
+                                                     headers_present, encoding) for t in tables], max_workers)))
         missing_tables = {t for t in self.tic_dat_factory.all_tables if not rtn[t]}
         if missing_tables:
             print ("The following table names could not be found (or were empty) in the %s directory.\n%s\n"%
@@ -138,72 +199,95 @@ class CsvTicFactory(freezable_factory(object, "_isFrozen")) :
         verify(dialect in csv.list_dialects(), "Invalid dialect %s"%dialect)
         verify(os.path.isdir(dir_path), "Invalid directory path %s"%dir_path)
         tdf = self.tic_dat_factory
+        file_paths = self._get_file_paths(dir_path, tdf.all_tables)
         rtn = {t:defaultdict(int) for t,_ in tdf.primary_key_fields.items()
-               if _ and self._get_file_path(dir_path, t)}
+               if _ and t in file_paths}
         for t in rtn:
-            with open(self._get_file_path(dir_path, t), encoding=encoding) as csvfile:
-                for r in self._get_data(csvfile, t, dialect, headers_present):
-                    p_key = r[tdf.primary_key_fields[t][0]] \
-                            if len(tdf.primary_key_fields[t])==1 else \
-                            tuple(r[_] for _ in tdf.primary_key_fields[t])
-                    rtn[t][p_key] += 1
+            with open(file_paths[t], encoding=encoding) as csvfile:
+                fields, rows = self._get_data(csvfile, t, dialect, headers_present)
+                pk_len = len(tdf.primary_key_fields[t])
+                for r in rows:
+                    rtn[t][r[0] if pk_len == 1 else tuple(r[:pk_len])] += 1
         for t in list(rtn.keys()):
             rtn[t] = {k:v for k,v in rtn[t].items() if v > 1}
             if not rtn[t]:
                 del(rtn[t])
         return rtn
-    def _get_file_path(self, dir_path, table):
-        rtn = [path for f in os.listdir(dir_path) for path in [os.path.join(dir_path, f)]
-               if os.path.isfile(path) and
-               f.lower().replace(" ", "_") == "%s.csv"%table.lower()]
-        verify(len(rtn) <= 1, "duplicate .csv files found for %s"%table)
-        if rtn:
-            return rtn[0]
-    def _get_data(self, csvfile, table, dialect, headers_present):
+    def _get_file_paths(self, dir_path, tables):
+        rtn = defaultdict(list)
+        file_names = {"%s.csv"%t.lower(): t for t in tables}
+        for f in os.listdir(dir_path):
+            path = os.path.join(dir_path, f)
+            if f.lower().replace(" ", "_") in file_names and os.path.isfile(path):
+                rtn[file_names[f.lower().replace(" ", "_")]].append(path)
+        for t, paths in rtn.items():
+            verify(len(paths) <= 1, "duplicate .csv files found for %s"%t)
+        return {t: paths[0] for t, paths in rtn.items()}
+    def _get_raw_data(self, csvfile, table, dialect, headers_present):
+        """
+        :return: the pair of the field names and a generator of the unconverted rows, with the cells ordered
+                 as per the field names. (The header row is matched to the fields only once, instead of once per row)
+        """
         tdf = self.tic_dat_factory
         fieldnames=tdf.primary_key_fields.get(table, ()) + tdf.data_fields.get(table, ())
         assert fieldnames or table in self.tic_dat_factory.generic_tables
-        for row in csv.DictReader(csvfile, dialect = dialect,
-                            **({"fieldnames":fieldnames} if not headers_present else {})):
-            if not headers_present:
-                verify(len(row) == len(fieldnames),
-                   "Need %s columns for table %s"%(len(fieldnames), table))
-                yield {f: self._read_cell(table, f, row[f]) for f in fieldnames}
-            else:
-                key_matching = defaultdict(list)
-                for k,f in product(row.keys(), fieldnames or row.keys()):
-                    if k.lower() ==f.lower():
-                        key_matching[f].append(k)
-                fieldnames = fieldnames or row.keys()
-                for f in fieldnames:
-                    verify(f in key_matching, "Unable to find field name %s for table %s"%(f, table))
-                    verify(len(key_matching[f]) <= 1,
-                           "Duplicate field names found for field %s table %s"%(f, table))
-                yield {f: self._read_cell(table, f, row[key_matching[f][0]]) for f in fieldnames}
-
-    def _create_table(self, dir_path, table, dialect, headers_present, encoding):
-        file_path = self._get_file_path(dir_path, table)
+        reader = csv.reader(csvfile, dialect = dialect)
+        if not headers_present:
+            indicies = list(range(len(fieldnames)))
+            key_matching = {f: [f] for f in fieldnames}
+        else:
+            header = next(reader, None) or []
+            header_indicies = {k: i for i, k in enumerate(header)} # as per csv.DictReader, the last column wins
+            fieldnames = fieldnames or tuple(header_indicies)
+            key_matching = defaultdict(list)
+            for k,f in product(header_indicies, fieldnames):
+                if k.lower() == f.lower():
+                    key_matching[f].append(k)
+            indicies = [header_indicies[key_matching[f][0]] if len(key_matching.get(f, ())) == 1 else None
+                        for f in fieldnames]
+        in_order = indicies == list(range(len(indicies)))
+        row_len = max((i for i in indicies if i is not None), default=-1) + 1
+        def rows():
+            verified = False
+            for row in reader:
+                if not row: # csv.DictReader skips blank lines
+                    continue
+                if not verified:
+                    for f, i in zip(fieldnames, indicies):
+                        verify(f in key_matching, "Unable to find field name %s for table %s"%(f, table))
+                        verify(i is not None, "Duplicate field names found for field %s table %s"%(f, table))
+                    verified = True
+                if not headers_present:
+                    verify(len(row) <= len(fieldnames), "Need %s columns for table %s"%(len(fieldnames), table))
+                if len(row) < row_len:
+                    row = row + [None] * (row_len - len(row)) # as per the csv.DictReader restval
+                yield row if in_order and len(row) == row_len else [row[i] for i in indicies]
+        return fieldnames, rows()
+    def _get_data(self, csvfile, table, dialect, headers_present):
+        """
+        :return: the pair of the field names and a generator of the rows (as lists ordered by the field names)
+        """
+        fieldnames, raw_rows = self._get_raw_data(csvfile, table, dialect, headers_present)
+        readers = [self._cell_reader(table, f) for f in fieldnames]
+        return fieldnames, ([r(x) for r, x in zip(readers, row)] for row in raw_rows)
+
+    def _create_table(self, file_path, table, dialect, headers_present, encoding):
         if not (file_path and  os.path.isfile(file_path)) :
             return
         tdf = self.tic_dat_factory
         if table in tdf.generator_tables:
             def rtn() :
                 with open(file_path, encoding=encoding) as csvfile:
-                    for r in self._get_data(csvfile, table, dialect, headers_present):
-                        yield tuple(r[_] for _ in tdf.data_fields[table])
+                    fields, rows = self._get_data(csvfile, table, dialect, headers_present)
+                    for r in rows:
+                        yield tuple(r)
         else:
-            rtn = {} if tdf.primary_key_fields.get(table) else []
             with open(file_path, encoding=encoding) as csvfile:
-                for r in self._get_data(csvfile, table, dialect, headers_present) :
-                    if tdf.primary_key_fields.get(table) :
-                        p_key = r[tdf.primary_key_fields[table][0]] \
-                                if len(tdf.primary_key_fields[table]) == 1 else \
-                                tuple(r[_] for _ in tdf.primary_key_fields[table])
-                        rtn[p_key] = tuple(r[_] for _ in tdf.data_fields.get(table,()))
-                    elif table in tdf.generic_tables:
-                        rtn.append(r)
-                    else:
-                        rtn.append(tuple(r[_] for _ in tdf.data_fields[table]))
+                fields, rows = self._get_raw_data(csvfile, table, dialect, headers_present)
+                rows = list(rows)
+            # the columns are converted one field at a time, and are handed to TicDat.from_trusted_columns
+            rtn = {f: list(map(self._cell_reader(table, f), c)) for f, c in zip(fields, zip(*rows))} \
+                  if rows else None
         return rtn
 
     def write_directory(self, tic_dat, dir_path, allow_overwrite = False, dialect='excel',
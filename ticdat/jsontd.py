@@ -3,10 +3,14 @@ Read/write ticDat objects from json files. Requires the json module
 PEP8
 """
 import os
+import re
+import io
 from collections import defaultdict
 from ticdat.utils import freezable_factory, TicDatError, verify, stringish, dictish, containerish
-from ticdat.utils import find_duplicates_from_dict_ticdat
+from ticdat.utils import find_duplicates_from_dict_ticdat, verify_duplicates_option, duplicates_read_result
+from ticdat.utils import primary_keys_from_rows, primary_keys_from_columns
 import datetime
+import inspect
 
 try:
     import json
@@ -21,30 +25,130 @@ def _standard_verify(tdf):
     verify(not tdf.generic_tables, "json not yet implemented for generic tables.\n" +
            "This is due to lack of multi-index json support. See goo.gl/u6FGBg")
 
-def make_json_dict(tdf, tic_dat, verbose=False, use_infinity_io_flag_if_provided=False):
+class _LazyRows(list):
+    """
+    An (apparently) empty list that generates its rows on demand. The pure Python json encoder (which json.dump,
+    and json.dumps with an indent, rely on) only needs len() and iteration from a list, so a table can be
+    written without building all of its JSON rows at once.
+    """
+    def __init__(self, length, rows):
+        super().__init__()
+        self._length, self._rows = length, rows
+    def __len__(self):
+        return self._length
+    def __iter__(self):
+        return self._rows()
+
+def make_json_dict(tdf, tic_dat, verbose=False, use_infinity_io_flag_if_provided=False, lazy_rows=False):
     assert tdf.good_tic_dat_object(tic_dat)
-    def write_cell(t, f, x):
-        if isinstance(x, datetime.datetime):
-            return str(x)
-        return x if not use_infinity_io_flag_if_provided else tdf._infinity_flag_write_cell(t, f, x)
-    jdict = defaultdict(list)
-    for t in tdf.all_tables:
+    def write_cell_function(t, f):
+        write_cell = (tdf._infinity_flag_write_cell_function(t, f) if use_infinity_io_flag_if_provided
+                      else lambda x: x)
+        return lambda x: str(x) if isinstance(x, datetime.datetime) else write_cell(x)
+    def table_rows(t):
         all_fields = tdf.primary_key_fields.get(t,()) + tdf.data_fields.get(t,())
+        write_cells = [write_cell_function(t, f) for f in all_fields]
         def make_row(row):
             assert containerish(row) and len(row) == len(all_fields)
-            row = [write_cell(t, f, x) for f, x in zip(all_fields, row)]
+            row = [write_cell(x) for write_cell, x in zip(write_cells, row)]
             return {f:v for f,v in zip(all_fields, row)} if verbose else row
-        appender = lambda row : jdict[t].append(make_row(row))
         tbl = getattr(tic_dat, t)
         if tdf.primary_key_fields.get(t):
             for pk, data_row in tbl.items():
-                appender((list(pk) if containerish(pk) else [pk]) +
-                         [data_row[df] for df in tdf.data_fields[t]])
+                yield make_row((list(pk) if containerish(pk) else [pk]) +
+                               [data_row[df] for df in tdf.data_fields[t]])
         else:
             for data_row in tbl:
-                appender([data_row[df] for df in tdf.data_fields[t]])
+                yield make_row([data_row[df] for df in tdf.data_fields[t]])
+    jdict = defaultdict(list)
+    for t in tdf.all_tables:
+        if len(getattr(tic_dat, t)):
+            jdict[t] = _LazyRows(len(getattr(tic_dat, t)), lambda t=t: table_rows(t)) if lazy_rows else \
+                       list(table_rows(t))
     return jdict
 
+_json_whitespace = re.compile(r'[ \t\n\r]*')
+
+class _JsonStream(object):
+    """
+    Incrementally decodes a JSON document from a text file-like object, one value at a time, so that the
+    full document is never held in memory.
+    """
+    def __init__(self, fp, chunk_size=1<<16):
+        self._fp, self._chunk_size = fp, chunk_size
+        self._buf, self._pos, self._eof = "", 0, False
+        self._buf_start = 0 # the document position of self._buf[0]
+        self._decoder = json.JSONDecoder()
+    def _read_more(self):
+        if self._eof:
+            return
+        chunk = self._fp.read(self._chunk_size)
+        self._buf_start += self._pos
+        self._buf, self._pos, self._eof = self._buf[self._pos:] + chunk, 0, not chunk
+    def position(self):
+        return self._buf_start + self._pos
+    def peek(self):
+        # the next non whitespace character (which isn't consumed), or "" at the end of the document
+        while True:
+            self._pos = _json_whitespace.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf) or self._eof:
+                return self._buf[self._pos:self._pos+1]
+            self._read_more()
+    def expect(self, chars):
+        c = self.peek()
+        if not c or c not in chars:
+            raise ValueError("Expecting one of %s at character %s of the document, found %s" %
+                             (list(chars), self.position(), repr(c) if c else "the end of the document"))
+        self._pos += 1
+        return c
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                rtn, end = self._decoder.raw_decode(self._buf, self._pos)
+                # a value (i.e. a number) that reaches the end of the buffer might have been truncated
+                if end < len(self._buf) or self._eof:
+                    self._pos = end
+                    return rtn
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            self._read_more()
+    def object_items(self):
+        """
+        :return: a generator of (key, value) pairs for the JSON object at the current position. A value that is
+                 a JSON array is itself a generator of its elements, which is valid only until the next pair is
+                 requested. Other values are fully decoded.
+        """
+        self.expect("{")
+        if self.peek() == "}":
+            self.expect("}")
+            return
+        while True:
+            if self.peek() != '"':
+                raise ValueError("Expecting property name enclosed in double quotes at character %s of the "
+                                 "document" % self.position())
+            key = self.value()
+            self.expect(":")
+            if self.peek() == "[":
+                elements = self._array_elements()
+                yield key, elements
+                for _ in elements: # whatever wasn't consumed by the caller
+                    pass
+            else:
+                yield key, self.value()
+            if self.expect(",}") == "}":
+                return
+    def _array_elements(self):
+        self.expect("[")
+        if self.peek() == "]":
+            self.expect("]")
+            return
+        while True:
+            yield self.value()
+            if self.expect(",]") == "]":
+                return
+
 class JsonTicFactory(freezable_factory(object, "_isFrozen")) :
     """
     Primary class for reading/writing json files with TicDat objects.
@@ -60,7 +164,7 @@ class JsonTicFactory(freezable_factory(object, "_isFrozen")) :
         """
         self.tic_dat_factory = tic_dat_factory
         self._isFrozen = True
-    def create_tic_dat(self, json_file_path, freeze_it = False, from_pandas = False):
+    def create_tic_dat(self, json_file_path, freeze_it = False, from_pandas = False, duplicates="last_wins"):
         """
         Create a TicDat object from a json file
 
@@ -72,7 +176,13 @@ class JsonTicFactory(freezable_factory(object, "_isFrozen")) :
         :param from_pandas: boolean.  If truthy, then use pandas json readers. See
                             PanDatFactory json readers for more details.
 
-        :return: a TicDat object populated by the matching tables.
+        :param duplicates: how to handle rows with duplicated primary keys, which are found while reading.
+                           "last_wins" : the last row read wins, and no duplicate checking is performed.
+                           "raise" : raise a TicDatError if any duplicates are found.
+                           "report" : return the pair of the TicDat object (for which the last row read wins)
+                                      and a find_duplicates style dictionary.
+
+        :return: a TicDat object populated by the matching tables (or a pair, see the duplicates argument).
 
         caveats: Table names matches are case insensitive and also
                  underscore-space insensitive.
@@ -80,13 +190,16 @@ class JsonTicFactory(freezable_factory(object, "_isFrozen")) :
                  Dictionary keys that don't match any table are ignored.
         """
         _standard_verify(self.tic_dat_factory)
+        verify_duplicates_option(duplicates)
         if from_pandas:
             from ticdat import PanDatFactory
             pdf = PanDatFactory.create_from_full_schema(self.tic_dat_factory.schema(include_ancillary_info=True))
             _rtn = pdf.json.create_pan_dat(json_file_path)
-            return pdf.copy_to_tic_dat(_rtn)
-        jdict = self._create_jdict(json_file_path)
-        tic_dat_dict = self._create_tic_dat_dict(jdict)
+            rtn = pdf.copy_to_tic_dat(_rtn, freeze_it=freeze_it)
+            return duplicates_read_result(rtn, duplicates, duplicates != "last_wins" and primary_keys_from_columns(
+                self.tic_dat_factory, {t: {f: getattr(_rtn, t)[f].tolist() for f in pks}
+                                       for t, pks in self.tic_dat_factory.primary_key_fields.items() if pks}))
+        tic_dat_dict = self._read_tic_dat_dict(json_file_path)
         missing_tables = set(self.tic_dat_factory.all_tables).difference(tic_dat_dict)
         if missing_tables:
             print ("The following table names could not be found in the json file/string\n%s\n"%
@@ -94,8 +207,9 @@ class JsonTicFactory(freezable_factory(object, "_isFrozen")) :
         rtn = self.tic_dat_factory.TicDat(**tic_dat_dict)
         rtn = self.tic_dat_factory._parameter_table_post_read_adjustment(rtn)
         if freeze_it:
-            return self.tic_dat_factory.freeze_me(rtn)
-        return rtn
+            rtn = self.tic_dat_factory.freeze_me(rtn)
+        return duplicates_read_result(rtn, duplicates, duplicates != "last_wins" and
+                                      primary_keys_from_rows(self.tic_dat_factory, tic_dat_dict))
     def find_duplicates(self, json_file_path, from_pandas = False):
         """
         Find the row counts for duplicated rows.
@@ -147,6 +261,57 @@ class JsonTicFactory(freezable_factory(object, "_isFrozen")) :
         verify(all(map(containerish, jdict.values())),
                "The dictionary loaded from %s doesn't have containers as values" % reasonble_string)
         return jdict
+    def _read_tic_dat_dict(self, path_or_buf):
+        # streams the rows of each table out of the json, so that the whole json document is never loaded
+        if stringish(path_or_buf) and os.path.exists(path_or_buf):
+            verify(os.path.isfile(path_or_buf), "json_file_path is not a valid file path.")
+            open_fp, error_msg = (lambda: open(path_or_buf, "r")), "Unable to interpret %s as json file : %s"
+            reasonble_string = path_or_buf
+        else:
+            verify(stringish(path_or_buf), "%s isn't a string" % path_or_buf)
+            open_fp, error_msg = (lambda: io.StringIO(path_or_buf)), "Unable to interpret %s as json string : %s"
+            reasonble_string = path_or_buf[:10]
+        tdf = self.tic_dat_factory
+        table_names = {t.lower(): t for t in tdf.all_tables}
+        rtn = {}
+        table_keys = defaultdict(set)
+        try:
+            with open_fp() as fp:
+                stream = _JsonStream(fp)
+                if stream.peek() != "{":
+                    # not a dictionary. _create_jdict will diagnose the problem
+                    return self._create_tic_dat_dict(self._create_jdict(path_or_buf))
+                for key, value in stream.object_items():
+                    verify(containerish(value) or inspect.isgenerator(value),
+                           "The dictionary loaded from %s doesn't have containers as values" % reasonble_string)
+                    t = table_names.get(key.replace(" ", "_").lower())
+                    if t:
+                        table_keys[t].add(key)
+                        verify(len(table_keys[t]) < 2, "Found duplicate matching keys for table %s"%t)
+                        rtn[t] = self._read_rows(t, value)
+                if stream.peek():
+                    raise ValueError("Extra data at character %s of the document" % stream.position())
+        except (IOError, ValueError) as e:
+            raise TicDatError(error_msg % (reasonble_string, e))
+        return rtn
+    def _read_rows(self, t, rows):
+        tdf = self.tic_dat_factory
+        all_fields = tdf.primary_key_fields.get(t, ()) + tdf.data_fields.get(t, ())
+        cell_functions = {f: tdf._general_read_cell_function(t, f) for f in all_fields}
+        list_functions = [cell_functions[f] or (lambda x: x) for f in all_fields]
+        def read_dict_cell(f, x):
+            if f not in cell_functions:
+                return tdf._general_read_cell(t, f, x)
+            return cell_functions[f](x) if cell_functions[f] else x
+        rtn = []
+        for row in rows:
+            if dictish(row):
+                rtn.append({f: read_dict_cell(f, x) for f, x in row.items()})
+            elif isinstance(row, list) and not any(cell_functions.values()):
+                rtn.append(row if len(row) <= len(all_fields) else row[:len(all_fields)])
+            else:
+                rtn.append([c(x) for c, x in zip(list_functions, row)])
+        return rtn
     def _create_tic_dat_dict(self, jdict):
         tdf = self.tic_dat_factory
         rtn = {}
@@ -168,7 +333,8 @@ class JsonTicFactory(freezable_factory(object, "_isFrozen")) :
                 else:
                     rtn[t].append([tdf._general_read_cell(t, f, x) for f, x in zip(all_fields, row)])
         return rtn
-    def write_file(self, tic_dat, json_file_path, allow_overwrite = False, verbose = False, to_pandas = False):
+    def write_file(self, tic_dat, json_file_path, allow_overwrite = False, verbose = False, to_pandas = False,
+                   indent = 2):
         """
         write the ticDat data to a json file (or json string)
 
@@ -184,6 +350,8 @@ class JsonTicFactory(freezable_factory(object, "_isFrozen")) :
 
         :param to_pandas: boolean. if truthy, then use the PanDatFactory method of writing to json.
 
+        :param indent: 2. See json.dumps. None writes the most compact json, with no whitespace.
+
         :return:
         """
         _standard_verify(self.tic_dat_factory)
@@ -198,8 +366,15 @@ class JsonTicFactory(freezable_factory(object, "_isFrozen")) :
         msg = []
         if not self.tic_dat_factory.good_tic_dat_object(tic_dat, lambda m : msg.append(m)) :
             raise TicDatError("Not a valid TicDat object for this schema : " + " : ".join(msg))
-        jdict = make_json_dict(self.tic_dat_factory, tic_dat, verbose, use_infinity_io_flag_if_provided=True)
+        # the rows are generated as the json is written, so the full json representation is never built
+        jdict = make_json_dict(self.tic_dat_factory, tic_dat, verbose, use_infinity_io_flag_if_provided=True,
+                               lazy_rows=True)
+        # iterencode (as opposed to the one shot encoding of json.dumps) always uses the pure Python encoder,
+        # which is needed to generate the rows lazily
+        chunks = json.JSONEncoder(sort_keys=True, indent=indent,
+                                  separators=(",", ":") if indent is None else None).iterencode(jdict)
         if not json_file_path:
-            return json.dumps(jdict, sort_keys=True, indent=2)
+            return "".join(chunks)
         with open(json_file_path, "w") as fp:
-            json.dump(jdict, fp, sort_keys=True, indent=2)
+            for chunk in chunks:
+                fp.write(chunk)
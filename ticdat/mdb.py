@@ -93,7 +93,7 @@ class MdbTicFactory(freezable_factory(object, "_isFrozen")) :
         self.tic_dat_factory = tic_dat_factory
         self._duplicate_focused_tdf = create_duplicate_focused_tdf(tic_dat_factory)
         self._isFrozen = True
-    def create_tic_dat(self, mdb_file_path, freeze_it = False):
+    def create_tic_dat(self, mdb_file_path, freeze_it = False, duplicates="last_wins"):
         """
         Create a TicDat object from an Access MDB file
 
@@ -101,18 +101,26 @@ class MdbTicFactory(freezable_factory(object, "_isFrozen")) :
 
         :param freeze_it: boolean. should the returned object be frozen?
 
-        :return: a TicDat object populated by the matching tables.
+        :param duplicates: how to handle rows with duplicated primary keys, which are found while reading.
+                           "last_wins" : the last row read wins, and no duplicate checking is performed.
+                           "raise" : raise a TicDatError if any duplicates are found.
+                           "report" : return the pair of the TicDat object (for which the last row read wins)
+                                      and a find_duplicates style dictionary.
+
+        :return: a TicDat object populated by the matching tables (or a pair, see the duplicates argument).
 
         caveats : Tables that don't find a match are interpreted as an empty table.
                   Missing fields on matching tables throw an exception.
                   Also, see infinity_io_flag
         """
         _standard_verify(self.tic_dat_factory.generic_tables)
-        rtn = self.tic_dat_factory.TicDat(**self._create_tic_dat(mdb_file_path))
+        utils.verify_duplicates_option(duplicates)
+        table_keys = {} if duplicates != "last_wins" else None
+        rtn = self.tic_dat_factory.TicDat(**self._create_tic_dat(mdb_file_path, table_keys))
         rtn = self.tic_dat_factory._parameter_table_post_read_adjustment(rtn)
         if freeze_it:
-            return self.tic_dat_factory.freeze_me(rtn)
-        return rtn
+            rtn = self.tic_dat_factory.freeze_me(rtn)
+        return utils.duplicates_read_result(rtn, duplicates, table_keys)
     def find_duplicates(self, mdb_file_path):
         """
         Find the row counts for duplicated rows.
@@ -181,7 +189,8 @@ class MdbTicFactory(freezable_factory(object, "_isFrozen")) :
                 for row in cur.fetchall():
                   yield [tdf._general_read_cell(table, f, x) for f, x in zip(tdf.data_fields[table], row)]
         return tableObj
-    def _create_tic_dat(self, mdbFilePath):
+    def _create_tic_dat(self, mdbFilePath, table_keys=None):
+        # if table_keys is a dict, it will be populated with the primary keys read for each table, in row order
         tdf = self.tic_dat_factory
         table_names = self._check_tables_fields(mdbFilePath, tdf.all_tables)
         missing_tables = sorted(set(self.tic_dat_factory.all_tables).difference(table_names))
@@ -193,6 +202,8 @@ class MdbTicFactory(freezable_factory(object, "_isFrozen")) :
             for table in set(tdf.all_tables).difference(tdf.generator_tables).difference(missing_tables):
                 fields = tdf.primary_key_fields.get(table, ()) + tdf.data_fields.get(table, ())
                 rtn[table]= {} if tdf.primary_key_fields.get(table, ())  else []
+                if table_keys is not None and tdf.primary_key_fields.get(table, ()):
+                    table_keys[table] = []
                 with con.cursor() as cur :
                     cur.execute("Select %s from [%s]"%(", ".join(_brackets(fields)),
                                  table_names[table]))
@@ -201,7 +212,10 @@ class MdbTicFactory(freezable_factory(object, "_isFrozen")) :
                         pk = row[:len(tdf.primary_key_fields.get(table, ()))]
                         data = row[len(tdf.primary_key_fields.get(table, ())):]
                         if dictish(rtn[table]) :
-                            rtn[table][pk[0] if len(pk) == 1 else tuple(pk)] = data
+                            pk = pk[0] if len(pk) == 1 else tuple(pk)
+                            rtn[table][pk] = data
+                            if table_keys is not None:
+                                table_keys[table].append(pk)
                         else :
                             rtn[table].append(data)
         for table in set(tdf.generator_tables).difference(missing_tables):
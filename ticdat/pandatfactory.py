@@ -15,6 +15,7 @@ except:
     isnull = numpy = None
 import collections as clt
 from ticdat.pgtd import PostgresPanFactory
+from ticdat.parquettd import ParquetPanFactory
 try:
     import amplpy
 except:
@@ -32,6 +33,46 @@ def _faster_df_apply(df, func):
     # will default to float for empty Series, like original pandas
     return pd.Series(data, index=index, **({"dtype": numpy.float64} if not data else {}))
 
+def _column_apply(column, func):
+    # the single column equivalent of _faster_df_apply. func is applied to each value of column
+    data = [func(x) for x in column.tolist()]
+    return pd.Series(data, index=column.index, **({"dtype": numpy.float64} if not data else {}))
+
+def _column_mask(column, func, numeric_func):
+    # boolean Series indicating where func is truthy for the values of column. numeric_func computes the same
+    # with array operations, and is used for the numeric (int, unsigned and float) columns
+    if column.dtype.kind in "iuf":
+        return numeric_func(column)
+    return _column_apply(column, lambda x: bool(func(x))).astype(bool)
+
+def _foreign_key_failure_mask(child, parent, mappings):
+    # boolean Series, aligned with the child index, indicating the child rows that fail to find a parent row
+    if all(hasattr(mappings, _) for _ in ["native_field", "foreign_field"]):
+        found = child[mappings.native_field].isin(parent[mappings.foreign_field]).values
+    else:
+        # each child/parent column pair is factorized together, so that the MultiIndex is built from integer codes.
+        # (Building it from object columns has pandas infer the dtype of each level, with a FutureWarning)
+        codes = [pd.factorize(numpy.concatenate([child[_.native_field].to_numpy(dtype=object),
+                                                 parent[_.foreign_field].to_numpy(dtype=object)]))[0]
+                 for _ in mappings]
+        found = pd.MultiIndex.from_arrays([c[:len(child)] for c in codes]).isin(
+                pd.MultiIndex.from_arrays([c[len(child):] for c in codes]))
+    return pd.Series(~found, index=child.index, dtype=bool)
+
+def _memoized(func):
+    memo = {}
+    def rtn(x):
+        # keyed by type as well, since 1, 1.0 and True are equal (and thus would otherwise share a result)
+        k = (type(x), x)
+        try:
+            if k in memo:
+                return memo[k]
+            memo[k] = func(x)
+            return memo[k]
+        except TypeError: # unhashable
+            return func(x)
+    return rtn
+
 class PanDatFactory(object):
     """
      Defines a schema for a collection of pandas.DataFrame objects.
@@ -156,7 +197,8 @@ class PanDatFactory(object):
                 for pn, rpi in row_predicates.items():
                     rtn.add_data_row_predicate(tbl, predicate=rpi.predicate, predicate_name=pn,
                                                predicate_kwargs_maker=rpi.predicate_kwargs_maker,
-                                               predicate_failure_response=rpi.predicate_failure_response)
+                                               predicate_failure_response=rpi.predicate_failure_response,
+                                               vectorized=rpi.vectorized)
         return rtn
     @property
     def default_values(self):
@@ -238,32 +280,30 @@ class PanDatFactory(object):
         :param json_read: special 'None'->None override needed for pandas json reader
         '''
         assert push_parameters_to_be_valid or not json_read, "json_read should always push_parameters_to_be_valid"
-        apply = _faster_df_apply
+        flag = self.infinity_io_flag
         for t in set(self.all_tables).difference(["parameters"]): # parameters table is handled differently
             df = getattr(dat, t)
             for f in self.primary_key_fields.get(t, ()) + self.data_fields.get(t, ()):
-                if utils.numericish(self.infinity_io_flag):
-                    fixme = apply(df, lambda row: utils.numericish(row[f]) and row[f] >= self.infinity_io_flag)
+                if utils.numericish(flag):
+                    fixme = _column_mask(df[f], lambda x: utils.numericish(x) and x >= flag, lambda c: c >= flag)
                     df.loc[fixme, f] = float("inf")
-                    fixme = apply(df, lambda row: utils.numericish(row[f]) and row[f] <= -self.infinity_io_flag)
+                    fixme = _column_mask(df[f], lambda x: utils.numericish(x) and x <= -flag, lambda c: c <= -flag)
                     df.loc[fixme, f] = -float("inf")
                 elif utils.numericish(self._none_as_infinity_bias(t, f)):
                     assert self.infinity_io_flag is None
                     df[f].fillna(value=self._none_as_infinity_bias(t, f) * float("inf"), inplace=True)
                 dt = self.data_types.get(t, {}).get(f, None)
-                if dt and dt.datetime:
-                    def fixed_row(row):
-                        new_row_f = utils.dateutil_adjuster(row[f])
-                        return new_row_f if new_row_f is not None else row[f]
-                    df[f] = apply(df, fixed_row)
+                # a datetime64 column is already as adjusted as it is going to get
+                if dt and dt.datetime and df[f].dtype.kind != "M":
+                    def fixed(x):
+                        new_x = utils.dateutil_adjuster(x)
+                        return new_x if new_x is not None else x
+                    df[f] = _column_apply(df[f], _memoized(fixed))
                 if json_read and self._dtypes_for_pandas_read(t).get(f) == str:
                     assert dt, "assumed because _dtypes_for_pandas_read result"
                     if dt.nullable:
-                        def fixed_row(row):
-                            if utils.stringish(row[f]) and row[f].lower() == "none":
-                                return None
-                            return row[f]
-                        df[f] = apply(df, fixed_row)
+                        df[f] = _column_apply(df[f], lambda x: None if utils.stringish(x) and x.lower() == "none"
+                                                               else x)
 
         # this is the logic that is used in lieu of infinity_io_flag logic for the parameters table
         # it is predicated on the assumption that the parameters table will be serialized to a string/string table
@@ -310,22 +350,22 @@ class PanDatFactory(object):
         rtn = self.copy_pan_dat(rtn) # deep copy so data changes don't side effect
         if self.parameters: # Assuming a parameters table without parameters specification is just a naive developer
             fld = self.data_fields["parameters"][0]
-            rtn.parameters[fld] = _faster_df_apply(rtn.parameters,
-                                                   lambda row: None if isnull(row[fld]) else str(row[fld]))
+            rtn.parameters[fld] = _column_apply(rtn.parameters[fld], lambda x: None if isnull(x) else str(x))
         if self.infinity_io_flag == "N/A":
             return rtn
-        apply = _faster_df_apply
+        flag = self.infinity_io_flag
         for t in set(self.all_tables).difference(["parameters"]): # parameters table is handled differently
             df = getattr(rtn, t)
             for f in self.primary_key_fields.get(t, ()) + self.data_fields.get(t, ()):
-                if utils.numericish(self.infinity_io_flag):
-                    fixme = apply(df, lambda row: utils.numericish(row[f]) and row[f] >= self.infinity_io_flag)
-                    df.loc[fixme, f] = self.infinity_io_flag
-                    fixme = apply(df, lambda row: utils.numericish(row[f]) and row[f] <= -self.infinity_io_flag)
-                    df.loc[fixme, f] = -self.infinity_io_flag
+                if utils.numericish(flag):
+                    fixme = _column_mask(df[f], lambda x: utils.numericish(x) and x >= flag, lambda c: c >= flag)
+                    df.loc[fixme, f] = flag
+                    fixme = _column_mask(df[f], lambda x: utils.numericish(x) and x <= -flag, lambda c: c <= -flag)
+                    df.loc[fixme, f] = -flag
                 elif utils.numericish(self._none_as_infinity_bias(t, f)):
                     assert self.infinity_io_flag is None
-                    fixme = apply(df, lambda row: row[f] == float("inf") * self._none_as_infinity_bias(t, f))
+                    inf = float("inf") * self._none_as_infinity_bias(t, f)
+                    fixme = _column_mask(df[f], lambda x: x == inf, lambda c: c == inf)
                     df.loc[fixme, f] = None
         return rtn
     def set_data_type(self, table, field, number_allowed = True,
@@ -397,7 +437,7 @@ class PanDatFactory(object):
 
     def add_data_row_predicate(self, table, predicate, predicate_name=None,
                                predicate_kwargs_maker=None,
-                               predicate_failure_response="Boolean"):
+                               predicate_failure_response="Boolean", vectorized=False):
         """
         The purpose of calling add_data_row_predicate is to prepare for a future call to find_data_row_failures.
         See https://bit.ly/3e9pdCP for more details on these two functions.
@@ -438,6 +478,15 @@ class PanDatFactory(object):
                                            a clean row by returning True (the one and only literal True in Python)
                                            and a dirty row by returning a non-empty string (which is an error message).
 
+        :param vectorized: boolean. If truthy, then predicate is called once per find_data_row_failures call with the
+                           entire table DataFrame (instead of once per row with a row dict). It should return a
+                           Series (or array-like) aligned with the rows of the DataFrame. For a "Boolean" predicate,
+                           this Series is Truthy for the valid rows. For an "Error Message" predicate, this Series is
+                           True for the valid rows and an error message string for the others. For example,
+                           lambda df: df["min_supply"] <= df["max_supply"]
+                           If a vectorized predicate throws a handled exception, then every row of the table is
+                           considered a failure.
+
         See find_data_row_failures for details on handling exceptions thrown by predicate or predicate_kwargs_maker.
         :return:
         """
@@ -458,7 +507,7 @@ class PanDatFactory(object):
         if predicate_name is None:
             predicate_name = next(i for i in count() if i not in self._data_row_predicates[table])
         self._data_row_predicates[table][predicate_name] = RowPredicateInfo(predicate, predicate_kwargs_maker,
-                                                                            predicate_failure_response)
+                                                                            predicate_failure_response, vectorized)
 
     def add_parameter(self, name, default_value, number_allowed = True,
                       inclusive_min = True, inclusive_max = False, min = 0, max = float("inf"),
@@ -741,6 +790,7 @@ class PanDatFactory(object):
         self.csv = pandatio.CsvPanFactory(self)
         self.json = pandatio.JsonPanFactory(self)
         self.pgsql = PostgresPanFactory(self)
+        self.parquet = ParquetPanFactory(self)
 
     def good_pan_dat_object(self, data_obj, bad_message_handler = lambda x : None):
         """
@@ -850,7 +900,7 @@ class PanDatFactory(object):
                       inclusive_min=True, inclusive_max=True, min=-float("inf"), max=float("inf"),
                       must_be_int=False, strings_allowed='*', nullable=False, datetime=False)
         return tmp_pdf.data_types
-    def find_data_type_failures(self, pan_dat, as_table=True):
+    def find_data_type_failures(self, pan_dat, as_table=True, executor=None):
         """
         Finds the data type failures for a pandat object
 
@@ -860,6 +910,9 @@ class PanDatFactory(object):
                data type failure rows themselves. Otherwise will return the boolean Series that indicates
                which rows have data type failures.
 
+        :param executor: optional concurrent.futures.ThreadPoolExecutor. If provided, the (table, field) pairs
+                         will be checked in parallel. The result is the same as that of the serial check.
+
         :return: A dictionary constructed as follow:
                  The keys are namedtuples with members "table", "field". Each (table,field) pair
                  has data values that are inconsistent with its data type. (table, field) pairs
@@ -879,15 +932,15 @@ class PanDatFactory(object):
 
         rtn = {}
         TableField = clt.namedtuple("TableField", ["table", "field"])
-        for table, type_row in self._true_data_types().items():
+        def check_field(table, field, data_type):
             _table = getattr(pan_dat, table)
-            for field, data_type in type_row.items():
-                def bad_row(row):
-                    data = row[field]
-                    return not data_type.valid_data(None if isnull(data) else data)
-                where_bad_rows = _faster_df_apply(_table, bad_row)
-                if where_bad_rows.any():
-                    rtn[TableField(table, field)] = _table[where_bad_rows].copy() if as_table else where_bad_rows
+            return pd.Series(~data_type.valid_data_mask(_table[field]), index=_table.index, dtype=bool)
+        jobs = [(table, field, data_type) for table, type_row in self._true_data_types().items()
+                for field, data_type in type_row.items()]
+        for (table, field, _), where_bad_rows in zip(jobs, utils.map_jobs(check_field, jobs, executor)):
+            if where_bad_rows.any():
+                _table = getattr(pan_dat, table)
+                rtn[TableField(table, field)] = _table[where_bad_rows].copy() if as_table else where_bad_rows
         return rtn
     def replace_data_type_failures(self, pan_dat, replacement_values=None):
         """
@@ -941,7 +994,7 @@ class PanDatFactory(object):
                 getattr(pan_dat, table).loc[rows, field] = real_replacements[table, field]
         assert not set(self.find_data_type_failures(pan_dat)).intersection(real_replacements)
         return pan_dat
-    def find_data_row_failures(self, pan_dat, as_table=True, exception_handling="__debug__"):
+    def find_data_row_failures(self, pan_dat, as_table=True, exception_handling="__debug__", executor=None):
         """
         Finds the data row failures for a ticdat object
 
@@ -961,6 +1014,10 @@ class PanDatFactory(object):
                            sense for debugging, this value will use the latter if __debug__ is True and the former
                            otherwise. See -o and __debug__ in Python documentation for more details.
 
+        :param executor: optional concurrent.futures.ThreadPoolExecutor. If provided, the row predicates will be
+                         checked in parallel (the predicate_kwargs_maker functions are still called serially).
+                         The result is the same as that of the serial check.
+
         :return: A dictionary constructed as follows:
 
         The keys are namedtuples with members "table", "predicate_name".
@@ -997,14 +1054,53 @@ class PanDatFactory(object):
             predicate_name = next(make_name(i) for i in count() if make_name(i) not in
                                   self._data_row_predicates.get("parameters", {}))
             data_row_predicates["parameters"] = data_row_predicates.get("parameters", {})
-            data_row_predicates["parameters"][predicate_name] = RowPredicateInfo(good_parameter, None, "Boolean")
+            data_row_predicates["parameters"][predicate_name] = RowPredicateInfo(good_parameter, None, "Boolean", False)
 
         rtn = {}
         predicate_kwargs_maker_results = {}
         TPN = clt.namedtuple("TablePredicateName", ["table", "predicate_name"])
         PKEM = clt.namedtuple("PrimaryKeyErrorMessage", ["primary_key", "error_message"])
-        for tbl, row_predicates in data_row_predicates.items():
+        def check_vectorized_predicate(_table, tbl, pn, rpi, predicate_kwargs):
+            boolean = rpi.predicate_failure_response == "Boolean"
+            try:
+                predicate_result = rpi.predicate(_table, **predicate_kwargs)
+            except Exception as e:
+                if exception_handling == "Unhandled":
+                    raise
+                predicate_result = pd.Series(False if boolean else f"Exception<{e}>", index=_table.index)
+            if not isinstance(predicate_result, pd.Series):
+                predicate_result = pd.Series(predicate_result, index=_table.index)
+            verify(predicate_result.index.equals(_table.index),
+                   f"The vectorized predicate {pn} for {tbl} failed to return a Series aligned with the table rows")
+            if boolean:
+                return None, ~predicate_result.astype(bool)
+            return predicate_result, (~predicate_result if predicate_result.dtype == bool else
+                                      predicate_result.apply(lambda x: x is not True))
+        def check_predicate(tbl, pn, rpi, predicate_kwargs):
+            # returns the predicate results (or None for Boolean predicates) along with where_bad_rows
             _table = getattr(pan_dat, tbl)
+            if rpi.vectorized:
+                return check_vectorized_predicate(_table, tbl, pn, rpi, predicate_kwargs)
+            if rpi.predicate_failure_response == "Boolean":
+                def _p(row):
+                    try:
+                        return rpi.predicate(row, **predicate_kwargs)
+                    except:
+                        return False
+                bad_row = (lambda row: not rpi.predicate(row, **predicate_kwargs)) \
+                          if exception_handling == "Unhandled" else (lambda row: not _p(row))
+                return None, _faster_df_apply(_table, bad_row)
+            def _p(row):
+                try:
+                    return rpi.predicate(row, **predicate_kwargs)
+                except Exception as e:
+                    return f"Exception<{e}>"
+            predicate = (lambda row: rpi.predicate(row, **predicate_kwargs)) \
+                        if exception_handling == "Unhandled" else (lambda row: _p(row))
+            predicate_result = _faster_df_apply(_table, predicate)
+            return predicate_result, predicate_result.apply(lambda x: x is not True)
+        jobs, rtn_keys = [], []
+        for tbl, row_predicates in data_row_predicates.items():
             for pn, rpi in row_predicates.items():
                 predicate_kwargs = {}
                 if rpi.predicate_kwargs_maker:
@@ -1023,39 +1119,26 @@ class PanDatFactory(object):
                                         if (isinstance(predicate_kwargs, str) and "Exception<" in predicate_kwargs)
                                         else f"predicate_kwargs_maker failed to return a dict")
                 else:
-                    if rpi.predicate_failure_response == "Boolean":
-                        def _p(row):
-                            try:
-                                return rpi.predicate(row, **predicate_kwargs)
-                            except:
-                                return False
-                        bad_row = (lambda row: not rpi.predicate(row, **predicate_kwargs)) \
-                                  if exception_handling == "Unhandled" else (lambda row: not _p(row))
-                        where_bad_rows = _faster_df_apply(_table, bad_row)
-                        if where_bad_rows.any():
-                            rtn[TPN(tbl, pn)] = _table[where_bad_rows].copy() if as_table else where_bad_rows
-                    else:
-                        def _p(row):
-                            try:
-                                return rpi.predicate(row, **predicate_kwargs)
-                            except Exception as e:
-                                return f"Exception<{e}>"
-                        predicate = (lambda row: rpi.predicate(row, **predicate_kwargs)) \
-                                    if exception_handling == "Unhandled" else (lambda row: _p(row))
-                        predicate_result = _faster_df_apply(_table, predicate)
-                        where_bad_rows = predicate_result.apply(lambda x: x is not True)
-                        if where_bad_rows.any():
-                            if as_table:
-                                rtn[TPN(tbl, pn)] = _df = _table[where_bad_rows].copy()
-                                err_column = "Error Message"
-                                _ = count(1)
-                                while err_column in _df.columns:
-                                    err_column = f"Error Message ({next(_)})"
-                                _df[err_column] = predicate_result[where_bad_rows].copy()
-                            else:
-                                rtn[TPN(tbl, pn)] = where_bad_rows
-        return rtn
-    def find_foreign_key_failures(self, pan_dat, verbosity="High", as_table=True):
+                    jobs.append((tbl, pn, rpi, predicate_kwargs))
+                rtn_keys.append(TPN(tbl, pn))
+        for (tbl, pn, _, __), (predicate_result, where_bad_rows) in \
+                zip(jobs, utils.map_jobs(check_predicate, jobs, executor)):
+            if where_bad_rows.any():
+                _table = getattr(pan_dat, tbl)
+                if not as_table:
+                    rtn[TPN(tbl, pn)] = where_bad_rows
+                elif predicate_result is None:
+                    rtn[TPN(tbl, pn)] = _table[where_bad_rows].copy()
+                else:
+                    rtn[TPN(tbl, pn)] = _df = _table[where_bad_rows].copy()
+                    err_column = "Error Message"
+                    _ = count(1)
+                    while err_column in _df.columns:
+                        err_column = f"Error Message ({next(_)})"
+                    _df[err_column] = predicate_result[where_bad_rows].copy()
+        # the same key order as with a serial check
+        return {k: rtn[k] for k in rtn_keys if k in rtn}
+    def find_foreign_key_failures(self, pan_dat, verbosity="High", as_table=True, executor=None):
         """
         Finds the foreign key failures for a pandat object
 
@@ -1068,6 +1151,9 @@ class PanDatFactory(object):
                have failures. (For technical reasons, not returning a boolean Series like the
                other find functions)
 
+        :param executor: optional concurrent.futures.ThreadPoolExecutor. If provided, the foreign keys will be
+                         checked in parallel. The result is the same as that of the serial check.
+
         :return: A dictionary constructed as follows:
 
          The keys are namedtuples with members "native_table", "foreign_table",
@@ -1083,52 +1169,26 @@ class PanDatFactory(object):
          For verbosity = 'Low' a simpler return object is created that doesn't use namedtuples
          and omits the foreign key cardinality.
         """
-        # note - the as_table argument is messy here because I'm applying an index to a copy of the table
-        # as a result, we provide the remove_foreign_key_failures companion function
         verify(verbosity in ["High", "Low"], "verbosity needs to be either 'High' or 'Low'")
         rtn = {}
-        for fk, rows in self._find_foreign_key_failure_rows(pan_dat).items():
+        for fk, rows in self._find_foreign_key_failure_rows(pan_dat, executor).items():
             native, foreign, mappings, card = fk
-            rtn[fk] = getattr(pan_dat, native)[rows] if as_table else rows
+            rtn[fk] = getattr(pan_dat, native)[rows] if as_table else rows.tolist()
         if verbosity == "Low":
             rtn = {tuple(k[:2]) + (tuple(k[2]),): v for k,v in rtn.items()}
         return rtn
-    def _find_foreign_key_failure_rows(self, pan_dat):
+    def _find_foreign_key_failure_rows(self, pan_dat, executor=None):
         msg  = []
         verify(self.good_pan_dat_object(pan_dat, msg.append),
                "pan_dat not a good object for this factory : %s"%"\n".join(msg))
-        rtn = {}
-        for fk in self.foreign_keys:
+        def check_fk(fk):
             native, foreign, mappings, card = fk
-            child = getattr(pan_dat, native).copy(deep=True)
-            # makes sense to deep copy the possibly smaller drop_duplicates slice of the parent table
-            parent = getattr(pan_dat, foreign)
-            _ = 0
-            while any("_%s_"%_ in c for c in set(parent.columns).union(child.columns)):
-                _ += 1
-            magic_field = "_%s_"%_
-            if all(hasattr(mappings, _) for _ in ["native_field", "foreign_field"]):
-                parent = parent.drop_duplicates(mappings.foreign_field, inplace=False).copy(deep=True)
-                parent[mappings.native_field] = parent[mappings.foreign_field]
-                new_index = mappings.native_field
-            else:
-                parent = parent.drop_duplicates([_.foreign_field for _ in mappings], inplace=False).copy(deep=True)
-                for _ in mappings:
-                    parent[_.native_field] = parent[_.foreign_field]
-                new_index = [_.native_field for _ in mappings]
-            # sadly a join might knacker the row order, hence the ugliness with magic_field*2 for child
-            parent[magic_field] = True
-            child.insert(0, magic_field*2, range(0, len(child)))
-            parent.set_index(new_index, drop=True, inplace=True)
-            child.set_index(new_index, drop=True, inplace=True)
-            joined = child.join(parent, rsuffix=magic_field)
-            bad_rows = set(joined[joined[magic_field] != True][magic_field*2])
-            if bad_rows:
-                # I'm casting to list here because child is a copy that doesn't have the original index
-                # This is fixable, (i.e. we could return a Series with an index matching the original child table)
-                # but the fix isn't high priority.
-                rtn[fk] = list(_faster_df_apply(child, lambda row: row[magic_field*2] in bad_rows))
-        return rtn
+            rows = _foreign_key_failure_mask(getattr(pan_dat, native), getattr(pan_dat, foreign), mappings)
+            if rows.any():
+                return rows
+        fks = list(self.foreign_keys)
+        return {fk: rows for fk, rows in zip(fks, utils.map_jobs(check_fk, [(fk,) for fk in fks], executor))
+                if rows is not None}
     def create_full_parameters_dict(self, dat):
         """
         create a fully populated dictionary of all the parameters
@@ -1160,15 +1220,34 @@ class PanDatFactory(object):
                  Note that all foreign key removals are cascading. When a child removal results in
                  new foreign key failures, those failures are removed as well.
         """
-        remove_rows = self._find_foreign_key_failure_rows(pan_dat)
-        while remove_rows:
-            # just performing one bulk removal per iteration, since fks can intermingle in complicated ways
-            fk = next(iter(remove_rows))
-            native, foreign, mappings, card = fk
-            rows = remove_rows[fk]
-            setattr(pan_dat, native, getattr(pan_dat, native)[[not _ for _ in rows]].copy(deep=True))
-            remove_rows = self._find_foreign_key_failure_rows(pan_dat)
-
+        msg  = []
+        verify(self.good_pan_dat_object(pan_dat, msg.append),
+               "pan_dat not a good object for this factory : %s"%"\n".join(msg))
+        native_fks = clt.defaultdict(list)
+        for fk in self.foreign_keys:
+            native_fks[fk.native_table].append(fk)
+        # parent tables are processed before their children, so that a single pass handles the cascading removals
+        order = []
+        while len(order) < len(native_fks):
+            ready = [t for t in native_fks if t not in order and
+                     all(fk.foreign_table in order or fk.foreign_table not in native_fks for fk in native_fks[t])]
+            if not ready:
+                break
+            order += ready
+        circular = len(order) < len(native_fks)
+        order += [t for t in native_fks if t not in order]
+        removed = True
+        while removed:
+            removed = False
+            for t in order:
+                table = getattr(pan_dat, t)
+                rows = None
+                for fk in native_fks[t]:
+                    fk_rows = _foreign_key_failure_mask(table, getattr(pan_dat, fk.foreign_table), fk.mapping)
+                    rows = fk_rows if rows is None else rows | fk_rows
+                if rows.any():
+                    setattr(pan_dat, t, table[~rows].copy(deep=True))
+                    removed = circular
         return pan_dat
     def find_duplicates(self, pan_dat, keep="first", as_table=True):
         """
@@ -7,7 +7,8 @@ import json
 
 import os
 from ticdat.utils import freezable_factory, verify, case_space_to_pretty, pd, TicDatError, FrozenDict, all_fields
-from ticdat.utils import all_underscore_replacements, stringish, dictish
+from ticdat.utils import sqlite_table_names, stringish, dictish, map_jobs_with_workers, verify_max_workers_option
+from ticdat.utils import json_loads, json_load_file
 from itertools import product, chain
 from collections import defaultdict
 import inspect
@@ -43,6 +44,78 @@ def _clean_pandat_creator(pdf, df_dict, push_parameters_to_be_valid=True, json_r
     return pdf._general_post_read_adjustment(pandat, json_read=json_read,
                                              push_parameters_to_be_valid=push_parameters_to_be_valid)
 
+def _json_date_like(label):
+    # the column labels for which pandas.read_json (i.e. keep_default_dates) attempts date conversion
+    if not stringish(label):
+        return False
+    label = label.lower()
+    return label.endswith("_at") or label.endswith("_time") or label in ("modified", "date", "datetime") or \
+           label.startswith("timestamp")
+
+def _json_typed_column(col, dtype):
+    # col, typed the way pandas.read_json types a column, given its dtype argument
+    if not dtype:
+        return col if col.notna().all() else col.fillna(numpy.nan)
+    if dtype is not True:
+        dtype = dtype.get(col.name) if dictish(dtype) else dtype
+        if dtype is not None:
+            try:
+                return col.astype(dtype)
+            except (TypeError, ValueError):
+                return col
+    if col.dtype == "object":
+        try:
+            col = col.astype("float64")
+        except (TypeError, ValueError):
+            pass
+    if col.dtype.kind == "f" and col.dtype != "float64":
+        col = col.astype("float64")
+    if len(col) and (col.dtype == "float" or col.dtype == "object"):
+        try:
+            as_int = col.astype("int64")
+            if (as_int == col).all():
+                col = as_int
+        except (TypeError, ValueError, OverflowError):
+            pass
+    return col
+
+def _json_frame(obj, orient, dtype):
+    """
+    :param obj: the already parsed JSON for a single table
+    :param orient: as per pandas.read_json
+    :param dtype: as per pandas.read_json
+    :return: the DataFrame that pandas.read_json(json.dumps(obj), orient=orient, dtype=dtype) would return, built
+             directly from obj. None for the cases that are left to pandas.read_json (other orients, an explicit
+             index, and axis labels or columns that pandas.read_json would try to convert to dates or numbers)
+    """
+    if orient == "split":
+        obj = {str(k): v for k, v in obj.items()}
+        if not set(obj).issubset({"columns", "data"}):
+            return None
+        df = pd.DataFrame(dtype=None, **obj)
+    elif orient == "columns":
+        df = pd.DataFrame(obj, dtype=None)
+    elif orient == "index":
+        df = pd.DataFrame.from_dict(obj, dtype=None, orient="index")
+    else:
+        return None
+    if not len(df.columns) or any(map(_json_date_like, df.columns)):
+        return None
+    try:
+        df.columns.astype("float64")
+        return None
+    except (TypeError, ValueError):
+        pass
+    if orient != "split" and len(df.index):
+        index = _json_typed_column(pd.Series(df.index, dtype=object), True)
+        if index.dtype.kind in "if" and (index > 31536000).all(): # pandas.read_json would make these dates
+            return None
+        df.index = pd.Index(index)
+    cols = {i: _json_typed_column(df.iloc[:, i], dtype) for i in range(len(df.columns))}
+    rtn = pd.DataFrame(cols, index=df.index)
+    rtn.columns = df.columns
+    return rtn
+
 class JsonPanFactory(freezable_factory(object, "_isFrozen")):
     """
     Primary class for reading/writing json data with PanDat objects.
@@ -75,7 +148,9 @@ class JsonPanFactory(freezable_factory(object, "_isFrozen")):
 
         :param orient: Indication of expected JSON string format. See pandas.read_json for more details.
 
-        :param kwargs: additional named arguments to pass to pandas.read_json
+        :param kwargs: additional named arguments to pass to pandas.read_json. Absent kwargs (other than dtype),
+                       the JSON is parsed just once (with orjson, if installed) and each DataFrame is built
+                       directly from the parsed data, typed as pandas.read_json would have typed it.
 
         :return: a PanDat object populated by the matching tables.
 
@@ -93,11 +168,10 @@ class JsonPanFactory(freezable_factory(object, "_isFrozen")):
         """
         if stringish(path_or_buf) and os.path.exists(path_or_buf):
             verify(os.path.isfile(path_or_buf), "%s appears to be a directory and not a file." % path_or_buf)
-            with open(path_or_buf, "r") as f:
-                loaded_dict = json.load(f)
+            loaded_dict = json_load_file(path_or_buf)
         else:
             verify(stringish(path_or_buf), "%s isn't a string" % path_or_buf)
-            loaded_dict = json.loads(path_or_buf)
+            loaded_dict = json_loads(path_or_buf)
         verify(dictish(loaded_dict), "the json.load result doesn't resolve to a dictionary")
         verify(all(map(dictish, loaded_dict.values())),
                "the json.load result doesn't resolve to a dictionary whose values are themselves dictionaries")
@@ -109,7 +183,11 @@ class JsonPanFactory(freezable_factory(object, "_isFrozen")):
             kwargs_ = dict(kwargs)
             if "dtype" not in kwargs_:
                 kwargs_["dtype"] = self.pan_dat_factory._dtypes_for_pandas_read(t)
-            rtn[t] = pd.read_json(json.dumps(loaded_dict[f]), orient=orient, **kwargs_)
+            table_json = loaded_dict.pop(f) # so the parsed JSON can be released as the DataFrames are built
+            if set(kwargs_) == {"dtype"}:
+                rtn[t] = _json_frame(table_json, orient, kwargs_["dtype"])
+            if rtn.get(t) is None:
+                rtn[t] = pd.read_json(json.dumps(table_json), orient=orient, **kwargs_)
         missing_fields = {(t, f) for t in rtn for f in all_fields(self.pan_dat_factory, t)
                           if f not in rtn[t].columns}
         if fill_missing_fields:
@@ -172,20 +250,20 @@ class JsonPanFactory(freezable_factory(object, "_isFrozen")):
                                  len(set(self.pan_dat_factory.all_tables)) == \
                                  len(set(map(case_space_to_pretty, self.pan_dat_factory.all_tables)))
         rtn = {}
-        from ticdat.pandatfactory import _faster_df_apply
+        from ticdat.pandatfactory import _column_apply
         for t in self.pan_dat_factory.all_tables:
             df = getattr(pan_dat, t).copy(deep=True).replace(float("inf"), "inf").replace(-float("inf"), "-inf")
             for f in df.columns:
                 dt = self.pan_dat_factory.data_types.get(t, {}).get(f, None)
                 if dt and dt.datetime:
                     # pandas can be a real PIA when trying to mix types in a column
-                    def fixed(row): # this might not always fix things
-                        if isinstance(row[f], (pd.Timestamp, numpy.datetime64)):
-                            return str(row[f])
-                        if pd.isnull(row[f]):
+                    def fixed(x): # this might not always fix things
+                        if isinstance(x, (pd.Timestamp, numpy.datetime64)):
+                            return str(x)
+                        if pd.isnull(x):
                             return None
-                        return row[f]
-                    df[f] = _faster_df_apply(df, fixed)
+                        return x
+                    df[f] = _column_apply(df[f], fixed)
             k = case_space_to_pretty(t) if case_space_table_names else t
             rtn[k] = json.loads(df.to_json(path_or_buf=None, orient=orient, **kwargs))
             if orient == 'split' and not index:
@@ -215,7 +293,7 @@ class CsvPanFactory(freezable_factory(object, "_isFrozen")):
         """
         self.pan_dat_factory = pan_dat_factory
         self._isFrozen = True
-    def create_pan_dat(self, dir_path, fill_missing_fields=False, **kwargs):
+    def create_pan_dat(self, dir_path, fill_missing_fields=False, max_workers=None, **kwargs):
         """
         Create a PanDat object from a directory of csv files.
 
@@ -225,6 +303,9 @@ class CsvPanFactory(freezable_factory(object, "_isFrozen")):
                                     with their default value. Otherwise, missing fields
                                     throw an Exception.
 
+        :param max_workers: None or a positive integer. If greater than 1, up to this many files are read
+                            concurrently, by threads (pandas.read_csv releases the GIL for much of its work).
+
         :param kwargs: additional named arguments to pass to pandas.read_csv
 
         :return: a PanDat object populated by the matching tables.
@@ -247,12 +328,13 @@ class CsvPanFactory(freezable_factory(object, "_isFrozen")):
         """
         verify(os.path.isdir(dir_path), "%s not a directory path"%dir_path)
         tbl_names = self._get_table_names(dir_path)
-        rtn = {}
-        for t, f in tbl_names.items():
+        def read_table(t, f):
             kwargs_ = dict(kwargs)
             if "dtype" not in kwargs_:
                 kwargs_["dtype"] = self.pan_dat_factory._dtypes_for_pandas_read(t)
-            rtn[t] = pd.read_csv(f, **kwargs_)
+            return pd.read_csv(f, **kwargs_)
+        tables = sorted(tbl_names)
+        rtn = dict(zip(tables, map_jobs_with_workers(read_table, [(t, tbl_names[t]) for t in tables], max_workers)))
         missing_tables = {t for t in self.pan_dat_factory.all_tables if t not in rtn}
         if missing_tables:
             print ("The following table names could not be found in the %s directory.\n%s\n"%
@@ -332,7 +414,7 @@ class SqlPanFactory(freezable_factory(object, "_isFrozen")):
         """
         self.pan_dat_factory = pan_dat_factory
         self._isFrozen = True
-    def create_pan_dat(self, db_file_path, con=None, fill_missing_fields=False):
+    def create_pan_dat(self, db_file_path, con=None, fill_missing_fields=False, max_workers=None):
         """
         Create a PanDat object from a SQLite database file
 
@@ -345,6 +427,11 @@ class SqlPanFactory(freezable_factory(object, "_isFrozen")):
                                     with their default value. Otherwise, missing fields
                                     throw an Exception.
 
+        :param max_workers: None or a positive integer. If greater than 1 (and db_file_path is used), up to this many
+                            tables are read concurrently, by threads that each have their own connection.
+                            SQLite connections can't be shared across threads, so tables are read one at a
+                            time when the con argument is used.
+
         :return: a PanDat object populated by the matching tables.
 
         caveats: Missing tables always resolve to an empty table, but missing fields on matching tables throw
@@ -356,15 +443,26 @@ class SqlPanFactory(freezable_factory(object, "_isFrozen")):
         """
         verify(bool(db_file_path) != bool(con),
                "use either the con argument or the db_file_path argument but not both")
+        verify_max_workers_option(max_workers)
         if db_file_path:
             verify(os.path.exists(db_file_path) and not os.path.isdir(db_file_path),
                    "%s not a file path"%db_file_path)
-        rtn = {}
+        threaded = db_file_path and max_workers not in (None, 1)
         con_maker = lambda: _sql_con(db_file_path) if db_file_path else _DummyContextManager(con)
         with con_maker() as _:
             con_ = con or _
-            for t, s in self._get_table_names(con_).items():
-                rtn[t] = pd.read_sql(sql="Select * from [%s]"%s, con=con_)
+            tbl_names = self._get_table_names(con_)
+            def read_table(s):
+                if not threaded:
+                    return pd.read_sql(sql="Select * from [%s]"%s, con=con_)
+                thread_con = _sql_con(db_file_path)
+                try:
+                    return pd.read_sql(sql="Select * from [%s]"%s, con=thread_con)
+                finally:
+                    thread_con.close()
+            tables = sorted(tbl_names)
+            rtn = dict(zip(tables, map_jobs_with_workers(read_table, [(tbl_names[t],) for t in tables],
+                                                         max_workers if threaded else None)))
         missing_fields = {(t, f) for t in rtn for f in all_fields(self.pan_dat_factory, t)
                           if f not in rtn[t].columns}
         if fill_missing_fields:
@@ -380,19 +478,10 @@ class SqlPanFactory(freezable_factory(object, "_isFrozen")):
 
     def _get_table_names(self, con):
         rtn = {}
-        def try_name(name):
-            try :
-                con.execute("Select * from [%s]"%name)
-            except :
-                return False
-            return True
-        for table in self.pan_dat_factory.all_tables:
-            rtn[table] = [t for t in all_underscore_replacements(table) if try_name(t)]
-            verify(len(rtn[table]) <= 1, "Multiple possible tables found for table %s" % table)
-            if rtn[table]:
-                rtn[table] = rtn[table][0]
-            else:
-                rtn.pop(table)
+        for table, sql_tables in sqlite_table_names(con, self.pan_dat_factory.all_tables).items():
+            verify(len(sql_tables) <= 1, "Multiple possible tables found for table %s" % table)
+            if sql_tables:
+                rtn[table] = sql_tables[0]
         return rtn
     def write_file(self, pan_dat, db_file_path, con=None, if_exists='replace', case_space_table_names=False):
         """
@@ -489,8 +578,13 @@ class XlsPanFactory(freezable_factory(object, "_isFrozen")):
         This problem is even worse with df = pd.DataFrame({"a":["0100", "1200", "2300"]})
         """
         rtn = {}
-        for t, s in self._get_sheet_names(xls_file_path).items():
-            rtn[t] = pd.read_excel(xls_file_path, s, dtype=self.pan_dat_factory._dtypes_for_pandas_read(t))
+        try :
+            xl = pd.ExcelFile(xls_file_path)
+        except Exception as e:
+            raise TicDatError("Unable to open %s as xls file : %s"%(xls_file_path, e))
+        with xl: # the workbook is opened once, and its sheets are parsed from this one ExcelFile
+            for t, s in self._get_sheet_names(xl).items():
+                rtn[t] = xl.parse(s, dtype=self.pan_dat_factory._dtypes_for_pandas_read(t))
         missing_tables = {t for t in self.pan_dat_factory.all_tables if t not in rtn}
         if missing_tables:
             print ("The following table names could not be found in the %s file.\n%s\n"%
@@ -504,12 +598,8 @@ class XlsPanFactory(freezable_factory(object, "_isFrozen")):
                "The following are (table, field) pairs missing from the %s file.\n%s" % (xls_file_path, missing_fields))
         return _clean_pandat_creator(self.pan_dat_factory, rtn)
 
-    def _get_sheet_names(self, xls_file_path):
+    def _get_sheet_names(self, xl):
         sheets = defaultdict(list)
-        try :
-            xl = pd.ExcelFile(xls_file_path)
-        except Exception as e:
-            raise TicDatError("Unable to open %s as xls file : %s"%(xls_file_path, e))
         for table, sheet in product(self.pan_dat_factory.all_tables, xl.sheet_names) :
             if table.lower()[:_longest_sheet] == sheet.lower().replace(' ', '_')[:_longest_sheet]:
                 sheets[table].append(sheet)
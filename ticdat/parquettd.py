@@ -0,0 +1,288 @@
+"""
+Read/write ticDat and panDat objects from a directory of Apache Parquet files. Requires the pyarrow module
+"""
+
+import os
+import json
+from ticdat.utils import freezable_factory, verify, case_space_to_pretty, all_fields, map_jobs_with_workers
+from ticdat.utils import find_duplicates_from_dict_ticdat, verify_duplicates_option, duplicates_read_result
+from ticdat.utils import primary_keys_from_columns
+from ticdat.pandatio import _clean_pandat_creator
+try:
+    import pyarrow
+    import pyarrow.parquet as pq
+except:
+    pyarrow = pq = None
+try:
+    import pandas as pd
+except:
+    pd = None
+
+_can_unit_test = bool(pq and pd)
+
+# the key of the file level metadata entry that holds the ticdat schema information
+_metadata_key = b"ticdat"
+
+def _json_cell(x):
+    return x if pd.isnull(x) else json.dumps(x, default=str)
+
+def _arrow_table(df, index):
+    """
+    pyarrow insists that each column be homogeneously typed. ticdat allows (for example) a data field to mix
+    numbers and strings, so any object column that pyarrow can't type is stored as json text instead.
+    :param df: a DataFrame
+    :param index: boolean - should the index be stored?
+    :return: the pair of the pyarrow.Table and the list of the columns that were json encoded
+    """
+    try:
+        return pyarrow.Table.from_pandas(df, preserve_index=index), []
+    except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError):
+        pass
+    json_columns = []
+    for c in df.columns:
+        try:
+            pyarrow.array(df[c], from_pandas=True)
+        except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError):
+            json_columns.append(c)
+    df = df.copy()
+    for c in json_columns:
+        df[c] = df[c].map(_json_cell)
+    return pyarrow.Table.from_pandas(df, preserve_index=index), json_columns
+
+class ParquetPanFactory(freezable_factory(object, "_isFrozen")):
+    """
+    Primary class for reading/writing Apache Parquet files with PanDat objects.
+    You need the pyarrow package to be installed to use it.
+
+    Don't create this object explicitly. A ParquetPanFactory will
+    automatically be associated with the parquet attribute of the parent
+    PanDatFactory.
+
+    Each table is stored as its own <table name>.parquet file in a single directory. The columns retain their
+    data types, and the full schema of the parent PanDatFactory (including data types, foreign keys and the
+    infinity_io_flag) is stored in the file level metadata of every file.
+    """
+    def __init__(self, pan_dat_factory):
+        """
+        Don't create this object explicitly. A ParquetPanFactory will
+        automatically be associated with the parquet attribute of the parent
+        PanDatFactory.
+
+        :param pan_dat_factory:
+
+        :return:
+        """
+        self.pan_dat_factory = pan_dat_factory
+        self._isFrozen = True
+    def create_pan_dat(self, dir_path, fill_missing_fields=False, memory_map=False, max_workers=None):
+        """
+        Create a PanDat object from a directory of parquet files.
+
+        :param dir_path: the directory containing the .parquet files.
+
+        :param fill_missing_fields: boolean. If truthy, missing fields will be filled in
+                                    with their default value. Otherwise, missing fields
+                                    throw an Exception.
+
+        :param memory_map: boolean. If truthy, the files are memory mapped rather than read into buffers.
+
+        :param max_workers: None or a positive integer. If greater than 1, up to this many files are read
+                            concurrently, by threads (pyarrow releases the GIL for much of its work).
+
+        :return: a PanDat object populated by the matching tables.
+
+        caveats: Missing tables always resolve to an empty table.
+                 Table names are matched with case-space insensitivity, but spaces
+                 are respected for field names.
+                 Only the columns for the schema fields are read from the files (other than for generic tables,
+                 for which every column is read).
+        """
+        verify(pq, "pyarrow needs to be installed to use this subroutine")
+        verify(os.path.isdir(dir_path), "%s not a directory path"%dir_path)
+        tbl_names = self._get_table_names(dir_path)
+        def read_table(t, f):
+            schema = pq.read_schema(f, memory_map=memory_map)
+            columns = None
+            if t not in self.pan_dat_factory.generic_tables:
+                columns = [f_ for f_ in all_fields(self.pan_dat_factory, t) if f_ in schema.names]
+            json_columns = json.loads((schema.metadata or {}).get(_metadata_key, b"{}")).get("json_columns", [])
+            rtn = pq.read_table(f, columns=columns, memory_map=memory_map).to_pandas()
+            for c in json_columns:
+                if c in rtn.columns:
+                    rtn[c] = rtn[c].map(lambda x: x if pd.isnull(x) else json.loads(x))
+            return rtn
+        tables = sorted(tbl_names)
+        rtn = dict(zip(tables, map_jobs_with_workers(read_table, [(t, tbl_names[t]) for t in tables], max_workers)))
+        missing_tables = {t for t in self.pan_dat_factory.all_tables if t not in rtn}
+        if missing_tables:
+            print ("The following table names could not be found in the %s directory.\n%s\n"%
+                   (dir_path,"\n".join(missing_tables)))
+        missing_fields = {(t, f) for t in rtn for f in all_fields(self.pan_dat_factory, t)
+                          if f not in rtn[t].columns}
+        if fill_missing_fields:
+            for t,f in missing_fields:
+                rtn[t][f] = self.pan_dat_factory.default_values[t][f]
+        verify(fill_missing_fields or not missing_fields,
+               "The following (table, file_name, field) triplets are missing fields.\n%s" %
+               [(t, os.path.basename(tbl_names[t]), f) for t,f in missing_fields])
+        return _clean_pandat_creator(self.pan_dat_factory, rtn)
+
+    def _get_table_names(self, dir_path):
+        rtn = {}
+        for table in self.pan_dat_factory.all_tables:
+            rtn[table] = [path for f in os.listdir(dir_path) for path in [os.path.join(dir_path, f)]
+                          if os.path.isfile(path) and
+                          f.lower().replace(" ", "_") == "%s.parquet"%table.lower()]
+            verify(len(rtn[table]) <= 1, "Multiple possible parquet files found for table %s" % table)
+            if len(rtn[table]) == 1:
+                rtn[table] = rtn[table][0]
+            else:
+                rtn.pop(table)
+        return rtn
+    def write_directory(self, pan_dat, dir_path, case_space_table_names=False, index=False, **kwargs):
+        """
+        write the PanDat data to a collection of parquet files
+
+        :param pan_dat: the PanDat object to write
+
+        :param dir_path: the directory in which to write the parquet files
+
+        :param case_space_table_names: boolean - make best guesses how to add spaces and upper case
+                                       characters to table names
+
+        :param index: boolean - whether or not to write the index.
+
+        :param kwargs: additional named arguments to pass to pyarrow.parquet.write_table (i.e. compression)
+
+        :return:
+
+        caveats: The row names (index) isn't written (unless index is truthy).
+                 Object columns that mix types (i.e. strings and numbers) are stored as json text.
+        """
+        verify(pq, "pyarrow needs to be installed to use this subroutine")
+        verify(not os.path.isfile(dir_path), "A file is not a valid directory path")
+        msg = []
+        verify(self.pan_dat_factory.good_pan_dat_object(pan_dat, msg.append),
+               "pan_dat not a good object for this factory : %s"%"\n".join(msg))
+        pan_dat = self.pan_dat_factory._pre_write_adjustment(pan_dat)
+        case_space_table_names = case_space_table_names and \
+                                 len(set(self.pan_dat_factory.all_tables)) == \
+                                 len(set(map(case_space_to_pretty, self.pan_dat_factory.all_tables)))
+        schema = self.pan_dat_factory.schema(include_ancillary_info=True)
+        if not os.path.isdir(dir_path) :
+            os.mkdir(dir_path)
+        for t in self.pan_dat_factory.all_tables :
+            f = os.path.join(dir_path, (case_space_to_pretty(t) if case_space_table_names else t) + ".parquet")
+            table, json_columns = _arrow_table(getattr(pan_dat, t), index)
+            metadata = dict(table.schema.metadata or {})
+            metadata[_metadata_key] = json.dumps({"table": t, "schema": schema, "json_columns": json_columns})
+            pq.write_table(table.replace_schema_metadata(metadata), f, **kwargs)
+
+class ParquetTicFactory(freezable_factory(object, "_isFrozen")):
+    """
+    Primary class for reading/writing Apache Parquet files with TicDat objects.
+    You need the pyarrow package to be installed to use it.
+
+    Don't create this object explicitly. A ParquetTicFactory will
+    automatically be associated with the parquet attribute of the parent
+    TicDatFactory.
+
+    The files are read and written by way of the PanDatFactory parquet routines.
+    """
+    def __init__(self, tic_dat_factory):
+        """
+        Don't create this object explicitly. A ParquetTicFactory will
+        automatically be associated with the parquet attribute of the parent
+        TicDatFactory.
+
+        :param tic_dat_factory:
+
+        :return:
+        """
+        self.tic_dat_factory = tic_dat_factory
+        self._isFrozen = True
+    def _pan_dat_factory(self):
+        verify(pq, "pyarrow needs to be installed to use this subroutine")
+        verify(not self.tic_dat_factory.generator_tables, "parquet not yet implemented for generator tables.")
+        verify(not self.tic_dat_factory.generic_tables, "parquet not yet implemented for generic tables.")
+        from ticdat import PanDatFactory
+        return PanDatFactory.create_from_full_schema(self.tic_dat_factory.schema(include_ancillary_info=True))
+    def create_tic_dat(self, dir_path, freeze_it=False, duplicates="last_wins", memory_map=False, max_workers=None):
+        """
+        Create a TicDat object from a directory of parquet files
+
+        :param dir_path: the directory containing the .parquet files.
+
+        :param freeze_it: boolean. should the returned object be frozen?
+
+        :param duplicates: how to handle rows with duplicated primary keys, which are found while reading.
+                           "last_wins" : the last row read wins, and no duplicate checking is performed.
+                           "raise" : raise a TicDatError if any duplicates are found.
+                           "report" : return the pair of the TicDat object (for which the last row read wins)
+                                      and a find_duplicates style dictionary.
+
+        :param memory_map: boolean. If truthy, the files are memory mapped rather than read into buffers.
+
+        :param max_workers: None or a positive integer. If greater than 1, up to this many files are read
+                            concurrently.
+
+        :return: a TicDat object populated by the matching tables (or a pair, see the duplicates argument).
+
+        caveats: Missing tables always resolve to an empty table.
+                 Table names are matched with case-space insensitivity, but spaces
+                 are respected for field names.
+        """
+        verify_duplicates_option(duplicates)
+        pdf = self._pan_dat_factory()
+        _rtn = pdf.parquet.create_pan_dat(dir_path, memory_map=memory_map, max_workers=max_workers)
+        rtn = pdf.copy_to_tic_dat(_rtn, freeze_it=freeze_it)
+        return duplicates_read_result(rtn, duplicates, duplicates != "last_wins" and primary_keys_from_columns(
+            self.tic_dat_factory, {t: {f: getattr(_rtn, t)[f].tolist() for f in pks}
+                                   for t, pks in self.tic_dat_factory.primary_key_fields.items() if pks}))
+    def find_duplicates(self, dir_path, memory_map=False):
+        """
+        Find the row counts for duplicated rows.
+
+        :param dir_path: the directory containing the .parquet files.
+
+        :param memory_map: boolean. If truthy, the files are memory mapped rather than read into buffers.
+
+        :return: A dictionary whose keys are table names for the primary-ed key tables.
+                 Each value of the return dictionary is itself a dictionary.
+                 The inner dictionary is keyed by the primary key values encountered in the table,
+                 and the value is the count of records in the parquet file with this primary key.
+                 Row counts smaller than 2 are pruned off, as they aren't duplicates
+        """
+        pdf = self._pan_dat_factory()
+        _rtn = pdf.parquet.create_pan_dat(dir_path, memory_map=memory_map)
+        jdict = {t: [tuple(_) for _ in getattr(_rtn, t).itertuples(index=False)] for t in pdf.all_tables}
+        return find_duplicates_from_dict_ticdat(self.tic_dat_factory, jdict) or {}
+    def write_directory(self, tic_dat, dir_path, allow_overwrite=False, case_space_table_names=False, **kwargs):
+        """
+        write the ticDat data to a collection of parquet files
+
+        :param tic_dat: the data object
+
+        :param dir_path: the directory in which to write the parquet files
+
+        :param allow_overwrite: boolean - are we allowed to overwrite existing
+                                files?
+
+        :param case_space_table_names: boolean - make best guesses how to add spaces and upper case
+                                       characters to table names
+
+        :param kwargs: additional named arguments to pass to pyarrow.parquet.write_table (i.e. compression)
+
+        :return:
+        """
+        pdf = self._pan_dat_factory()
+        verify(not os.path.isfile(dir_path), "A file is not a valid directory path")
+        tdf = self.tic_dat_factory
+        msg = []
+        verify(tdf.good_tic_dat_object(tic_dat, msg.append),
+               "Not a valid TicDat object for this schema : " + " : ".join(msg))
+        if not allow_overwrite:
+            for t in tdf.all_tables :
+                f = os.path.join(dir_path, t + ".parquet")
+                verify(not os.path.exists(f), "The %s path exists and overwrite is not allowed"%f)
+        pdf.parquet.write_directory(tdf.copy_to_pandas(tic_dat, drop_pk_columns=False), dir_path, case_space_table_names=case_space_table_names, **kwargs)
@@ -2,21 +2,28 @@
 Read/write ticDat objects from PostGres database. Requires the sqlalchemy module
 """
 
+import uuid
 from collections import defaultdict
+from contextlib import contextmanager
+from itertools import islice, count
 from ticdat.utils import freezable_factory, TicDatError, verify, stringish, FrozenDict, find_duplicates
 from ticdat.utils import create_duplicate_focused_tdf, dictish, numericish, safe_apply
+from ticdat.utils import verify_duplicates_option, duplicates_read_result, map_jobs_with_workers
+from ticdat.utils import dateutil_adjuster, verify_max_workers_option
 try:
     import sqlalchemy as sa
 except:
     sa = None
 try:
     import psycopg2
+    import psycopg2.extras
 except:
     psycopg2 = None
 try:
     import pandas as pd
+    from pandas import isnull
 except:
-    pd = None
+    pd = isnull = None
 
 _can_unit_test = bool(sa)
 # SELECT * FROM pg_get_keywords()  WHERE catdesc = 'reserved'; created _the_reserved_words
@@ -41,6 +48,80 @@ def _active_fld_tables(engine, schema, active_fld):
     return {_[0] for _ in engine.execute("SELECT table_name FROM information_schema.columns " +
             f"WHERE table_schema = '{schema}' and column_name = '{active_fld}'")}
 
+@contextmanager
+def _select_rows_function(engine, itersize=20000):
+    """
+    a context manager for a function that maps a select statement to an iterable of result rows.
+    With the psycopg2 driver, each select is streamed through a named (i.e. server side) cursor that fetches
+    itersize rows at a time, all on one connection. Otherwise, the rows come from engine.execute.
+    """
+    if getattr(getattr(engine, "dialect", None), "driver", None) != "psycopg2" or \
+       not hasattr(engine, "raw_connection"):
+        yield engine.execute
+        return
+    con = engine.raw_connection()
+    cursor_names = count()
+    def select_rows(sql):
+        cursor = con.cursor(name=f"ticdat_read_{next(cursor_names)}")
+        cursor.itersize = itersize
+        try:
+            cursor.execute(sql)
+            yield from cursor
+        finally:
+            cursor.close()
+    try:
+        yield select_rows
+    finally:
+        con.close()
+
+def _copy_csv_cell(x):
+    """
+    :param x: a cell that has already been adjusted for writing
+    :return: x as a field of a COPY ... (FORMAT csv) line. Only an unquoted empty field is read as NULL,
+             so every string is quoted (and thus empty strings survive the round trip)
+    """
+    if x is None:
+        return ""
+    if x is True or x is False or type(x).__name__ == "bool_":
+        return "true" if x else "false"
+    if numericish(x):
+        if x != x:
+            return "NaN"
+        if x in (float("inf"), -float("inf")):
+            return "Infinity" if x > 0 else "-Infinity"
+        return str(x)
+    return '"%s"' % str(x).replace('"', '""')
+
+class _CopyStream(object):
+    """
+    A read-only file-like object that renders rows as COPY csv text a chunk at a time. Passing it to
+    cursor.copy_expert streams a table to postgres without ever building the full text (or list of rows).
+    """
+    def __init__(self, rows, rows_per_chunk=1000):
+        self._rows = iter(rows)
+        self._rows_per_chunk = rows_per_chunk
+        self._pending = ""
+        self.rows_written = 0
+    def _render_chunk(self):
+        chunk = list(islice(self._rows, self._rows_per_chunk))
+        self.rows_written += len(chunk)
+        self._pending += "".join(",".join(map(_copy_csv_cell, row)) + "\n" for row in chunk)
+        return bool(chunk)
+    def read(self, size=-1):
+        while (size is None or size < 0 or len(self._pending) < size) and self._render_chunk():
+            pass
+        end = len(self._pending) if size is None or size < 0 else size
+        rtn, self._pending = self._pending[:end], self._pending[end:]
+        return rtn
+    def readline(self, size=-1):
+        while "\n" not in self._pending and self._render_chunk():
+            pass
+        end = self._pending.find("\n") + 1 or len(self._pending)
+        if size is not None and size >= 0:
+            end = min(end, size)
+        rtn, self._pending = self._pending[:end], self._pending[end:]
+        return rtn
+
 class _PostgresFactory(freezable_factory(object, "_isFrozen"),):
     def __init__(self, tdf):
         self.tdf = tdf
@@ -71,16 +152,27 @@ class _PostgresFactory(freezable_factory(object, "_isFrozen"),):
         :return: A list of missing tables. Will raise TicDatError if there are missing tables and
                  error_on_missing_table is truthy.
         '''
-        tdf = self.tdf
+        return self._check_tables_fields(self._schema_columns(engine, schema), schema, error_on_missing_table)
+
+    def _schema_columns(self, engine, schema):
+        '''
+        :return: a dict mapping each table of the postgres schema to the list of its column names, as found by
+                 a single information_schema query for the whole schema
+        '''
         verify(schema in [row[0] for row in engine.execute("select schema_name from information_schema.schemata")],
                f"Schema {schema} is missing from engine {engine}")
-        pg_tables = [row[0] for row in engine.execute(
-            f"select table_name from information_schema.tables where table_schema ='{schema}'")]
+        rtn = defaultdict(list)
+        for table, column in engine.execute(f"""SELECT table_name, column_name FROM information_schema.columns
+                                            WHERE table_schema = '{schema}'"""):
+            rtn[table].append(column)
+        return dict(rtn)
+
+    def _check_tables_fields(self, schema_columns, schema, error_on_missing_table):
+        tdf = self.tdf
         missing_tables = []
         for table in tdf.all_tables:
-            if table in pg_tables:
-                pg_fields = [row[0] for row in engine.execute(f"""SELECT column_name FROM information_schema.columns 
-                             WHERE table_schema = '{schema}' AND table_name = '{table}'""")]
+            if table in schema_columns:
+                pg_fields = schema_columns[table]
                 for field in tdf.primary_key_fields.get(table, ()) + \
                              tdf.data_fields.get(table, ()):
                     matches = [f for f in pg_fields if f == _pg_name(field)]
@@ -219,19 +311,188 @@ class _PostgresFactory(freezable_factory(object, "_isFrozen"),):
         for str in self._get_schema_sql(self.tdf.all_tables, schema, forced_field_types):
             engine.execute(str)
 
-    def _handle_prexisting_rows(self, engine, schema, pre_existing_rows):
+    def _handle_prexisting_rows(self, engine, schema, pre_existing_rows, delete_rows=True):
+        """
+        :param delete_rows: if falsey, the "delete" tables are left as is (i.e. for _staged_copy to handle).
+                            They are also left as is when there are "merge" tables (for _merged_write to handle).
+        :return: the tables whose pre-existing rows are to be merged, in _ordered_tables order
+        """
         verify(isinstance(pre_existing_rows, dict), "pre_existing_rows needs to dict")
         verify(set(pre_existing_rows).issubset(self.tdf.all_tables), "bad pre_existing_rows keys")
-        verify(set(pre_existing_rows.values()).issubset({'delete', 'append'}), "bad pre_existing_rows values")
+        verify(set(pre_existing_rows.values()).issubset({'delete', 'append', 'merge'}), "bad pre_existing_rows values")
+        merge_tables = tuple(t for t in self._ordered_tables() if pre_existing_rows.get(t) == "merge")
+        verify(all(self.tdf.primary_key_fields.get(t) for t in merge_tables),
+               "merge pre_existing_rows can only be used with tables that have primary key fields")
+        verify(not merge_tables or psycopg2, "need psycopg2 to use the merge pre_existing_rows option")
         pre_existing_rows = dict({t:"delete" for t in self.tdf.all_tables}, **pre_existing_rows)
         # need to iterate from leaves (children) upwards to avoid breaking foreign keys with delete
         for t in reversed(self._ordered_tables()):
-            if pre_existing_rows[t] == "delete":
+            if pre_existing_rows[t] == "delete" and delete_rows and not merge_tables:
                 try:
                     engine.execute(f"truncate table {schema}.{t}") # postgres truncate will fail on FKs re:less
                 except Exception as e:
                     assert "foreign key" in str(e), "truncate should only fail due to foreign key issues"
                     engine.execute(f"DELETE FROM {schema}.{t}")
+        return merge_tables
+
+    @contextmanager
+    def _transaction_cursor(self, engine, dsn=None):
+        """
+        a context manager for a psycopg2 cursor (i.e. one that can also run COPY ... FROM STDIN). Everything written
+        through the cursor is committed as a single transaction on a clean exit, and rolled back otherwise.
+        :param engine: a sqlalchemy engine with drivertype postgres
+        :param dsn: optional - if truthy, the connection is made with psycopg2.connect(dsn) (as per write_data)
+                    and not drawn from the engine's pool
+        """
+        if dsn:
+            connect_kwargs = dsn if dictish(dsn) else {}
+            connect_args = [] if dictish(dsn) else [dsn]
+            con = psycopg2.connect(*connect_args, **connect_kwargs)
+        else:
+            con = engine.raw_connection()
+        try:
+            cursor = con.cursor()
+            verify(hasattr(cursor, "copy_expert"),
+                   "use_copy and merge require the psycopg2 driver (either for the engine or via the dsn argument)")
+            yield cursor
+            cursor.close()
+            con.commit()
+        finally:
+            con.close()
+
+    def _merge_key_function(self, t):
+        # maps a row (or a prefix of a row) to a tuple that can be matched against the row as read back from
+        # postgres. Needed since datetime fields might be written as strings.
+        all_fields = self.tdf.primary_key_fields.get(t, ()) + self.tdf.data_fields.get(t, ())
+        datetimes = {i for i, f in enumerate(all_fields)
+                     if self.tdf.data_types.get(t, {}).get(f) and self.tdf.data_types[t][f].datetime}
+        def adjust(x):
+            if stringish(x) and dateutil_adjuster(x) is not None:
+                return dateutil_adjuster(x)
+            return x
+        if not datetimes:
+            return tuple
+        return lambda row: tuple(adjust(x) if i in datetimes else x for i, x in enumerate(row))
+
+    def _merged_write(self, cursor, schema, tables, pre_existing_rows, merge_rows, write_table):
+        """
+        writes tables and merges the "merge" tables with the same cursor (i.e. as one transaction).
+        The merge synchronizes the tables with the rows being written, by primary key. Rows whose primary keys are
+        no longer present are deleted, and new or changed rows are written with INSERT ... ON CONFLICT DO UPDATE.
+        Unchanged rows aren't touched.
+        All the deletes (of the "delete" tables and of the merged rows) run leaf tables first, and then the
+        tables are written or upserted root tables first, so that the foreign keys hold throughout.
+        :param cursor: a cursor from self._transaction_cursor
+        :param tables: the tables to be written with write_table
+        :param pre_existing_rows: as per write_data
+        :param merge_rows: a dict mapping each "merge" table to the pair of its postgres field names and an
+                           iterable of its (written) rows, as per _table_rows
+        :param write_table: a function that writes the rows of a table via cursor
+        :return:
+        """
+        deltas = self._merge_deltas(cursor, schema, merge_rows)
+        for t in reversed(self._ordered_tables()):
+            if t in tables and pre_existing_rows.get(t, "delete") == "delete":
+                cursor.execute(f"DELETE FROM {schema}.{t}")
+            elif t in deltas:
+                self._merge_deletes(cursor, schema, t, deltas[t])
+        for t in self._ordered_tables():
+            if t in tables:
+                write_table(t)
+            elif t in deltas:
+                self._merge_upserts(cursor, schema, t, deltas[t])
+
+    def _merge_deltas(self, cursor, schema, table_rows):
+        """
+        :param table_rows: as per the merge_rows argument of _merged_write
+        :return: a dict mapping each table to its (fields, pk_len, upserts, deletes) merge delta
+        """
+        deltas = {}
+        for t, (fields, rows) in table_rows.items():
+            pk_len = len(self.tdf.primary_key_fields[t])
+            key = self._merge_key_function(t)
+            cursor.execute(f"Select {', '.join(fields)} from {schema}.{t}")
+            existing = {key(row[:pk_len]): row for row in cursor}
+            upserts, seen = {}, set()
+            for row in rows:
+                k = key(row[:pk_len])
+                seen.add(k)
+                if k not in existing or key(existing[k])[pk_len:] != key(row)[pk_len:]:
+                    upserts[k] = row
+            deltas[t] = fields, pk_len, list(upserts.values()), [existing[k][:pk_len] for k in existing
+                                                                   if k not in seen]
+        return deltas
+
+    def _merge_deletes(self, cursor, schema, t, delta):
+        fields, pk_len, upserts, deletes = delta
+        if deletes:
+            psycopg2.extras.execute_batch(cursor, f"DELETE FROM {schema}.{t} WHERE " +
+                                          " AND ".join(f"{f} = %s" for f in fields[:pk_len]), deletes)
+
+    def _merge_upserts(self, cursor, schema, t, delta):
+        fields, pk_len, upserts, deletes = delta
+        if upserts:
+            on_conflict = f"DO UPDATE SET {', '.join(f'{f} = EXCLUDED.{f}' for f in fields[pk_len:])}" \
+                          if fields[pk_len:] else "DO NOTHING"
+            psycopg2.extras.execute_values(cursor, f"INSERT INTO {schema}.{t} ({','.join(fields)}) VALUES %s " +
+                                           f"ON CONFLICT ({','.join(fields[:pk_len])}) {on_conflict}", upserts)
+
+    def _staged_copy(self, engine, schema, table_rows, pre_existing_rows, max_workers, dsn=None, merge_rows=None):
+        """
+        COPYs each table into its own unlogged staging table, up to max_workers tables at a time (each over its own
+        connection), and then moves the staged rows into the schema with a single transaction. Readers thus see
+        either the old data or the new data, and never a partially loaded schema.
+        The staging tables have no constraints, so every table can be staged independently of the others, and
+        the foreign key order only matters for the final transaction.
+        :param table_rows: a dict mapping table name to the pair of its postgres field names and an iterable of its
+                           (written) rows, as per _table_rows
+        :param pre_existing_rows: as per write_data. The pre-existing rows of the "delete" tables are deleted by
+                                  the final transaction
+        :param merge_rows: optional - the table_rows of the "merge" tables. These aren't staged, but are merged
+                           by the final transaction, as per _merged_write.
+        :return:
+        """
+        # unique to this call (so that concurrent writes don't share staging tables), and well within the 63
+        # character limit of postgres names
+        suffix = uuid.uuid4().hex[:8]
+        staging = {t: f"_ticdat_staging_{i}_{suffix}" for i, t in enumerate(self._ordered_tables())
+                   if t in table_rows}
+        with self._transaction_cursor(engine, dsn) as cursor:
+            for t, st in staging.items():
+                cursor.execute(f"CREATE UNLOGGED TABLE {schema}.{st} (LIKE {schema}.{t} INCLUDING DEFAULTS)")
+        try:
+            def stage(t):
+                with self._transaction_cursor(engine, dsn) as cursor:
+                    self._copy_rows(cursor, schema, staging[t], *table_rows[t])
+            map_jobs_with_workers(stage, [(t,) for t in staging], max_workers)
+            with self._transaction_cursor(engine, dsn) as cursor:
+                def insert_staged(t):
+                    fields = ','.join(table_rows[t][0])
+                    cursor.execute(f"INSERT INTO {schema}.{t} ({fields}) SELECT {fields} FROM {schema}.{staging[t]}")
+                self._merged_write(cursor, schema, staging, pre_existing_rows, merge_rows or {}, insert_staged)
+        finally:
+            with self._transaction_cursor(engine, dsn) as cursor:
+                for st in staging.values():
+                    cursor.execute(f"DROP TABLE IF EXISTS {schema}.{st}")
+
+    def _copy_rows(self, cursor, schema, table, fields, rows):
+        """
+        streams rows into a table with COPY ... FROM STDIN
+        :param cursor: a cursor from self._transaction_cursor
+        :param fields: the postgres field names, in the order of the row cells
+        :param rows: an iterable of rows whose cells have already been adjusted for writing
+        :return: the number of rows written
+        """
+        stream = _CopyStream(rows)
+        cursor.copy_expert(f"COPY {schema}.{table} ({','.join(fields)}) FROM STDIN WITH (FORMAT csv)", stream)
+        return stream.rows_written
+
+    def _insert_rows(self, cursor, schema, table, fields, rows):
+        """
+        as per _copy_rows, but with INSERT ... VALUES
+        """
+        psycopg2.extras.execute_values(cursor, f"INSERT INTO {schema}.{table} ({','.join(fields)}) VALUES %s",
+                                       list(rows))
 
 class PostgresTicFactory(_PostgresFactory):
     """
@@ -264,12 +525,26 @@ class PostgresTicFactory(_PostgresFactory):
     def _read_data_cell(self, t, f, x):
         return self.tdf._general_read_cell(t, f, x)
 
+    def _read_data_cell_function(self, t, f):
+        # a function equivalent to x -> _read_data_cell(t, f, x), or None if _read_data_cell would never change
+        # a cell of this field
+        return self.tdf._general_read_cell_function(t, f)
+
     def _write_data_cell(self, t, f, x):
         rtn = self.tdf._infinity_flag_write_cell(t, f, x)
         if numericish(rtn):
             rtn = float(rtn) if safe_apply(int)(rtn) != rtn else int(rtn)
         return rtn
 
+    def _write_data_cell_function(self, t, f):
+        cell = self.tdf._infinity_flag_write_cell_function(t, f)
+        def rtn(x):
+            x = cell(x)
+            if numericish(x):
+                x = float(x) if safe_apply(int)(x) != x else int(x)
+            return x
+        return rtn
+
     def _Rtn(self, freeze_it):
         def _rtn(*args, **kwargs):
             rtn = self.tdf._parameter_table_post_read_adjustment(self.tdf.TicDat(*args, **kwargs))
@@ -278,7 +553,7 @@ class PostgresTicFactory(_PostgresFactory):
             return rtn
         return _rtn
 
-    def create_tic_dat(self, engine, schema, freeze_it=False, active_fld=""):
+    def create_tic_dat(self, engine, schema, freeze_it=False, active_fld="", duplicates="last_wins"):
         """
         Create a TicDat object from a PostGres connection
 
@@ -292,45 +567,63 @@ class PostgresTicFactory(_PostgresFactory):
                            Must be compliant w PG naming conventions, which are different from ticdat field naming
                            conventions. Typically developer can ignore this argument, designed for expert support.
 
-        :return: a TicDat object populated by the matching tables. Missing tables issue a warning and resolve
-                 to empty.
+        :param duplicates: how to handle rows with duplicated primary keys, which are found while reading.
+                           "last_wins" : the last row read wins, and no duplicate checking is performed.
+                           "raise" : raise a TicDatError if any duplicates are found.
+                           "report" : return the pair of the TicDat object (for which the last row read wins)
+                                      and a find_duplicates style dictionary.
+
+        :return: a TicDat object populated by the matching tables (or a pair, see the duplicates argument).
+                 Missing tables issue a warning and resolve to empty.
 
         """
         verify(sa, "sqlalchemy needs to be installed to use this subroutine")
         verify(_pg_name(active_fld) ==  active_fld, "active_fld needs to be compliant with PG naming conventions")
+        verify_duplicates_option(duplicates)
         self._check_good_pgtd_compatible_table_field_names()
-        return self._Rtn(freeze_it)(**self._create_tic_dat(engine, schema, active_fld))
+        table_keys = {} if duplicates != "last_wins" else None
+        rtn = self._Rtn(freeze_it)(**self._create_tic_dat(engine, schema, active_fld, table_keys))
+        return duplicates_read_result(rtn, duplicates, table_keys)
 
-    def _create_tic_dat(self, engine, schema, active_fld):
+    def _create_tic_dat(self, engine, schema, active_fld, table_keys=None):
         tdf = self.tdf
         verify(len(tdf.generic_tables) == 0,
                "Generic tables have not been enabled for postgres")
         verify(len(tdf.generator_tables) == 0,
                "Generator tables have not been enabled for postgres")
-        rtn = self._create_tic_dat_from_con(engine, schema, active_fld)
+        rtn = self._create_tic_dat_from_con(engine, schema, active_fld, table_keys)
         return rtn
 
-    def _create_tic_dat_from_con(self, engine, schema, active_fld):
+    def _create_tic_dat_from_con(self, engine, schema, active_fld, table_keys=None):
+        # if table_keys is a dict, it will be populated with the primary keys read for each table, in row order
         tdf = self.tdf
-        active_fld_tables = _active_fld_tables(engine, schema, active_fld) if active_fld else set()
-        missing_tables = self.check_tables_fields(engine, schema)
+        schema_columns = self._schema_columns(engine, schema)
+        active_fld_tables = {t for t, columns in schema_columns.items() if active_fld in columns} \
+                            if active_fld else set()
+        missing_tables = self._check_tables_fields(schema_columns, schema, False)
         rtn = {}
-        for table in set(tdf.all_tables).difference(missing_tables):
-            rtn[table] = {} if tdf.primary_key_fields.get(table) else []
-            assert tdf.primary_key_fields.get(table) or tdf.data_fields.get(table), "since no generic tables"
-            fields = [_pg_name(f) for f in tdf.primary_key_fields.get(table, ()) +
-                      tdf.data_fields.get(table, ())]
-            for row in engine.execute(f"Select {', '.join(fields)} from {schema}.{table}" +
-                                      (f" where {active_fld} is True" if table in active_fld_tables else "")):
-                if tdf.primary_key_fields.get(table):
-                    pk = [self._read_data_cell(table, f, x) for f,x in
-                          zip(tdf.primary_key_fields[table], row[:len(tdf.primary_key_fields[table])])]
-                    data = [self._read_data_cell(table, f, x) for f, x in
-                            zip(tdf.data_fields[table], row[len(tdf.primary_key_fields[table]):])]
-                    rtn[table][pk[0] if len(pk) == 1 else tuple(pk)] = data
-                else:
-                    rtn[table].append([self._read_data_cell(table, f, x) for f, x in zip(tdf.data_fields[table], row)])
-
+        with _select_rows_function(engine) as select_rows:
+            for table in sorted(set(tdf.all_tables).difference(missing_tables)):
+                pks = tdf.primary_key_fields.get(table, ())
+                assert pks or tdf.data_fields.get(table), "since no generic tables"
+                all_fields = pks + tdf.data_fields.get(table, ())
+                cells = [(i, self._read_data_cell_function(table, f)) for i, f in enumerate(all_fields)]
+                cells = [(i, c) for i, c in cells if c]
+                rtn[table] = {} if pks else []
+                if table_keys is not None and pks:
+                    table_keys[table] = []
+                for row in select_rows(f"Select {', '.join(map(_pg_name, all_fields))} from {schema}.{table}" +
+                                       (f" where {active_fld} is True" if table in active_fld_tables else "")):
+                    row = list(row)
+                    for i, c in cells:
+                        row[i] = c(row[i])
+                    if pks:
+                        pk = row[0] if len(pks) == 1 else tuple(row[:len(pks)])
+                        rtn[table][pk] = row[len(pks):]
+                        if table_keys is not None:
+                            table_keys[table].append(pk)
+                    else:
+                        rtn[table].append(row)
         return rtn
 
     def find_duplicates(self, engine, schema, active_fld=""):
@@ -360,11 +653,11 @@ class PostgresTicFactory(_PostgresFactory):
                                 engine, schema, active_fld=active_fld), self._duplicate_focused_tdf)
 
 
-    def _get_data(self, tic_dat, schema, active_fld, active_fld_tables, dump_format="list"):
+    def _get_data(self, tic_dat, schema, active_fld, active_fld_tables, dump_format="list", tables=None):
         """This function creates sql for writing data to postgres"""
         assert dump_format in ["list", "dict"]
         rtn = [] if dump_format == "list" else defaultdict(list)
-        for t in self._ordered_tables():
+        for t in (self._ordered_tables() if tables is None else tables):
             _t = getattr(tic_dat, t)
             primarykeys = tuple(self.tdf.primary_key_fields.get(t, ()))
             for the_data in (_t.items() if primarykeys else _t):
@@ -391,7 +684,33 @@ class PostgresTicFactory(_PostgresFactory):
                     rtn[str].append(datarow)
         return tuple(rtn) if dump_format == "list" else dict(rtn)
 
-    def write_data(self, tic_dat, engine, schema, dsn=None, pre_existing_rows=None, active_fld=""):
+    def _table_rows(self, tic_dat, t, active_fld, active_fld_tables):
+        """
+        :return: the postgres field names of table t, and a generator of the (written) rows of table t
+        """
+        _t = getattr(tic_dat, t)
+        primarykeys = tuple(self.tdf.primary_key_fields.get(t, ()))
+        datafields = tuple(self.tdf.data_fields.get(t, ()))
+        fields = list(map(_pg_name, primarykeys + datafields))
+        extra = ()
+        if t in active_fld_tables:
+            fields.append(active_fld)
+            extra = (True,)
+        pk_cells = [self._write_data_cell_function(t, f) for f in primarykeys]
+        data_cells = [(f, self._write_data_cell_function(t, f)) for f in datafields]
+        def rows():
+            if primarykeys:
+                for pkrow, sqldatarow in _t.items():
+                    pkrow = (pkrow,) if len(primarykeys) == 1 else pkrow
+                    yield tuple(c(x) for c, x in zip(pk_cells, pkrow)) + \
+                          tuple(c(sqldatarow[f]) for f, c in data_cells) + extra
+            else:
+                for sqldatarow in _t:
+                    yield tuple(c(sqldatarow[f]) for f, c in data_cells) + extra
+        return fields, rows()
+
+    def write_data(self, tic_dat, engine, schema, dsn=None, pre_existing_rows=None, active_fld="",
+                   use_copy=False, max_workers=None):
         """
         write the ticDat data to a PostGres database
 
@@ -405,18 +724,34 @@ class PostgresTicFactory(_PostgresFactory):
                     psycopg2.connect. Will speed up bulk writing compared to engine.execute
                     If truthy and not a dict, then will be passed directly to psycopg2.connect as the sole argument.
 
-        :param pre_existing_rows: if provided, a dict mapping table name to either "delete" or "append"
-                                  default behavior is "delete"
+        :param pre_existing_rows: if provided, a dict mapping table name to either "delete", "append" or "merge"
+                                  default behavior is "delete". "merge" compares the data against the existing
+                                  rows by primary key, and then deletes only the rows that disappeared and
+                                  upserts only the rows that are new or changed. If any table is merged, then
+                                  all the tables are written as one transaction, in foreign key order.
+                                  Requires psycopg2 and the primary keys created by write_schema.
 
         :param active_fld: if provided, a string for a boolean filter field which will be populated with True.
                            Must be compliant w PG naming conventions, which are different from ticdat field naming
                            conventions. Typically developer can ignore this argument, designed for expert support.
+
+        :param use_copy: boolean. If truthy, each table is streamed to postgres with COPY ... FROM STDIN, with the
+                         rows converted as they are sent. This is by far the fastest option for large data sets.
+                         Requires psycopg2. (The connection comes from dsn if provided, and from engine otherwise).
+
+        :param max_workers: None or a positive integer. If provided, each table is COPY'ed (as per use_copy) into
+                            a staging table, up to max_workers tables at a time over separate connections. The
+                            schema is then updated from the staging tables with a single transaction, so that
+                            readers never see a partially loaded schema.
         :return:
         """
         verify(sa, "sqalchemy needs to be installed to use this subroutine")
         verify(engine.name=='postgresql',
                "a sqlalchemy engine with drivername='postgres' is required")
         verify(not dsn or psycopg2, "need psycopg2 to use the faster dsn write option")
+        verify(not use_copy or psycopg2, "need psycopg2 to use the use_copy write option")
+        verify(max_workers is None or psycopg2, "need psycopg2 to use the max_workers write option")
+        verify_max_workers_option(max_workers)
         verify(_pg_name(active_fld) ==  active_fld, "active_fld needs to be compliant with PG naming conventions")
         active_f_tables = _active_fld_tables(engine, schema, active_fld) if active_fld else set()
         self._check_good_pgtd_compatible_table_field_names()
@@ -426,18 +761,39 @@ class PostgresTicFactory(_PostgresFactory):
         verify(not self.tdf.generic_tables,
                "TicDat for postgres does not yet support generic tables")
         self.check_tables_fields(engine, schema, error_on_missing_table=True) # call self.write_schema as needed
-        self._handle_prexisting_rows(engine, schema, pre_existing_rows or {})
-        if dsn:
+        merge_tables = self._handle_prexisting_rows(engine, schema, pre_existing_rows or {},
+                                                    delete_rows=max_workers is None)
+        merge_rows = {t: self._table_rows(tic_dat, t, active_fld, active_f_tables) for t in merge_tables}
+        tables = [t for t in self._ordered_tables() if t not in merge_tables]
+        if max_workers is not None:
+            # the merge is part of the final staging transaction
+            self._staged_copy(engine, schema, {t: self._table_rows(tic_dat, t, active_fld, active_f_tables)
+                                               for t in tables}, pre_existing_rows or {}, max_workers, dsn,
+                              merge_rows)
+            return
+        if merge_tables:
+            # the other tables are written in foreign key order along with the merge, as one transaction
+            with self._transaction_cursor(engine, dsn) as cursor:
+                def write_table(t):
+                    (self._copy_rows if use_copy else self._insert_rows)(
+                        cursor, schema, t, *self._table_rows(tic_dat, t, active_fld, active_f_tables))
+                self._merged_write(cursor, schema, tables, pre_existing_rows or {}, merge_rows, write_table)
+        elif use_copy:
+            with self._transaction_cursor(engine, dsn) as cursor:
+                for t in tables:
+                    self._copy_rows(cursor, schema, t, *self._table_rows(tic_dat, t, active_fld, active_f_tables))
+        elif dsn:
             connect_kwargs = dsn if dsn and dictish(dsn) else {}
             connect_args = [dsn] if dsn and not dictish(dsn) else []
             with psycopg2.connect(*connect_args, **connect_kwargs) as db:
                 with db.cursor() as cursor:
-                    for k, v in self._get_data(tic_dat, schema, active_fld, active_f_tables, dump_format="dict").items():
+                    for k, v in self._get_data(tic_dat, schema, active_fld, active_f_tables, dump_format="dict",
+                                               tables=tables).items():
                         psycopg2.extras.execute_values(cursor, k, v)
         else:
-            all_dat = self._get_data(tic_dat, schema, active_fld, active_f_tables)
+            all_dat = self._get_data(tic_dat, schema, active_fld, active_f_tables, tables=tables)
             if len(all_dat) > 1000:
-                print("***pgtd.py not using most efficient data writing technique**")
+                print("***pgtd.py not using most efficient data writing technique (see use_copy)**")
             for sql_str, data in all_dat:
                 engine.execute(sql_str, data)
 
@@ -468,7 +824,7 @@ class PostgresPanFactory(_PostgresFactory):
         """
         super().__init__(pan_dat_factory)
 
-    def create_pan_dat(self, engine, schema, active_fld=""):
+    def create_pan_dat(self, engine, schema, active_fld="", max_workers=None):
         """
         Create a PanDat object from a PostGres connection
 
@@ -480,6 +836,9 @@ class PostgresPanFactory(_PostgresFactory):
                            Must be compliant w PG naming conventions, which are different from ticdat field naming
                            conventions. Typically developer can ignore this argument, designed for expert support.
 
+        :param max_workers: None or a positive integer. If greater than 1, up to this many tables are queried
+                            concurrently, by threads that draw their connections from the engine's pool.
+
         :return: a PanDat object populated by the matching tables. Missing tables issue a warning and resolve
                  to empty.
         """
@@ -487,21 +846,24 @@ class PostgresPanFactory(_PostgresFactory):
         verify(_pg_name(active_fld) ==  active_fld, "active_fld needs to be compliant with PG naming conventions")
         missing_tables = self.check_tables_fields(engine, schema)
         active_fld_tables = _active_fld_tables(engine, schema, active_fld) if active_fld else set()
-        rtn = {}
-        for table in set(self.tdf.all_tables).difference(missing_tables):
+        def read_table(table):
             fields = [(f, _pg_name(f)) for f in self.tdf.primary_key_fields.get(table, ()) +
                       self.tdf.data_fields.get(table, ())]
-            rtn[table] = pd.read_sql(sql=f"Select {', '.join([pgf for f, pgf in fields])} from {schema}.{table}" +
-                                         (f" where {active_fld} is True" if table in active_fld_tables else ""),
-                                     con=engine)
-            rtn[table].rename(columns={pgf: f for f, pgf in fields}, inplace=True)
+            rtn = pd.read_sql(sql=f"Select {', '.join([pgf for f, pgf in fields])} from {schema}.{table}" +
+                                  (f" where {active_fld} is True" if table in active_fld_tables else ""),
+                              con=engine)
+            rtn.rename(columns={pgf: f for f, pgf in fields}, inplace=True)
+            return rtn
+        tables = sorted(set(self.tdf.all_tables).difference(missing_tables))
+        rtn = dict(zip(tables, map_jobs_with_workers(read_table, [(t,) for t in tables], max_workers)))
 
         rtn = self.tdf.PanDat(**rtn)
         msg = []
         assert self.tdf.good_pan_dat_object(rtn, msg.append), str(msg)
         return self.tdf._general_post_read_adjustment(rtn, push_parameters_to_be_valid=True)
 
-    def write_data(self, pan_dat, engine, schema, pre_existing_rows=None, active_fld=""):
+    def write_data(self, pan_dat, engine, schema, pre_existing_rows=None, active_fld="", use_copy=False,
+                   max_workers=None):
         '''
         write the PanDat data to a postgres database
 
@@ -511,25 +873,64 @@ class PostgresPanFactory(_PostgresFactory):
 
         :param schema: The postgres schema to write to (call self.write_schema explicitly as needed)
 
-        :param pre_existing_rows: if provided, a dict mapping table name to either "delete" or "append"
-                                  default behavior is "delete"
+        :param pre_existing_rows: if provided, a dict mapping table name to either "delete", "append" or "merge"
+                                  default behavior is "delete". "merge" compares the data against the existing
+                                  rows by primary key, and then deletes only the rows that disappeared and
+                                  upserts only the rows that are new or changed. If any table is merged, then
+                                  all the tables are written as one transaction, in foreign key order.
+                                  Requires psycopg2 and the primary keys created by write_schema.
 
         :param active_fld: if provided, a string for a boolean filter field which will be populated with True.
                            Must be compliant w PG naming conventions, which are different from ticdat field naming
                            conventions. Typically developer can ignore this argument, designed for expert support.
 
+        :param use_copy: boolean. If truthy, each table is streamed to postgres with COPY ... FROM STDIN instead of
+                         being written with DataFrame.to_sql. This is by far the fastest option for large data sets.
+                         Requires the engine to use the psycopg2 driver.
+
+        :param max_workers: None or a positive integer. If provided, each table is COPY'ed (as per use_copy) into
+                            a staging table, up to max_workers tables at a time over separate connections. The
+                            schema is then updated from the staging tables with a single transaction, so that
+                            readers never see a partially loaded schema.
+
         :return:
         '''
         verify(_pg_name(active_fld) ==  active_fld, "active_fld needs to be compliant with PG naming conventions")
+        verify(not use_copy or psycopg2, "need psycopg2 to use the use_copy write option")
+        verify(max_workers is None or psycopg2, "need psycopg2 to use the max_workers write option")
+        verify_max_workers_option(max_workers)
         active_field_tables = _active_fld_tables(engine, schema, active_fld) if active_fld else set()
         self._check_good_pgtd_compatible_table_field_names()
         msg = []
         verify(self.tdf.good_pan_dat_object(pan_dat, msg.append),
                "pan_dat not a good object for this factory : %s" %"\n".join(msg))
         self.check_tables_fields(engine, schema, error_on_missing_table=True) # call self.write_schema as needed
-        self._handle_prexisting_rows(engine, schema, pre_existing_rows or {})
+        merge_tables = self._handle_prexisting_rows(engine, schema, pre_existing_rows or {},
+                                                    delete_rows=max_workers is None)
         pan_dat = self.tdf._pre_write_adjustment(pan_dat)
-        for table in self._ordered_tables():
+        merge_rows = {t: self._table_rows(pan_dat, t, active_fld, active_field_tables) for t in merge_tables}
+        tables = [t for t in self._ordered_tables() if t not in merge_tables]
+        if max_workers is not None:
+            # the merge is part of the final staging transaction
+            self._staged_copy(engine, schema, {t: self._table_rows(pan_dat, t, active_fld, active_field_tables)
+                                               for t in tables}, pre_existing_rows or {}, max_workers,
+                              merge_rows=merge_rows)
+            return
+        if merge_tables:
+            # the other tables are written in foreign key order along with the merge, as one transaction
+            with self._transaction_cursor(engine) as cursor:
+                def write_table(t):
+                    (self._copy_rows if use_copy else self._insert_rows)(
+                        cursor, schema, t, *self._table_rows(pan_dat, t, active_fld, active_field_tables))
+                self._merged_write(cursor, schema, tables, pre_existing_rows or {}, merge_rows, write_table)
+            return
+        if use_copy:
+            with self._transaction_cursor(engine) as cursor:
+                for table in tables:
+                    self._copy_rows(cursor, schema, table, *self._table_rows(pan_dat, table, active_fld,
+                                                                            active_field_tables))
+            return
+        for table in tables:
             df = getattr(pan_dat, table).copy(deep=True)
             fields = self.tdf.primary_key_fields.get(table, ()) + self.tdf.data_fields.get(table, ())
             df.rename(columns={f: _pg_name(f) for f in fields}, inplace=True)
@@ -537,6 +938,26 @@ class PostgresPanFactory(_PostgresFactory):
                 df[active_fld] = True
             df.to_sql(name=table, schema=schema, con=engine, if_exists="append", index=False)
 
+    def _table_rows(self, pan_dat, table, active_fld, active_fld_tables):
+        """
+        :param pan_dat: a PanDat object that has already been through _pre_write_adjustment
+        :return: the postgres field names of the table, and a generator of its rows. Nulls become None and
+                 integral floats (i.e. ints that pandas promoted to float) become int.
+        """
+        fields = self.tdf.primary_key_fields.get(table, ()) + self.tdf.data_fields.get(table, ())
+        df = getattr(pan_dat, table)[list(fields)]
+        extra = (True,) if table in active_fld_tables else ()
+        def cell(x):
+            if isnull(x):
+                return None
+            if numericish(x) and not (x is True or x is False or type(x).__name__ == "bool_"):
+                return float(x) if safe_apply(int)(x) != x else int(x)
+            return x
+        def rows():
+            for row in df.itertuples(index=False, name=None):
+                yield tuple(map(cell, row)) + extra
+        return list(map(_pg_name, fields)) + ([active_fld] if extra else []), rows()
+
 
 
 
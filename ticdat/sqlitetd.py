@@ -5,9 +5,11 @@ PEP8
 import os
 from collections import defaultdict
 from ticdat.utils import freezable_factory, TicDatError, verify, stringish, dictish, containerish, numericish
-from ticdat.utils import FrozenDict, all_underscore_replacements, find_duplicates
+from ticdat.utils import FrozenDict, sqlite_table_names, find_duplicates
 from ticdat.utils import create_duplicate_focused_tdf, create_generic_free, safe_apply
+from ticdat.utils import verify_duplicates_option, duplicates_read_result, primary_keys_from_columns
 import datetime
+from itertools import islice
 try:
     import sqlite3 as sql
 except:
@@ -67,15 +69,16 @@ class SQLiteTicFactory(freezable_factory(object, "_isFrozen")) :
         self.tic_dat_factory = tic_dat_factory
         self._duplicate_focused_tdf = create_duplicate_focused_tdf(tic_dat_factory)
         self._isFrozen = True
-    def _Rtn(self, freeze_it):
-        def rtn(*args, **kwargs):
-            rtn = self.tic_dat_factory.TicDat(*args, **kwargs)
+    def _Rtn(self, freeze_it, duplicates="last_wins"):
+        def rtn(**kwargs):
+            rtn = self.tic_dat_factory.TicDat.from_trusted_columns(**kwargs)
             rtn = self.tic_dat_factory._parameter_table_post_read_adjustment(rtn)
             if freeze_it:
-                return self.tic_dat_factory.freeze_me(rtn)
-            return rtn
+                rtn = self.tic_dat_factory.freeze_me(rtn)
+            return duplicates_read_result(rtn, duplicates, duplicates != "last_wins" and
+                                          primary_keys_from_columns(self.tic_dat_factory, kwargs))
         return rtn
-    def create_tic_dat(self, db_file_path, freeze_it = False):
+    def create_tic_dat(self, db_file_path, freeze_it = False, duplicates="last_wins"):
         """
         Create a TicDat object from a SQLite database file
 
@@ -83,7 +86,13 @@ class SQLiteTicFactory(freezable_factory(object, "_isFrozen")) :
 
         :param freeze_it: boolean. should the returned object be frozen?
 
-        :return: a TicDat object populated by the matching tables.
+        :param duplicates: how to handle rows with duplicated primary keys, which are found while reading.
+                           "last_wins" : the last row read wins, and no duplicate checking is performed.
+                           "raise" : raise a TicDatError if any duplicates are found.
+                           "report" : return the pair of the TicDat object (for which the last row read wins)
+                                      and a find_duplicates style dictionary.
+
+        :return: a TicDat object populated by the matching tables (or a pair, see the duplicates argument).
 
         caveats : "inf" and "-inf" (case insensitive) are read as floats, unless the infinity_io_flag
                   is being applied.
@@ -92,7 +101,8 @@ class SQLiteTicFactory(freezable_factory(object, "_isFrozen")) :
                   Missing fields on matching tables throw an exception.
         """
         verify(sql, "sqlite3 needs to be installed to use this subroutine")
-        return self._Rtn(freeze_it)(**self._create_tic_dat(db_file_path))
+        verify_duplicates_option(duplicates)
+        return self._Rtn(freeze_it, duplicates)(**self._create_tic_dat(db_file_path))
     def create_tic_dat_from_sql(self, sql_file_path, includes_schema = False,
                                 freeze_it = False):
         """
@@ -142,27 +152,16 @@ class SQLiteTicFactory(freezable_factory(object, "_isFrozen")) :
                                                 difference(tdf.generic_tables)):
                     con.execute(str)
             with open(sql_file_path, "r") as f:
-                for str in f.read().split(";"):
-                    con.execute(str)
+                con.executescript(f.read())
             return self._create_tic_dat_from_con(con,
                         {t:t for t in self.tic_dat_factory.all_tables})
-    def _get_table_names(self, db_file_path, tables):
+    def _get_table_names(self, con, db_file_path, tables):
         rtn = {}
-        with sql.connect(db_file_path) as con:
-            def try_name(name):
-                try :
-                    con.execute("Select * from [%s]"%name)
-                except :
-                    return False
-                return True
-            for table in tables:
-                rtn[table] = [t for t in all_underscore_replacements(table) if try_name(t)]
-                verify(len(rtn[table]) <= 1, "Duplicate tables found for table %s in SQLite file %s"%
-                                  (table, db_file_path))
-                if rtn[table]:
-                    rtn[table] = rtn[table][0]
-                else:
-                    rtn.pop(table)
+        for table, sql_tables in sqlite_table_names(con, tables).items():
+            verify(len(sql_tables) <= 1, "Duplicate tables found for table %s in SQLite file %s"%
+                              (table, db_file_path))
+            if sql_tables:
+                rtn[table] = sql_tables[0]
         return rtn
     def _check_tables_fields(self, db_file_path, tables):
         tdf = self.tic_dat_factory
@@ -173,12 +172,15 @@ class SQLiteTicFactory(freezable_factory(object, "_isFrozen")) :
                 pass
         except Exception as e:
             raise TDE("Unable to open %s as SQLite file : %s"%(db_file_path, e))
-        table_names = self._get_table_names(db_file_path, tables)
         with sql.connect(db_file_path) as con:
+            table_names = self._get_table_names(con, db_file_path, tables)
             for table, sql_table in table_names.items():
+                sql_fields = {x[1].lower() for x in con.execute("PRAGMA table_info([%s])"%sql_table)}
                 for field in tdf.primary_key_fields.get(table, ()) + \
                              tdf.data_fields.get(table, ()):
-                    try :
+                    if field.lower() in sql_fields:
+                        continue
+                    try : # the table_info misses the rowid style columns
                         con.execute("Select [%s] from [%s]"%(field, sql_table))
                     except :
                         raise TDE("Unable to recognize field %s in table %s for file %s"%
@@ -222,20 +224,12 @@ class SQLiteTicFactory(freezable_factory(object, "_isFrozen")) :
             fields = tdf.primary_key_fields.get(table, ()) + tdf.data_fields.get(table, ())
             if not fields:
                 assert table in tdf.generic_tables
-                fields = tuple(x[1] for x in con.execute("PRAGMA table_info(%s)"%table))
-            rtn[table]= {} if tdf.primary_key_fields.get(table, ())  else []
-            for row in con.execute("Select %s from [%s]"%(", ".join(_brackets(fields)),
-                                                          table_names[table])):
-                if table in tdf.generic_tables:
-                    rtn[table].append({f:self._read_data_cell(table, f, d) for f, d in zip(fields, row)})
-                else:
-                    pkfs = tdf.primary_key_fields.get(table, ())
-                    pk = tuple(self._read_data_cell(table, f, x) for f, x in zip(pkfs, row[:len(pkfs)]))
-                    data = [self._read_data_cell(table, f, x) for f, x in zip(fields[len(pkfs):], row[len(pkfs):])]
-                    if dictish(rtn[table]) :
-                        rtn[table][pk[0] if len(pk) == 1 else tuple(pk)] = data
-                    else :
-                        rtn[table].append(data)
+                fields = tuple(x[1] for x in con.execute("PRAGMA table_info([%s])"%table_names[table]))
+            rows = [[self._read_data_cell(table, f, x) for f, x in zip(fields, row)]
+                    for row in con.execute("Select %s from [%s]"%(", ".join(_brackets(fields)),
+                                                                  table_names[table]))]
+            # the columns are handed to TicDat.from_trusted_columns
+            rtn[table] = {f: list(c) for f, c in zip(fields, zip(*rows) if rows else [()] * len(fields))}
         return rtn
     def _ordered_tables(self):
         rtn = []
@@ -279,35 +273,47 @@ class SQLiteTicFactory(freezable_factory(object, "_isFrozen")) :
         if x is True or x is False:
             return str(x)
         return self.tic_dat_factory._infinity_flag_write_cell(t, f, x)
-    def _get_data(self, tic_dat, as_sql):
-        rtn = []
-        for t in self.tic_dat_factory.all_tables:
-            _t = getattr(tic_dat, t)
-            if dictish(_t) :
-                primarykeys = tuple(self.tic_dat_factory.primary_key_fields[t])
+    def _write_data_cell_function(self, t, f):
+        cell = self.tic_dat_factory._infinity_flag_write_cell_function(t, f)
+        return lambda x: str(x) if x is True or x is False else cell(x)
+    def _table_data(self, tic_dat, t):
+        """
+        :return: the fields of table t, and a generator of the (written) data rows of table t
+        """
+        _t = getattr(tic_dat, t)
+        if dictish(_t) :
+            primarykeys = tuple(self.tic_dat_factory.primary_key_fields[t])
+            datafields = tuple(self.tic_dat_factory.data_fields.get(t, ()))
+            pk_cells = [self._write_data_cell_function(t, f) for f in primarykeys]
+            data_cells = [(f, self._write_data_cell_function(t, f)) for f in datafields]
+            def rows():
                 for pkrow, sqldatarow in _t.items() :
-                    _items = list(sqldatarow.items())
-                    fields = primarykeys + tuple(x[0] for x in _items)
-                    datarow = ((pkrow,) if len(primarykeys)==1 else pkrow) + tuple(x[1] for x in _items)
-                    assert len(datarow) == len(fields)
-                    datarow = tuple(self._write_data_cell(t, f, x) for f,x in zip(fields, datarow))
-                    str = "INSERT INTO [%s] (%s) VALUES (%s)"%(t, ",".join(_brackets(fields)),
-                          ",".join("%s" if as_sql else "?" for _ in fields))
-                    if as_sql:
-                        rtn.append((str%tuple(map(_insert_format, datarow))) + ";")
-                    else:
-                        rtn.append((str, datarow))
-            else :
-                for sqldatarow in (_t if containerish(_t) else _t()) :
-                    k,v = zip(*sqldatarow.items())
-                    str = "INSERT INTO [%s] (%s) VALUES (%s)"%\
-                             (t, ",".join(_brackets(k)), ",".join(
-                                ["%s" if as_sql else "?"]*len(sqldatarow)))
-                    if as_sql:
-                        rtn.append((str%tuple(map(_insert_format, v))) + ";")
-                    else:
-                        rtn.append((str,v))
-        return tuple(rtn)
+                    pkrow = (pkrow,) if len(primarykeys)==1 else pkrow
+                    yield tuple(c(x) for c,x in zip(pk_cells, pkrow)) + \
+                          tuple(c(sqldatarow[f]) for f,c in data_cells)
+            return primarykeys + datafields, rows()
+        datafields = tuple(self.tic_dat_factory.data_fields[t])
+        data_cells = [(f, self._write_data_cell_function(t, f)) for f in datafields]
+        return datafields, (tuple(c(sqldatarow[f]) for f,c in data_cells)
+                            for sqldatarow in (_t if containerish(_t) else _t()))
+    def _insert_sql(self, t, fields, as_sql):
+        return "INSERT INTO [%s] (%s) VALUES (%s)"%(t, ",".join(_brackets(fields)),
+                                                   ",".join("%s" if as_sql else "?" for _ in fields))
+    def _get_data(self, tic_dat, rows_per_insert=1):
+        """
+        generates the INSERT statements for the tic_dat data, table by table
+        """
+        for t in self.tic_dat_factory.all_tables:
+            fields, rows = self._table_data(tic_dat, t)
+            if rows_per_insert == 1:
+                str = self._insert_sql(t, fields, as_sql=True)
+                for datarow in rows:
+                    yield (str%tuple(map(_insert_format, datarow))) + ";"
+            else:
+                str = "INSERT INTO [%s] (%s) VALUES\n"%(t, ",".join(_brackets(fields)))
+                for batch in iter(lambda: list(islice(rows, rows_per_insert)), []):
+                    yield str + ",\n".join("(%s)"%",".join(map(_insert_format, datarow))
+                                           for datarow in batch) + ";"
     def write_db_schema(self, db_file_path):
         """
         :param db_file_path: the file path of the SQLite database to create
@@ -342,21 +348,28 @@ class SQLiteTicFactory(freezable_factory(object, "_isFrozen")) :
         if self.tic_dat_factory.generic_tables:
              dat, tdf = create_generic_free(tic_dat, self.tic_dat_factory)
              return tdf.sql.write_db_data(dat, db_file_path, allow_overwrite)
-        if not os.path.exists(db_file_path) :
+        new_file = not os.path.exists(db_file_path)
+        if new_file :
             self.write_db_schema(db_file_path)
         table_names = self._check_tables_fields(db_file_path, self.tic_dat_factory.all_tables)
         with _sql_con(db_file_path, foreign_keys=False) as con:
+            if new_file:
+                # a crash can't lose any pre-existing data, so skip the journal file and the fsync calls
+                con.execute("PRAGMA synchronous = OFF")
+                con.execute("PRAGMA journal_mode = MEMORY")
+            con.execute("BEGIN")
             for t in self.tic_dat_factory.all_tables:
                 verify(table_names.get(t) == t, "Failed to find table %s in path %s"%
                                             (t, db_file_path))
                 verify(allow_overwrite or not any(True for _ in  con.execute("Select * from [%s]"%t)),
                         "allow_overwrite is False, but there are already data records in %s"%t)
                 con.execute("Delete from [%s]"%t) if allow_overwrite else None
-            for sql_str, data in self._get_data(tic_dat, as_sql=False):
-                con.execute(sql_str, list(data))
+            for t in self.tic_dat_factory.all_tables:
+                fields, rows = self._table_data(tic_dat, t)
+                con.executemany(self._insert_sql(t, fields, as_sql=False), rows)
 
     def write_sql_file(self, tic_dat, sql_file_path, include_schema = False,
-                       allow_overwrite = False):
+                       allow_overwrite = False, rows_per_insert = 1):
         """
         write the sql for the ticDat data to a text file
 
@@ -368,6 +381,11 @@ class SQLiteTicFactory(freezable_factory(object, "_isFrozen")) :
 
         :param allow_overwrite: boolean - are we allowed to overwrite pre-existing file
 
+        :param rows_per_insert: the (maximum) number of rows for each INSERT statement. If larger than 1,
+                                then multi-row INSERT statements are written, and the data statements
+                                are wrapped in a single BEGIN/COMMIT transaction. This makes for a smaller
+                                file that can be replayed much faster.
+
         :return:
 
         caveats : float("inf"), float("-inf") are written as "inf", "-inf" (unless infinity_io_flag
@@ -376,16 +394,22 @@ class SQLiteTicFactory(freezable_factory(object, "_isFrozen")) :
         verify(sql, "sqlite3 needs to be installed to use this subroutine")
         verify(allow_overwrite or not os.path.exists(sql_file_path),
                "The %s path exists and overwrite is not allowed"%sql_file_path)
+        verify(isinstance(rows_per_insert, int) and rows_per_insert >= 1,
+               "rows_per_insert should be a positive integer")
         must_schema = set(self.tic_dat_factory.all_tables if include_schema else [])
         if self.tic_dat_factory.generic_tables:
              gt = self.tic_dat_factory.generic_tables
              dat, tdf = create_generic_free(tic_dat, self.tic_dat_factory)
-             return tdf.sql._write_sql_file(dat, sql_file_path, must_schema.union(gt))
-        return self._write_sql_file(tic_dat, sql_file_path, must_schema)
+             return tdf.sql._write_sql_file(dat, sql_file_path, must_schema.union(gt), rows_per_insert)
+        return self._write_sql_file(tic_dat, sql_file_path, must_schema, rows_per_insert)
 
-    def _write_sql_file(self, tic_dat, sql_file_path, schema_tables):
-        with open(sql_file_path, "w") as f:
-            for str in self._get_schema_sql(schema_tables) + \
-                       self._get_data(tic_dat, as_sql=True):
+    def _write_sql_file(self, tic_dat, sql_file_path, schema_tables, rows_per_insert=1):
+        # the statements are streamed to the (buffered) file, rather than collected in memory first
+        with open(sql_file_path, "w", buffering=2**20) as f:
+            for str in self._get_schema_sql(schema_tables):
+                f.write(str + "\n")
+            f.write("BEGIN;\n" if rows_per_insert > 1 else "")
+            for str in self._get_data(tic_dat, rows_per_insert):
                 f.write(str + "\n")
+            f.write("COMMIT;\n" if rows_per_insert > 1 else "")
 
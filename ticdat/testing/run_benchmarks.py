@@ -0,0 +1,504 @@
+#useful helper benchmarking script. Run as
+# python run_benchmarks.py [number of rows] [benchmark names...]
+# not part of the unit test suite, since the timings are machine dependent
+
+import sys
+import time
+import tracemalloc
+import ticdat
+from ticdat import TicDatFactory
+
+def _timed(f):
+    start = time.time()
+    rtn = f()
+    return rtn, time.time() - start
+
+def _held_memory(f):
+    tracemalloc.start()
+    try:
+        rtn = f()
+        return rtn, tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+def _peak_memory(f):
+    tracemalloc.start()
+    try:
+        rtn = f()
+        return rtn, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def _cost_data(n):
+    return {(i, i + 1): [i * 1.5, i * .5] for i in range(n)}
+
+def bench_rows(n):
+    """
+    memory and speed of building, reading and freezing a two data field TicDat table
+    """
+    tdf = TicDatFactory(cost=[["a", "b"], ["c", "d"]])
+    data = _cost_data(n)
+    dat, build = _timed(lambda: tdf.TicDat(cost=data))
+    del dat
+    dat, held = _held_memory(lambda: tdf.TicDat(cost=data))
+    _, read = _timed(lambda: sum(r["c"] for r in dat.cost.values()))
+    _, freeze = _timed(lambda: ticdat.freeze_me(dat))
+    return {"build": build, "bytes/row": held/n, "read": read, "freeze": freeze}
+
+def bench_columnar_rows(n):
+    """
+    as per bench_rows, but for a columnar table
+    """
+    tdf = TicDatFactory(cost=[["a", "b"], ["c", "d"]])
+    tdf.set_data_type("cost", "c")
+    tdf.set_data_type("cost", "d")
+    tdf.set_columnar_tables(["cost"])
+    data = _cost_data(n)
+    dat, build = _timed(lambda: tdf.TicDat(cost=data))
+    del dat
+    dat, held = _held_memory(lambda: tdf.TicDat(cost=data))
+    _, read = _timed(lambda: sum(r["c"] for r in dat.cost.values()))
+    _, freeze = _timed(lambda: ticdat.freeze_me(dat))
+    return {"build": build, "bytes/row": held/n, "read": read, "freeze": freeze}
+
+def bench_reads(n):
+    """
+    construction throughput (rows/second) of the sql, csv and json TicDat readers
+    """
+    import os, shutil, tempfile
+    tdf = TicDatFactory(cost=[["a", "b"], ["c", "d"]])
+    dat = tdf.TicDat(cost=_cost_data(n))
+    dir_path = tempfile.mkdtemp()
+    try:
+        rtn = {}
+        for name, write, read, path in [
+            ("sql", tdf.sql.write_db_data, tdf.sql.create_tic_dat, "bench.db"),
+            ("csv", tdf.csv.write_directory, tdf.csv.create_tic_dat, "bench_csv"),
+            ("json", tdf.json.write_file, tdf.json.create_tic_dat, "bench.json"),
+            ("sql_file", tdf.sql.write_sql_file, tdf.sql.create_tic_dat_from_sql, "bench.sql"),
+            ("sql_file batched", lambda dat, path: tdf.sql.write_sql_file(dat, path, rows_per_insert=500),
+             tdf.sql.create_tic_dat_from_sql, "bench_batched.sql")]:
+            path = os.path.join(dir_path, path)
+            write(dat, path)
+            _, rtn[name] = _timed(lambda: read(path))
+            rtn[name + " rows/sec"] = n / rtn[name]
+        return rtn
+    finally:
+        shutil.rmtree(dir_path)
+
+def bench_writes(n):
+    """
+    throughput (rows/second) of the TicDat writers
+    """
+    import os, shutil, tempfile
+    tdf = TicDatFactory(cost=[["a", "b"], ["c", "d"]])
+    dat = tdf.TicDat(cost=_cost_data(n))
+    dir_path = tempfile.mkdtemp()
+    try:
+        rtn = {}
+        for name, write, path in [
+            ("sql", tdf.sql.write_db_data, "bench.db"),
+            ("sql_file", tdf.sql.write_sql_file, "bench.sql"),
+            ("sql_file batched", lambda dat, path: tdf.sql.write_sql_file(dat, path, rows_per_insert=500),
+             "bench_batched.sql")]:
+            path = os.path.join(dir_path, path)
+            _, rtn[name] = _timed(lambda: write(dat, path))
+            rtn[name + " rows/sec"] = n / rtn[name]
+        return rtn
+    finally:
+        shutil.rmtree(dir_path)
+
+def bench_sqlite_discovery(n):
+    """
+    time to open a 60 table SQLite database (whose table names have many underscores), with n total rows
+    """
+    import os, shutil, tempfile
+    from ticdat import PanDatFactory
+    schema = {f"the_table_with_the_number_{i}_in_it": [["a", "b"], ["c", "d"]] for i in range(60)}
+    tdf, pdf = TicDatFactory(**schema), PanDatFactory(**schema)
+    data = _cost_data(n // 60)
+    dir_path = tempfile.mkdtemp()
+    try:
+        path = os.path.join(dir_path, "bench.db")
+        tdf.sql.write_db_data(tdf.TicDat(**{t: data for t in schema}), path)
+        rtn = {}
+        _, rtn["tic_dat"] = _timed(lambda: tdf.sql.create_tic_dat(path))
+        _, rtn["pan_dat"] = _timed(lambda: pdf.sql.create_pan_dat(path))
+        return rtn
+    finally:
+        shutil.rmtree(dir_path)
+
+def bench_copy_to_tic_dat(n):
+    """
+    speed of converting a PanDat object into a TicDat object
+    """
+    from ticdat import PanDatFactory
+    pdf = PanDatFactory(cost=[["a", "b"], ["c", "d"]], other=[[], ["e", "f"]])
+    data = _cost_data(n)
+    dat = pdf.PanDat(cost=[k + tuple(v) for k,v in data.items()], other=list(data.values()))
+    _, rtn = _timed(lambda: pdf.copy_to_tic_dat(dat))
+    return {"copy_to_tic_dat": rtn}
+
+def _netflow_dat(tdf, n):
+    import random
+    random.seed(0)
+    nodes = ["n%s"%i for i in range(300)]
+    commodities = ["c%s"%i for i in range(40)]
+    return tdf.TicDat(nodes=nodes[:-3], commodities=commodities[:-2],
+                      arcs={(random.choice(nodes), random.choice(nodes)): 1 for _ in range(n//50)},
+                      cost={(random.choice(commodities), random.choice(nodes), random.choice(nodes)): 1
+                            for _ in range(n)},
+                      inflow={(c, m): 1 for c in commodities for m in nodes})
+
+def bench_foreign_keys(n):
+    """
+    speed of finding the foreign key failures of a netflow TicDat with (up to) n cost rows
+    """
+    from ticdat.testing.ticdattestutils import netflowSchema, addNetflowForeignKeys
+    tdf = TicDatFactory(**netflowSchema())
+    addNetflowForeignKeys(tdf)
+    dat = _netflow_dat(tdf, n)
+    _, rtn = _timed(lambda: tdf.find_foreign_key_failures(dat))
+    return {"find_foreign_key_failures": rtn}
+
+def bench_pandat_foreign_keys(n):
+    """
+    speed of finding and removing the foreign key failures of a netflow PanDat with (up to) n cost rows
+    """
+    from ticdat.testing.ticdattestutils import netflowSchema, addNetflowForeignKeys
+    from ticdat import PanDatFactory
+    tdf, pdf = TicDatFactory(**netflowSchema()), PanDatFactory(**netflowSchema())
+    addNetflowForeignKeys(pdf)
+    dat = pdf.copy_pan_dat(tdf.copy_to_pandas(_netflow_dat(tdf, n), drop_pk_columns=False))
+    rtn = {}
+    _, rtn["find_foreign_key_failures"] = _timed(lambda: pdf.find_foreign_key_failures(dat))
+    _, rtn["remove_foreign_key_failures"] = _timed(lambda: pdf.remove_foreign_key_failures(dat))
+    return rtn
+
+def bench_integrity_checks(n):
+    """
+    serial vs threaded data type and data row checks of a PanDat object with 40 tables and n total rows
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from ticdat import PanDatFactory
+    pdf = PanDatFactory(**{f"table_{i}": [["a", "b"], ["c", "d"]] for i in range(40)})
+    for t in pdf.all_tables:
+        pdf.set_data_type(t, "c", max=float("inf"), inclusive_max=True)
+        pdf.add_data_row_predicate(t, lambda row: row["c"] >= row["d"])
+    data = [k + tuple(v) for k,v in _cost_data(n // 40).items()]
+    dat = pdf.PanDat(**{t: data for t in pdf.all_tables})
+    rtn = {}
+    for name, executor in [("serial", None), ("threaded", ThreadPoolExecutor(8))]:
+        _, rtn[name] = _timed(lambda: (pdf.find_data_type_failures(dat, executor=executor),
+                                       pdf.find_data_row_failures(dat, executor=executor)))
+    return rtn
+
+def bench_data_types(n):
+    """
+    speed of find_data_type_failures for a TicDat and a PanDat object with n rows
+    """
+    from ticdat import PanDatFactory
+    rtn = {}
+    for name, factory in [("tic_dat", TicDatFactory), ("pan_dat", PanDatFactory)]:
+        f = factory(cost=[["a", "b"], ["c", "d"]])
+        f.set_data_type("cost", "a", must_be_int=True)
+        f.set_data_type("cost", "c", max=float("inf"), inclusive_max=True)
+        f.set_data_type("cost", "d", max=1000)
+        data = _cost_data(n)
+        dat = f.TicDat(cost=data) if factory is TicDatFactory else \
+              f.PanDat(cost=[k + tuple(v) for k,v in data.items()])
+        _, rtn[name] = _timed(lambda: f.find_data_type_failures(dat))
+    return rtn
+
+def bench_row_predicates(n):
+    """
+    speed of find_data_row_failures for row-wise vs vectorized PanDatFactory predicates, with n rows
+    """
+    from ticdat import PanDatFactory
+    rtn = {}
+    data = [k + tuple(v) for k,v in _cost_data(n).items()]
+    for name, vectorized, predicate in [("row-wise", False, lambda row: row["c"] >= row["d"]),
+                                        ("vectorized", True, lambda df: df["c"] >= df["d"])]:
+        pdf = PanDatFactory(cost=[["a", "b"], ["c", "d"]])
+        pdf.add_data_row_predicate("cost", predicate, vectorized=vectorized)
+        dat = pdf.PanDat(cost=data)
+        _, rtn[name] = _timed(lambda: pdf.find_data_row_failures(dat))
+    return rtn
+
+def bench_pandat_io_adjustments(n):
+    """
+    speed of the infinity flag and datetime adjustments made by the PanDatFactory readers and writers
+    """
+    from ticdat import PanDatFactory
+    pdf = PanDatFactory(cost=[["a", "b"], ["c", "d"]], events=[["e"], ["when"]])
+    pdf.set_infinity_io_flag(999999)
+    pdf.set_data_type("cost", "c", max=float("inf"), inclusive_max=True)
+    pdf.set_data_type("events", "when", datetime=True)
+    data = _cost_data(n)
+    dat = pdf.PanDat(cost=[k + (float("inf") if k[0] % 3 else v[0], v[1]) for k,v in data.items()],
+                     events=[[i, f"2021-0{i%9+1}-01"] for i in range(n)])
+    rtn = {}
+    written, rtn["pre_write"] = _timed(lambda: pdf._pre_write_adjustment(dat))
+    _, rtn["post_read"] = _timed(lambda: pdf._general_post_read_adjustment(written))
+    return rtn
+
+def bench_duplicate_checks(n):
+    """
+    reading with duplicate checking, via find_duplicates followed by create_tic_dat vs the duplicates argument
+    """
+    import os, shutil, tempfile
+    tdf = TicDatFactory(cost=[["a", "b"], ["c", "d"]])
+    dat = tdf.TicDat(cost=_cost_data(n))
+    dir_path = tempfile.mkdtemp()
+    try:
+        rtn = {}
+        for name, write, path in [("sql", tdf.sql.write_db_data, "bench.db"),
+                                  ("csv", tdf.csv.write_directory, "bench_csv"),
+                                  ("json", tdf.json.write_file, "bench.json")]:
+            path = os.path.join(dir_path, path)
+            write(dat, path)
+            reader = getattr(tdf, name)
+            _, rtn[name + " two pass"] = _timed(lambda: (reader.find_duplicates(path), reader.create_tic_dat(path)))
+            _, rtn[name + " one pass"] = _timed(lambda: reader.create_tic_dat(path, duplicates="raise"))
+        return rtn
+    finally:
+        shutil.rmtree(dir_path)
+
+def bench_threaded_reads(n):
+    """
+    serial vs threaded (8 workers) reading of a 50 table csv directory and SQLite database, with n total rows
+    """
+    import os, shutil, tempfile
+    from ticdat import PanDatFactory
+    schema = {f"table_{i}": [["a", "b"], ["c", "d"]] for i in range(50)}
+    tdf, pdf = TicDatFactory(**schema), PanDatFactory(**schema)
+    dat = tdf.TicDat(**{t: _cost_data(n // 50) for t in schema})
+    dir_path = tempfile.mkdtemp()
+    try:
+        csv_path, db_path = os.path.join(dir_path, "bench_csv"), os.path.join(dir_path, "bench.db")
+        tdf.csv.write_directory(dat, csv_path)
+        tdf.sql.write_db_data(dat, db_path)
+        rtn = {}
+        for name, read, path in [("csv tic_dat", tdf.csv.create_tic_dat, csv_path),
+                                 ("csv pan_dat", pdf.csv.create_pan_dat, csv_path),
+                                 ("sql pan_dat", pdf.sql.create_pan_dat, db_path)]:
+            for max_workers in [None, 8]:
+                _, rtn[f"{name} {'threaded' if max_workers else 'serial'}"] = \
+                    _timed(lambda: read(path, max_workers=max_workers))
+        return rtn
+    finally:
+        shutil.rmtree(dir_path)
+
+def bench_pandat_json_reads(n):
+    """
+    PanDat json reading of an n row table, single parse vs the json.dumps/read_json round trip
+    (which is forced by passing a default valued read_json argument), with the peak memory of each
+    """
+    import os, shutil, tempfile
+    from ticdat import PanDatFactory
+    tdf = TicDatFactory(cost=[["a", "b"], ["c", "d"]])
+    pdf = PanDatFactory(**tdf.schema())
+    pan_dat = tdf.copy_to_pandas(tdf.TicDat(cost=_cost_data(n)), drop_pk_columns=False)
+    dir_path = tempfile.mkdtemp()
+    try:
+        path = os.path.join(dir_path, "bench.json")
+        pdf.json.write_file(pan_dat, path)
+        rtn = {"file MB": os.path.getsize(path) / 1e6}
+        for name, kwargs in [("single parse", {}), ("round trip", {"convert_axes": True})]:
+            _, rtn[name] = _timed(lambda: pdf.json.create_pan_dat(path, **kwargs))
+            _, peak = _peak_memory(lambda: pdf.json.create_pan_dat(path, **kwargs))
+            rtn[name + " peak MB"] = peak / 1e6
+        return rtn
+    finally:
+        shutil.rmtree(dir_path)
+
+def bench_json_round_trip(n):
+    """
+    TicDat json writing and reading of an n row table, streamed vs the whole document json.dump/json.load
+    (with the full json dictionary held in memory), with the peak memory of each
+    """
+    import os, shutil, tempfile, json
+    from ticdat.jsontd import make_json_dict
+    tdf = TicDatFactory(cost=[["a", "b"], ["c", "d"]])
+    dat = tdf.TicDat(cost=_cost_data(n))
+    def whole_write(path):
+        with open(path, "w") as fp:
+            json.dump(make_json_dict(tdf, dat, use_infinity_io_flag_if_provided=True), fp, sort_keys=True, indent=2)
+    def whole_read(path):
+        return tdf.TicDat(**tdf.json._create_tic_dat_dict(tdf.json._create_jdict(path)))
+    dir_path = tempfile.mkdtemp()
+    try:
+        path = os.path.join(dir_path, "bench.json")
+        rtn = {}
+        for name, write in [("streamed", lambda: tdf.json.write_file(dat, path, allow_overwrite=True)),
+                            ("streamed compact", lambda: tdf.json.write_file(dat, path, allow_overwrite=True,
+                                                                             indent=None)),
+                            ("whole document", lambda: whole_write(path))]:
+            _, rtn[name + " write"] = _timed(write)
+            _, peak = _peak_memory(write)
+            rtn[name + " write peak MB"] = peak / 1e6
+        for name, read in [("streamed", tdf.json.create_tic_dat), ("whole document", whole_read)]:
+            _, rtn[name + " read"] = _timed(lambda: read(path))
+            _, peak = _peak_memory(lambda: read(path))
+            rtn[name + " read peak MB"] = peak / 1e6
+        return rtn
+    finally:
+        shutil.rmtree(dir_path)
+
+def bench_xlsx_reads(n):
+    """
+    TicDat reading of an n row .xlsx sheet by streaming, vs just opening the workbook with xlrd (which the reader
+    used to do before it read any rows), with the peak memory of each
+    """
+    import os, shutil, tempfile, xlrd
+    tdf = TicDatFactory(cost=[["a", "b"], ["c", "d"]])
+    dir_path = tempfile.mkdtemp()
+    try:
+        path = os.path.join(dir_path, "bench.xlsx")
+        tdf.xls.write_file(tdf.TicDat(cost=_cost_data(n)), path)
+        rtn = {"file MB": os.path.getsize(path) / 1e6}
+        for name, read in [("streamed", lambda: tdf.xls.create_tic_dat(path)),
+                           ("xlrd open_workbook", lambda: xlrd.open_workbook(path))]:
+            _, rtn[name] = _timed(read)
+            _, peak = _peak_memory(read)
+            rtn[name + " peak MB"] = peak / 1e6
+        return rtn
+    finally:
+        shutil.rmtree(dir_path)
+
+def bench_xlsx_writes(n):
+    """
+    TicDat writing of an n row .xlsx sheet, with its peak memory
+    """
+    import os, shutil, tempfile
+    tdf = TicDatFactory(cost=[["a", "b"], ["c", "d"]])
+    dat = tdf.TicDat(cost=_cost_data(n))
+    dir_path = tempfile.mkdtemp()
+    try:
+        path = os.path.join(dir_path, "bench.xlsx")
+        write = lambda: tdf.xls.write_file(dat, path, allow_overwrite=True)
+        _, rtn = _timed(write)
+        _, peak = _peak_memory(write)
+        return {"write": rtn, "write rows/sec": n / rtn, "write peak MB": peak / 1e6}
+    finally:
+        shutil.rmtree(dir_path)
+
+def bench_parquet_reads(n):
+    """
+    PanDat reading of an n row table from a csv directory vs a parquet directory, and of a single column
+    (projected) from the parquet directory (skipped unless pyarrow is installed)
+    """
+    try:
+        import pyarrow
+    except ImportError:
+        print("requires pyarrow")
+        return {}
+    import os, shutil, tempfile
+    from ticdat import PanDatFactory
+    tdf = TicDatFactory(cost=[["a", "b"], ["c", "d"]])
+    pdf = PanDatFactory(**tdf.schema())
+    pan_dat = tdf.copy_to_pandas(tdf.TicDat(cost=_cost_data(n)), drop_pk_columns=False)
+    dir_path = tempfile.mkdtemp()
+    try:
+        csv_path, parquet_path = os.path.join(dir_path, "bench_csv"), os.path.join(dir_path, "bench.parquet")
+        pdf.csv.write_directory(pan_dat, csv_path)
+        pdf.parquet.write_directory(pan_dat, parquet_path)
+        rtn = {}
+        _, rtn["csv"] = _timed(lambda: pdf.csv.create_pan_dat(csv_path))
+        _, rtn["parquet"] = _timed(lambda: pdf.parquet.create_pan_dat(parquet_path))
+        _, rtn["parquet memory_map"] = _timed(lambda: pdf.parquet.create_pan_dat(parquet_path, memory_map=True))
+        pdf_c = PanDatFactory(cost=[["a"], []])
+        _, rtn["parquet one column"] = _timed(lambda: pdf_c.parquet.create_pan_dat(parquet_path))
+        return rtn
+    finally:
+        shutil.rmtree(dir_path)
+
+def bench_postgres_writes(n):
+    """
+    rows/sec for writing an n row TicDat and PanDat table to a scratch postgres, with and without use_copy
+    (skipped unless testing.postgresql, sqlalchemy and psycopg2 are installed)
+    """
+    try:
+        import testing.postgresql
+        import sqlalchemy as sa
+        import psycopg2
+    except ImportError:
+        print("requires testing.postgresql, sqlalchemy and psycopg2")
+        return {}
+    from ticdat import PanDatFactory
+    tdf = TicDatFactory(table=[["a", "b"], ["c", "d"]])
+    pdf = PanDatFactory(**tdf.schema())
+    dat = tdf.TicDat(table=_cost_data(n))
+    pan_dat = tdf.copy_to_pandas(dat, drop_pk_columns=False)
+    with testing.postgresql.Postgresql() as postgresql:
+        engine = sa.create_engine(postgresql.url())
+        tdf.pgsql.write_schema(engine, "bench")
+        rtn = {}
+        for name, write in [("tic_dat dsn", lambda: tdf.pgsql.write_data(dat, engine, "bench",
+                                                                          dsn=postgresql.dsn())),
+                            ("tic_dat copy", lambda: tdf.pgsql.write_data(dat, engine, "bench", use_copy=True)),
+                            ("pan_dat to_sql", lambda: pdf.pgsql.write_data(pan_dat, engine, "bench")),
+                            ("pan_dat copy", lambda: pdf.pgsql.write_data(pan_dat, engine, "bench",
+                                                                          use_copy=True))]:
+            rtn[f"{name} rows/sec"] = n / _timed(write)[1]
+        engine.dispose()
+        return rtn
+
+def bench_postgres_reads(n):
+    """
+    reading a 40 table postgres schema with n total rows into a TicDat
+    (skipped unless testing.postgresql, sqlalchemy and psycopg2 are installed)
+    """
+    try:
+        import testing.postgresql
+        import sqlalchemy as sa
+        import psycopg2
+    except ImportError:
+        print("requires testing.postgresql, sqlalchemy and psycopg2")
+        return {}
+    tdf = TicDatFactory(**{f"table_{i}": [["a", "b"], ["c", "d"]] for i in range(40)})
+    dat = tdf.TicDat(**{t: _cost_data(n // 40) for t in tdf.all_tables})
+    with testing.postgresql.Postgresql() as postgresql:
+        engine = sa.create_engine(postgresql.url())
+        tdf.pgsql.write_schema(engine, "bench")
+        tdf.pgsql.write_data(dat, engine, "bench", use_copy=True)
+        rtn = {}
+        _, rtn["create_tic_dat"] = _timed(lambda: tdf.pgsql.create_tic_dat(engine, "bench"))
+        _, rtn["check_tables_fields"] = _timed(lambda: tdf.pgsql.check_tables_fields(engine, "bench"))
+        engine.dispose()
+        return rtn
+
+def bench_postgres_staged_writes(n):
+    """
+    writing a 40 table TicDat with n total rows to a scratch postgres, with use_copy and then staged with
+    1 and 4 workers
+    (skipped unless testing.postgresql, sqlalchemy and psycopg2 are installed)
+    """
+    try:
+        import testing.postgresql
+        import sqlalchemy as sa
+        import psycopg2
+    except ImportError:
+        print("requires testing.postgresql, sqlalchemy and psycopg2")
+        return {}
+    tdf = TicDatFactory(**{f"table_{i}": [["a", "b"], ["c", "d"]] for i in range(40)})
+    dat = tdf.TicDat(**{t: _cost_data(n // 40) for t in tdf.all_tables})
+    with testing.postgresql.Postgresql() as postgresql:
+        engine = sa.create_engine(postgresql.url())
+        tdf.pgsql.write_schema(engine, "bench")
+        rtn = {}
+        _, rtn["use_copy"] = _timed(lambda: tdf.pgsql.write_data(dat, engine, "bench", use_copy=True))
+        for max_workers in [1, 4]:
+            _, rtn[f"staged {max_workers} workers"] = \
+                _timed(lambda: tdf.pgsql.write_data(dat, engine, "bench", max_workers=max_workers))
+        engine.dispose()
+        return rtn
+
+the_benchmarks = {k[len("bench_"):]: v for k,v in list(globals().items()) if k.startswith("bench_")}
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    for name in (sys.argv[2:] or sorted(the_benchmarks)):
+        print(f"\n--------{name} ({n} rows)")
+        for k,v in the_benchmarks[name](n).items():
+            print(f"{k}: {v:.3f}" if k != "bytes/row" else f"{k}: {v:.0f}")
@@ -6,6 +6,7 @@ from ticdat.testing.ticdattestutils import flagged_as_run_alone, fail_to_debugge
 import time
 import datetime
 import math
+from concurrent.futures import ThreadPoolExecutor
 
 import unittest
 try:
@@ -222,6 +223,227 @@ class TestPostres(unittest.TestCase):
         pg_tic_dat = pgtf.create_tic_dat(self.engine, test_schema)
         self.assertTrue(diet_schema._same_data(diet_dat, pg_tic_dat))
 
+    def test_diet_copy(self):
+        if not self.can_run:
+            return
+        pgtf = diet_schema.pgsql
+        pgtf.write_schema(self.engine, test_schema)
+        for dsn in [None, self.postgresql.dsn()]:
+            pgtf.write_data(diet_dat, self.engine, test_schema, dsn=dsn, use_copy=True)
+            self.assertFalse(pgtf.find_duplicates(self.engine, test_schema))
+            pg_tic_dat = pgtf.create_tic_dat(self.engine, test_schema)
+            self.assertTrue(diet_schema._same_data(diet_dat, pg_tic_dat))
+        pdf = PanDatFactory.create_from_full_schema(diet_schema.schema(include_ancillary_info=True))
+        pan_dat = diet_schema.copy_to_pandas(diet_dat, drop_pk_columns=False)
+        pdf.pgsql.write_data(pan_dat, self.engine, test_schema, use_copy=True)
+        self.assertTrue(pdf._same_data(pan_dat, pdf.pgsql.create_pan_dat(self.engine, test_schema)))
+
+    def test_copy_nulls_and_strings(self):
+        if not self.can_run:
+            return
+        tdf = TicDatFactory(table=[["a"], ["b", "c"]])
+        tdf.set_data_type("table", "a", number_allowed=False, strings_allowed='*')
+        tdf.set_data_type("table", "b", nullable=True, max=float("inf"), inclusive_max=True)
+        tdf.set_data_type("table", "c", number_allowed=False, strings_allowed='*', nullable=True)
+        dat = tdf.TicDat(table=[["x", None, ""], ['y,"z"', float("inf"), None], ["\n", 1.5, "null"],
+                                ["w", 2, '"']])
+        schema = test_schema + "_copy"
+        tdf.pgsql.write_schema(self.engine, schema, include_ancillary_info=False)
+        tdf.pgsql.write_data(dat, self.engine, schema, use_copy=True)
+        dat_1 = tdf.pgsql.create_tic_dat(self.engine, schema)
+        self.assertTrue(tdf._same_data(dat, dat_1))
+        self.assertTrue(dat_1.table["x"]["c"] == "" and dat_1.table["y,\"z\""]["c"] is None)
+
+        pdf = PanDatFactory.create_from_full_schema(tdf.schema(include_ancillary_info=True))
+        pan_dat = tdf.copy_to_pandas(dat, drop_pk_columns=False)
+        pdf.pgsql.write_data(pan_dat, self.engine, schema, use_copy=True)
+        pan_dat_1 = pdf.pgsql.create_pan_dat(self.engine, schema)
+        self.assertTrue(pdf._same_data(pan_dat, pan_dat_1, nans_are_same_for_data_rows=True))
+
+    def test_streamed_read(self):
+        if not self.can_run:
+            return
+        tdf = TicDatFactory(table=[["a", "b"], ["c", "d"]])
+        tdf.set_data_type("table", "c", max=float("inf"), inclusive_max=True)
+        tdf.set_data_type("table", "d", min=-float("inf"), inclusive_min=True)
+        tdf.set_infinity_io_flag(1e6)
+        dat = tdf.TicDat(table={(str(i), str(i + 1)): [i * .5, i] for i in range(50000)})
+        dat.table["big", "small"] = [float("inf"), -float("inf")]
+        schema = test_schema + "_streamed"
+        tdf.pgsql.write_schema(self.engine, schema)
+        tdf.pgsql.write_data(dat, self.engine, schema, use_copy=True)
+        self.assertTrue(tdf._same_data(dat, tdf.pgsql.create_tic_dat(self.engine, schema)))
+        with self.engine.connect() as con: # not an Engine, so the rows come from con.execute
+            self.assertTrue(tdf._same_data(dat, tdf.pgsql.create_tic_dat(con, schema)))
+
+    def test_diet_merge(self):
+        if not self.can_run:
+            return
+        pgtf = diet_schema.pgsql
+        pgtf.write_schema(self.engine, test_schema)
+        pgtf.write_data(diet_dat, self.engine, test_schema)
+        merge_all = {t: "merge" for t in diet_schema.all_tables}
+        dat = diet_schema.copy_tic_dat(diet_dat)
+        dat.categories["fat"]["Max Nutrition"] = 70
+        dat.foods["za"] = dat.foods.pop("pizza")
+        for (food, category), row in list(dat.nutrition_quantities.items()):
+            if food == "pizza":
+                dat.nutrition_quantities["za", category] = dat.nutrition_quantities.pop((food, category))
+        self.engine.execute(f"Update {test_schema}.foods set cost = -1 where name = 'hamburger'")
+        pgtf.write_data(dat, self.engine, test_schema, pre_existing_rows=merge_all)
+        self.assertFalse(pgtf.find_duplicates(self.engine, test_schema))
+        self.assertTrue(diet_schema._same_data(dat, pgtf.create_tic_dat(self.engine, test_schema)))
+        pgtf.write_data(diet_dat, self.engine, test_schema, dsn=self.postgresql.dsn(),
+                        pre_existing_rows=dict(merge_all, nutrition_quantities="delete"))
+        self.assertTrue(diet_schema._same_data(diet_dat, pgtf.create_tic_dat(self.engine, test_schema)))
+
+        pdf = PanDatFactory.create_from_full_schema(diet_schema.schema(include_ancillary_info=True))
+        pan_dat = diet_schema.copy_to_pandas(dat, drop_pk_columns=False)
+        pdf.pgsql.write_data(pan_dat, self.engine, test_schema, pre_existing_rows=merge_all)
+        self.assertTrue(pdf._same_data(pan_dat, pdf.pgsql.create_pan_dat(self.engine, test_schema)))
+        ex = None
+        try:
+            pgtf.write_data(diet_dat, self.engine, test_schema, pre_existing_rows={"foods": "upsert"})
+        except utils.TicDatError as te:
+            ex = str(te)
+        self.assertTrue(ex and "bad pre_existing_rows values" in ex)
+
+    def test_diet_staged(self):
+        if not self.can_run:
+            return
+        pgtf = diet_schema.pgsql
+        pgtf.write_schema(self.engine, test_schema)
+        pgtf.write_data(diet_dat, self.engine, test_schema)
+        dat = diet_schema.copy_tic_dat(diet_dat)
+        dat.categories["fat"]["Max Nutrition"] = 70
+        for max_workers in [1, 3]:
+            pgtf.write_data(dat, self.engine, test_schema, max_workers=max_workers)
+            self.assertTrue(diet_schema._same_data(dat, pgtf.create_tic_dat(self.engine, test_schema)))
+            pgtf.write_data(diet_dat, self.engine, test_schema, dsn=self.postgresql.dsn(), max_workers=max_workers)
+            self.assertTrue(diet_schema._same_data(diet_dat, pgtf.create_tic_dat(self.engine, test_schema)))
+        self.assertFalse([_ for _ in self.engine.execute("select table_name from information_schema.tables " +
+                          f"where table_schema = '{test_schema}' and table_name like '_ticdat_staging%%'")])
+
+        bad_dat = diet_schema.copy_tic_dat(dat)
+        bad_dat.nutrition_quantities["junk", "fat"] = 1 # violates a foreign key, so nothing should be written
+        ex = None
+        try:
+            pgtf.write_data(bad_dat, self.engine, test_schema, max_workers=3)
+        except Exception as e:
+            ex = str(e)
+        self.assertTrue(ex and "foreign key" in ex)
+        self.assertTrue(diet_schema._same_data(diet_dat, pgtf.create_tic_dat(self.engine, test_schema)))
+
+        pdf = PanDatFactory.create_from_full_schema(diet_schema.schema(include_ancillary_info=True))
+        pan_dat = diet_schema.copy_to_pandas(dat, drop_pk_columns=False)
+        pdf.pgsql.write_data(pan_dat, self.engine, test_schema, max_workers=3)
+        self.assertTrue(pdf._same_data(pan_dat, pdf.pgsql.create_pan_dat(self.engine, test_schema)))
+
+    def test_diet_staged_merge(self):
+        if not self.can_run:
+            return
+        pgtf = diet_schema.pgsql
+        pgtf.write_schema(self.engine, test_schema)
+        pgtf.write_data(diet_dat, self.engine, test_schema)
+        merge_all = {t: "merge" for t in diet_schema.all_tables}
+        dat = diet_schema.copy_tic_dat(diet_dat)
+        dat.categories["fat"]["Max Nutrition"] = 70
+        dat.foods["za"] = dat.foods.pop("pizza")
+        for (food, category), row in list(dat.nutrition_quantities.items()):
+            if food == "pizza":
+                dat.nutrition_quantities["za", category] = dat.nutrition_quantities.pop((food, category))
+        # the merged parent rows that disappear are still referenced until the "delete" child rows are deleted
+        for pre_existing_rows, next_dat in [(dict(merge_all, nutrition_quantities="delete"), dat),
+                                            (merge_all, diet_dat), (merge_all, dat)]:
+            pgtf.write_data(next_dat, self.engine, test_schema, pre_existing_rows=pre_existing_rows, max_workers=3)
+            self.assertTrue(diet_schema._same_data(next_dat, pgtf.create_tic_dat(self.engine, test_schema)))
+
+        bad_dat = diet_schema.copy_tic_dat(dat)
+        bad_dat.nutrition_quantities["junk", "fat"] = 1 # violates a foreign key, so nothing should be merged
+        ex = None
+        try:
+            pgtf.write_data(bad_dat, self.engine, test_schema, pre_existing_rows=merge_all, max_workers=3)
+        except Exception as e:
+            ex = str(e)
+        self.assertTrue(ex and "foreign key" in ex)
+        self.assertTrue(diet_schema._same_data(dat, pgtf.create_tic_dat(self.engine, test_schema)))
+
+        pdf = PanDatFactory.create_from_full_schema(diet_schema.schema(include_ancillary_info=True))
+        pan_dat = diet_schema.copy_to_pandas(dat, drop_pk_columns=False)
+        pdf.pgsql.write_data(pan_dat, self.engine, test_schema, max_workers=3,
+                             pre_existing_rows=dict(merge_all, nutrition_quantities="delete"))
+        self.assertTrue(pdf._same_data(pan_dat, pdf.pgsql.create_pan_dat(self.engine, test_schema)))
+        for max_workers in [0, -1, 2.5]: # rejected before anything is merged
+            for f in [lambda: pgtf.write_data(diet_dat, self.engine, test_schema, pre_existing_rows=merge_all,
+                                              max_workers=max_workers),
+                      lambda: pdf.pgsql.write_data(pan_dat, self.engine, test_schema, max_workers=max_workers,
+                                                   pre_existing_rows={"foods": "merge"})]:
+                ex = None
+                try:
+                    f()
+                except utils.TicDatError as te:
+                    ex = str(te)
+                self.assertTrue(ex and "max_workers" in ex)
+        self.assertTrue(diet_schema._same_data(dat, pgtf.create_tic_dat(self.engine, test_schema)))
+        self.assertFalse([_ for _ in self.engine.execute("select table_name from information_schema.tables " +
+                          f"where table_schema = '{test_schema}' and table_name like '_ticdat_staging%%'")])
+
+    def test_append_parent_merge_child(self):
+        if not self.can_run:
+            return
+        tdf = TicDatFactory(parent=[["Id"], ["Name"]], child=[["Parent Id", "Position"], ["Value"]])
+        tdf.add_foreign_key("child", "parent", ["Parent Id", "Id"])
+        tdf.set_data_type("parent", "Id")
+        tdf.set_data_type("parent", "Name", number_allowed=False, strings_allowed='*')
+        tdf.set_data_type("child", "Parent Id")
+        tdf.set_data_type("child", "Position")
+        pdf = PanDatFactory.create_from_full_schema(tdf.schema(include_ancillary_info=True))
+        pgtf = tdf.pgsql
+        pgtf.write_schema(self.engine, test_schema)
+        dat = tdf.TicDat(parent={1: "one"}, child={(1, 1): 1.5, (1, 2): 2.5})
+        # the merged child rows reference the appended parent row, so the parent needs to be written first
+        new_dat = tdf.TicDat(parent={2: "two"}, child={(1, 1): 1.75, (2, 1): 3})
+        all_dat = tdf.TicDat(parent={1: "one", 2: "two"}, child=new_dat.child)
+        pre_existing_rows = {"parent": "append", "child": "merge"}
+        for kwargs in [{}, {"use_copy": True}, {"dsn": self.postgresql.dsn()}, {"max_workers": 2}]:
+            pgtf.write_data(dat, self.engine, test_schema)
+            pgtf.write_data(new_dat, self.engine, test_schema, pre_existing_rows=pre_existing_rows, **kwargs)
+            self.assertTrue(tdf._same_data(all_dat, pgtf.create_tic_dat(self.engine, test_schema)))
+
+            bad_dat = tdf.TicDat(parent={3: "three"}, child={(1, 1): 1, (4, 1): 1})
+            ex = None
+            try: # the foreign key violation rolls back the whole write
+                pgtf.write_data(bad_dat, self.engine, test_schema, pre_existing_rows=pre_existing_rows, **kwargs)
+            except Exception as e:
+                ex = str(e)
+            self.assertTrue(ex and "foreign key" in ex)
+            self.assertTrue(tdf._same_data(all_dat, pgtf.create_tic_dat(self.engine, test_schema)))
+
+        for kwargs in [{}, {"use_copy": True}]:
+            pgtf.write_data(dat, self.engine, test_schema)
+            pdf.pgsql.write_data(tdf.copy_to_pandas(new_dat, drop_pk_columns=False), self.engine, test_schema,
+                                 pre_existing_rows=pre_existing_rows, **kwargs)
+            self.assertTrue(tdf._same_data(all_dat, pgtf.create_tic_dat(self.engine, test_schema)))
+
+    def test_staged_long_names(self):
+        if not self.can_run:
+            return
+        long_name = "a_table_name_that_is_long_enough_to_be_truncated_" # staging names are per call, not per name
+        tdf = TicDatFactory(**{long_name + "one": [["pk"], ["data"]], long_name + "two": [["pk"], ["data"]]})
+        for t in tdf.all_tables:
+            tdf.set_data_type(t, "pk")
+        pgtf = tdf.pgsql
+        pgtf.write_schema(self.engine, test_schema)
+        dats = [tdf.TicDat(**{long_name + "one": {i: i}, long_name + "two": {i * 10: i}}) for i in range(1, 5)]
+        pgtf.write_data(dats[0], self.engine, test_schema, max_workers=2)
+        self.assertTrue(tdf._same_data(dats[0], pgtf.create_tic_dat(self.engine, test_schema)))
+        with ThreadPoolExecutor(max_workers=len(dats)) as executor:
+            list(executor.map(lambda dat: pgtf.write_data(dat, self.engine, test_schema, max_workers=2), dats))
+        pg_dat = pgtf.create_tic_dat(self.engine, test_schema)
+        self.assertTrue(any(tdf._same_data(dat, pg_dat) for dat in dats))
+        self.assertFalse([_ for _ in self.engine.execute("select table_name from information_schema.tables " +
+                          f"where table_schema = '{test_schema}' and table_name like '_ticdat_staging%%'")])
+
     def test_diet_no_inf_flagging(self):
         pgtf = diet_schema.pgsql
         pgtf.write_schema(self.engine, test_schema, include_ancillary_info=False)
@@ -159,6 +159,8 @@ class TestCsv(unittest.TestCase):
         csvTicDat = tdf.csv.create_tic_dat(dirPath, freeze_it=True)
         self.assertFalse(tdf.csv.find_duplicates(dirPath))
         self.assertTrue(tdf._same_data(ticDat, csvTicDat))
+        self.assertTrue(tdf._same_data(ticDat, tdf.csv.create_tic_dat(dirPath, max_workers=4)))
+        self.assertTrue(self.firesException(lambda : tdf.csv.create_tic_dat(dirPath, max_workers=-1)))
         csvTicDat = tdf.csv.create_tic_dat(dirPath, freeze_it= True, headers_present=False)
         self.assertFalse(tdf._same_data(ticDat, csvTicDat))
         tdf.csv.write_directory(ticDat, dirPath, write_header=False,allow_overwrite=True)
@@ -276,6 +278,14 @@ class TestCsv(unittest.TestCase):
             rowCount = tdf.csv.find_duplicates(dirPath, headers_present=headersPresent)
             self.assertTrue(set(rowCount) == {'a', 'b'} and set(rowCount["a"]) == {1} and rowCount["a"][1]==3)
             self.assertTrue(set(rowCount["b"]) == {(1,20,30)} and rowCount["b"][1,20,30]==2)
+            ticDatMan, rowCount = tdf.csv.create_tic_dat(dirPath, headers_present=headersPresent,
+                                                         duplicates="report")
+            self.assertTrue(set(rowCount) == {'a', 'b'} and list(rowCount["a"].values()) == [3])
+            self.assertTrue(list(rowCount["b"].values()) == [2] and len(ticDatMan.b) == 3)
+            self.assertTrue(set(rowCount["b"]).issubset(ticDatMan.b) and
+                            ticDatMan.b[next(iter(rowCount["b"]))]["bData"] == 12)
+            self.assertTrue(firesException(lambda: tdf.csv.create_tic_dat(dirPath, headers_present=headersPresent,
+                                                                          duplicates="raise")))
 
 
 
@@ -433,6 +443,24 @@ class TestCsv(unittest.TestCase):
         self.assertTrue(raw_tdf._same_data(dat_nums, dat_nums_2))
         self.assertTrue(raw_tdf._same_data(dat_strs, dat_strs_2))
 
+    def testHeaderResolution(self):
+        if not self.can_run:
+            return
+        tdf = TicDatFactory(table=[["a"], ["b", "c"]])
+        tdf.set_data_type("table", "c", nullable=True)
+        dir_path = makeCleanDir(os.path.join(_scratchDir, "header_resolution"))
+        with open(os.path.join(dir_path, "Table.csv"), "w") as f:
+            f.write("C,extra,A,b\n1,x,k1,2\n\n,x,k2,3\n4,x,k3\n")
+        dat = tdf.csv.create_tic_dat(dir_path)
+        self.assertTrue({k: dict(v) for k, v in dat.table.items()} ==
+                        {"k1": {"b": 2, "c": 1}, "k2": {"b": 3, "c": None}, "k3": {"b": None, "c": 4}})
+        with open(os.path.join(dir_path, "Table.csv"), "w") as f:
+            f.write("a,b,c,B\nk1,2,3,4\n")
+        self.assertTrue(self.firesException(lambda: tdf.csv.create_tic_dat(dir_path)))
+        with open(os.path.join(dir_path, "Table.csv"), "w") as f:
+            f.write("k1,2,3,4\n")
+        self.assertTrue(self.firesException(lambda: tdf.csv.create_tic_dat(dir_path, headers_present=False)))
+
 _scratchDir = TestCsv.__name__ + "_scratch"
 
 # Run the tests.
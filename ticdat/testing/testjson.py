@@ -154,6 +154,13 @@ class TestJson(unittest.TestCase):
             tdf2.json.write_file(td, writePath, **kwargs)
             dups = tdf.json.find_duplicates(writePath, from_pandas=kwargs.get("to_pandas", False))
             self.assertTrue(dups == {'three': {(1, 2, 2): 2}, 'two': {(1, 2): 3}, 'one': {1: 3, 2: 2}})
+            dat, dups_2 = tdf.json.create_tic_dat(writePath, from_pandas=kwargs.get("to_pandas", False),
+                                                  duplicates="report")
+            self.assertTrue(dups_2 == dups and len(dat.one) == 3 and dat.one[1]["c"] == 2)
+            self.assertTrue(tdf._same_data(dat, tdf.json.create_tic_dat(writePath,
+                                                                         from_pandas=kwargs.get("to_pandas", False))))
+            self.assertTrue(firesException(lambda: tdf.json.create_tic_dat(
+                writePath, from_pandas=kwargs.get("to_pandas", False), duplicates="raise")))
 
     def testSilly(self):
         if not self.can_run:
@@ -260,6 +267,36 @@ class TestJson(unittest.TestCase):
         self.assertTrue(all(isinstance(_, datetime.datetime) or _ is None for v in dat_1.table_with_stuffs.values()
                             for _ in v.values()))
 
+    def testStreaming(self):
+        if not self.can_run:
+            return
+        from ticdat.jsontd import make_json_dict, _JsonStream
+        import io
+        for sch, dat in [(dietSchema(), dietData()), (netflowSchema(), netflowData())]:
+            tdf = TicDatFactory(**sch)
+            dat = tdf.copy_tic_dat(dat)
+            for verbose in [True, False]:
+                json_str = tdf.json.write_file(dat, "", verbose=verbose)
+                self.assertTrue(json_str == json.dumps(make_json_dict(tdf, dat, verbose, True),
+                                                       sort_keys=True, indent=2))
+                compact_str = tdf.json.write_file(dat, "", verbose=verbose, indent=None)
+                self.assertTrue(json.loads(compact_str) == json.loads(json_str) and "\n" not in compact_str)
+                writePath = os.path.join(makeCleanDir(os.path.join(_scratchDir, "streaming")), "file.json")
+                tdf.json.write_file(dat, writePath, verbose=verbose, indent=None)
+                for s in [json_str, compact_str, writePath]:
+                    self.assertTrue(tdf._same_data(dat, tdf.json.create_tic_dat(s)))
+
+        # tiny chunks split the numbers and strings across reads
+        json_str = json.dumps({"a": [[1.5e-7, 123456789, None, "x\"y"]] * 3, "b": {"c": [1, 2]}, "d": []})
+        for chunk_size in range(1, 8):
+            stream = _JsonStream(io.StringIO(json_str), chunk_size)
+            jdict = {k: list(v) if not isinstance(v, dict) else v for k, v in stream.object_items()}
+            self.assertTrue(jdict == json.loads(json_str) and not stream.peek())
+
+        tdf = TicDatFactory(a=[["x"], ["y"]])
+        self.assertTrue(tdf.json.create_tic_dat('{"a": [[1, 2], [3, 4]]}').a[3]["y"] == 4)
+        for bad_str in ['{"a": [[1, 2], [3, 4]', '{"a": [[1, 2] [3, 4]]}', '{"a": [[1, 2]]} x', '{1: [[1, 2]]}']:
+            self.assertTrue("Unable to interpret" in self.firesException(lambda: tdf.json.create_tic_dat(bad_str)))
 
 _scratchDir = TestJson.__name__ + "_scratch"
 
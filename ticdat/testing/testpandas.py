@@ -224,6 +224,28 @@ class TestPandas(unittest.TestCase):
         # _same_data works fine in checking nan equivalence in data rows - which maybe
         self.assertTrue(tdf._same_data(tic_dat3, tic_dat_two, nans_are_same_for_data_rows=True))
 
+    def testDataFrameInit(self):
+        if not self.canRun:
+            return
+        tdf = TicDatFactory(pk_table=[["a", "b"], ["c", "d"]], pk_only=[["a"], []], no_pk=[[], ["c", "d"]])
+        df = utils.DataFrame({"a": [1, 2, 2], "b": ["x", "y", "z"], "c": [1.5, 2.5, 3.5], "d": [10, 20, 30]})
+        dat = tdf.TicDat(pk_table=df.set_index(["a", "b"]), pk_only=df.set_index("a"), no_pk=df)
+        self.assertTrue(tdf._same_data(dat, tdf.TicDat(pk_table={(1, "x"): [1.5, 10], (2, "y"): [2.5, 20],
+                                                                 (2, "z"): [3.5, 30]},
+                                                       pk_only=[1, 2], no_pk=[[1.5, 10], [2.5, 20], [3.5, 30]])))
+        self.assertTrue(type(dat.pk_table[2, "y"]["d"]) is int and type(dat.no_pk[0]["c"]) is float)
+        self.assertTrue(list(dat.pk_only) == [1, 2])
+        dat.pk_table[2, "y"]["d"] = 21
+        self.assertTrue(dat.pk_table[2, "y"]["d"] == 21)
+        self.assertTrue(self.firesException(lambda: tdf.TicDat(pk_table=df.set_index("a"))))
+        self.assertTrue(self.firesException(lambda: tdf.TicDat(no_pk=df[["c"]])))
+
+        tdf = TicDatFactory(**tdf.schema())
+        tdf.set_columnar_tables(["pk_table"])
+        dat_two = tdf.TicDat(pk_table=df.set_index(["a", "b"]), pk_only=df.set_index("a"), no_pk=df)
+        self.assertTrue(tdf._same_data(dat_two, tdf.copy_tic_dat(dat_two)))
+        self.assertTrue(dat_two.pk_table[2, "y"]["d"] == 20 and len(dat_two.pk_table) == 3)
+
 
 
 # Run the tests.
@@ -377,6 +377,14 @@ class TestIO(unittest.TestCase):
         pdf.sql.write_file(panDat, filePath)
         sqlPanDat = pdf.sql.create_pan_dat(filePath)
         self.assertTrue(pdf._same_data(panDat, sqlPanDat))
+        for max_workers in [1, 3]:
+            self.assertTrue(pdf._same_data(panDat, pdf.sql.create_pan_dat(filePath, max_workers=max_workers)))
+        self.assertTrue(firesException(lambda: pdf.sql.create_pan_dat(filePath, max_workers=0)))
+        con = pandatio.sql.connect(filePath)
+        self.assertTrue(pdf._same_data(panDat, pdf.sql.create_pan_dat(None, con=con, max_workers=3)))
+        for max_workers in [0, -1, 1.5]:
+            self.assertTrue(firesException(lambda: pdf.sql.create_pan_dat(None, con=con, max_workers=max_workers)))
+        con.close()
         pdf2 = PanDatFactory(**{t:'*' for t in pdf.all_tables})
         pdf2.sql.write_file(panDat, filePath)
         sqlPanDat = pdf2.sql.create_pan_dat(filePath)
@@ -472,6 +480,7 @@ class TestIO(unittest.TestCase):
         pdf.csv.write_directory(panDat, dirPath)
         panDat2 = pdf.csv.create_pan_dat(dirPath)
         self.assertTrue(pdf._same_data(panDat, panDat2))
+        self.assertTrue(pdf._same_data(panDat, pdf.csv.create_pan_dat(dirPath, max_workers=3)))
         pdf2 = PanDatFactory(**{t:'*' for t in pdf.all_tables})
         panDat2 = pdf2.csv.create_pan_dat(dirPath)
         self.assertTrue(pdf._same_data(panDat, panDat2))
@@ -622,6 +631,25 @@ class TestIO(unittest.TestCase):
         panDat2 = pdf.json.create_pan_dat(filePath)
         self.assertTrue(pdf._same_data(panDat, panDat2, epsilon=0.0001))
 
+    def testJsonSingleParse(self):
+        if not self.can_run:
+            return
+        pdf = PanDatFactory(table=[["a"], ["b", "c", "d"]], other=[["e", "f"], []])
+        pdf.set_data_type("table", "a", number_allowed=False, strings_allowed='*')
+        pdf.set_data_type("table", "c", number_allowed=False, strings_allowed='*', nullable=True)
+        panDat = pdf.PanDat(table={"a": ["0012", "x", "3"], "b": [1, 2.5, None], "c": ["0012", None, "inf"],
+                                   "d": ["0012", "inf", "y"]},
+                            other={"e": [1, 2], "f": ["z", "7"]})
+        for orient in ["split", "columns", "index"]:
+            json_str = pdf.json.write_file(panDat, "", orient=orient, index=orient != "split")
+            # the extra (default) read_json argument forces the json.dumps/read_json round trip
+            panDat2 = pdf.json.create_pan_dat(json_str, orient=orient)
+            panDat3 = pdf.json.create_pan_dat(json_str, orient=orient, convert_axes=True)
+            self.assertTrue(pdf._same_data(panDat2, panDat3, nans_are_same_for_data_rows=True))
+            for t in pdf.all_tables:
+                self.assertTrue(list(getattr(panDat2, t).dtypes) == list(getattr(panDat3, t).dtypes))
+            self.assertTrue(list(panDat2.table["a"]) == ["0012", "x", "3"])
+
     def testJsonSpacey(self):
         if not self.can_run:
             return
@@ -5,8 +5,10 @@ import ticdat.utils as utils
 from ticdat.testing.ticdattestutils import fail_to_debugger, flagged_as_run_alone, netflowPandasData
 from ticdat.testing.ticdattestutils import netflowSchema, copy_to_pandas_with_reset, dietSchema, netflowData
 from ticdat.testing.ticdattestutils import addNetflowForeignKeys, sillyMeSchema, dietData, pan_dat_maker
+from ticdat.testing.ticdattestutils import firesException
 from ticdat.ticdatfactory import TicDatFactory
 import itertools
+import warnings
 from math import isnan
 
 def _deep_anonymize(x)  :
@@ -690,6 +692,123 @@ class TestUtils(unittest.TestCase):
         pdf.add_foreign_key("pdf_table_one", "pdf_table_two", ["A Field", "B Field"])
         pdf.add_foreign_key("pdf_table_two", "pdf_table_three", ["B Field", "C Field"])
         pdf.add_foreign_key("pdf_table_three", "pdf_table_one", ["C Field", "A Field"])
+    def testExecutor(self):
+        if not self.canRun:
+            return
+        from concurrent.futures import ThreadPoolExecutor
+        pdf = PanDatFactory(**netflowSchema())
+        addNetflowForeignKeys(pdf)
+        pdf.set_data_type("cost", "cost", max=10, inclusive_max=True)
+        pdf.set_data_type("arcs", "capacity", must_be_int=True)
+        pdf.add_data_row_predicate("arcs", lambda row: row["capacity"] < 100, "small")
+        pdf.add_data_row_predicate("cost", lambda row: True if row["cost"] < 5 else "expensive", "cheap",
+                                   predicate_failure_response="Error Message")
+        pdf.add_data_row_predicate("cost", lambda row, boger: True, "broken", predicate_kwargs_maker=lambda dat: 1)
+        tdf = TicDatFactory(**netflowSchema())
+        ticdat = tdf.copy_tic_dat(netflowData())
+        ticdat.arcs["Denver", "Boston"]["capacity"] = 1.5
+        ticdat.cost["Pencils", "Detroit", "Boger"] = 20
+        ticdat.inflow["Pencilz", "Detroit"] = 1
+        dat = copy_to_pandas_with_reset(tdf, ticdat)
+        def same(x, y):
+            if isinstance(x, DataFrame) or isinstance(x, utils.pd.Series):
+                return x.equals(y)
+            return x == y
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            for find in [pdf.find_data_type_failures, pdf.find_data_row_failures, pdf.find_foreign_key_failures]:
+                for as_table in [True, False]:
+                    serial, parallel = find(dat, as_table=as_table), find(dat, as_table=as_table, executor=executor)
+                    self.assertTrue(serial and list(serial) == list(parallel))
+                    self.assertTrue(all(same(serial[k], parallel[k]) for k in serial))
+    def testVectorizedPredicates(self):
+        if not self.canRun:
+            return
+        def make_pdf(vectorized):
+            pdf = PanDatFactory(**netflowSchema())
+            if vectorized:
+                pdf.add_data_row_predicate("arcs", lambda df: df["capacity"] < 100, "small", vectorized=True)
+                pdf.add_data_row_predicate("cost", lambda df: (df["cost"] < 5).where(df["cost"] < 5, "expensive"),
+                                           "cheap", predicate_failure_response="Error Message", vectorized=True)
+                pdf.add_data_row_predicate("cost", lambda df, limit: (df["cost"] < limit).tolist(), "limited",
+                                           predicate_kwargs_maker=lambda dat: {"limit": 6}, vectorized=True)
+            else:
+                pdf.add_data_row_predicate("arcs", lambda row: row["capacity"] < 100, "small")
+                pdf.add_data_row_predicate("cost", lambda row: True if row["cost"] < 5 else "expensive", "cheap",
+                                           predicate_failure_response="Error Message")
+                pdf.add_data_row_predicate("cost", lambda row, limit: row["cost"] < limit, "limited",
+                                           predicate_kwargs_maker=lambda dat: {"limit": 6})
+            return pdf
+        tdf = TicDatFactory(**netflowSchema())
+        ticdat = tdf.copy_tic_dat(netflowData())
+        ticdat.cost["Pencils", "Detroit", "Boger"] = 20
+        dat = copy_to_pandas_with_reset(tdf, ticdat)
+        row_wise, vectorized = make_pdf(False), make_pdf(True)
+        self.assertTrue(vectorized.clone()._data_row_predicates["arcs"]["small"].vectorized)
+        for as_table in [True, False]:
+            expected = row_wise.find_data_row_failures(dat, as_table=as_table)
+            got = vectorized.find_data_row_failures(dat, as_table=as_table)
+            self.assertTrue(set(expected) == set(got) == {("arcs", "small"), ("cost", "cheap"),
+                                                         ("cost", "limited")})
+            self.assertTrue(all(expected[k].astype(str).equals(got[k].astype(str)) for k in expected))
+
+        pdf = PanDatFactory(**netflowSchema())
+        pdf.add_data_row_predicate("arcs", lambda df: df["boger"] > 0, "broken", vectorized=True)
+        pdf.add_data_row_predicate("arcs", lambda df: df["capacity"].iloc[:2] > 0, "misaligned", vectorized=True)
+        self.assertTrue(firesException(lambda: pdf.find_data_row_failures(dat)))
+        pdf.add_data_row_predicate("arcs", None, "misaligned")
+        fails = pdf.find_data_row_failures(dat, exception_handling="Handled as Failure")
+        self.assertTrue(len(fails["arcs", "broken"]) == len(dat.arcs))
+        pdf.add_data_row_predicate("arcs", lambda df: df["capacity"].iloc[:2] > 0, "misaligned", vectorized=True)
+        self.assertTrue("aligned" in str(firesException(lambda: pdf.find_data_row_failures(
+            dat, exception_handling="Handled as Failure"))))
+
+    def testRowPredicateInfo(self):
+        rpi = utils.RowPredicateInfo(len, None, "Boolean")
+        self.assertTrue(rpi.vectorized is False and rpi == utils.RowPredicateInfo(len, None, "Boolean", False))
+
+    def testMemoized(self):
+        from ticdat.pandatfactory import _memoized
+        calls = []
+        f = _memoized(lambda x: calls.append(x) or x)
+        results = [f(x) for x in [1, 1.0, True, 1, [1]]]
+        self.assertTrue([type(x) for x in results] == [int, float, bool, int, list])
+        self.assertTrue(calls == [1, 1.0, True, [1]])
+
+    def testCascadingForeignKeyRemoval(self):
+        if not self.canRun:
+            return
+        for circular in [False, True]:
+            pdf = PanDatFactory(a=[["x"], ["y"]], b=[["x", "y"], []], c=[["p", "q"], ["r"]])
+            pdf.add_foreign_key("c", "b", [["p", "x"], ["q", "y"]])
+            pdf.add_foreign_key("b", "a", ["x", "x"])
+            pdf.add_foreign_key("c", "a", ["r", "x"])
+            if circular:
+                pdf.add_foreign_key("a", "c", ["y", "p"])
+            dat = pdf.PanDat(a=[[1, 1], [2, 1], [3, 4]], b=[[1, "a"], [2, "b"], [4, "c"], [None, None]],
+                             c=[[1, "a", 2], [2, "b", 2], [4, "c", 1], [1, None, 1], [2, "b", 3]])
+            dat.c.index = [10, 20, 30, 40, 50]
+            fails = pdf.find_foreign_key_failures(dat, verbosity="Low", as_table=False)
+            self.assertTrue(fails[("c", "b", (("p", "x"), ("q", "y")))] == [False, False, False, True, False])
+            pdf.remove_foreign_key_failures(dat)
+            self.assertFalse(pdf.find_foreign_key_failures(dat))
+            self.assertTrue(list(dat.a["x"]) == ([1, 2] if circular else [1, 2, 3]))
+            self.assertTrue(list(dat.b["x"]) == [1, 2])
+            self.assertTrue(list(dat.c.index) == ([10, 20] if circular else [10, 20, 50]))
+
+    def testMultiFieldForeignKeyWarnings(self):
+        if not self.canRun:
+            return
+        pdf = PanDatFactory(parent=[["a", "b"], []], child=[["c"], ["a", "b"]])
+        pdf.add_foreign_key("child", "parent", [["a", "a"], ["b", "b"]])
+        dat = pdf.PanDat(parent=[["x", 1], ["y", 2], [None, None]],
+                         child=[[1, "x", 1], [2, "x", 2], [3, "y", 2], [4, None, None], [5, "z", 1]])
+        for t in ["parent", "child"]: # object columns of numbers are where pandas would infer a dtype
+            getattr(dat, t)["b"] = getattr(dat, t)["b"].astype(object)
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", FutureWarning)
+            fails = pdf.find_foreign_key_failures(dat, verbosity="Low", as_table=False)
+        self.assertTrue(list(fails[("child", "parent", (("a", "a"), ("b", "b")))]) ==
+                        [False, True, False, False, True])
 
 # Run the tests.
 if __name__ == "__main__":
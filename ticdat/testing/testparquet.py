@@ -0,0 +1,127 @@
+import os
+import shutil
+import json
+from ticdat.ticdatfactory import TicDatFactory
+from ticdat.pandatfactory import PanDatFactory
+from ticdat.testing.ticdattestutils import dietData, dietSchema, netflowData, netflowSchema, firesException
+from ticdat.testing.ticdattestutils import spacesSchema, pan_dat_maker, makeCleanDir
+import unittest
+from ticdat.parquettd import _can_unit_test, pq, _metadata_key
+
+#@fail_to_debugger
+class TestParquet(unittest.TestCase):
+    can_run = False
+
+    @classmethod
+    def setUpClass(cls):
+        makeCleanDir(_scratchDir)
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(_scratchDir)
+    def firesException(self, f):
+        e = firesException(f)
+        if e :
+            self.assertTrue("TicDatError" in e.__class__.__name__)
+            return str(e)
+
+    def testDiet(self):
+        if not self.can_run:
+            return
+        tdf = TicDatFactory(**dietSchema())
+        pdf = PanDatFactory(**dietSchema())
+        ticDat = tdf.freeze_me(tdf.TicDat(**{t:getattr(dietData(),t) for t in tdf.primary_key_fields}))
+        panDat = pan_dat_maker(dietSchema(), ticDat)
+        dirPath = os.path.join(_scratchDir, "diet.parquet")
+        pdf.parquet.write_directory(panDat, dirPath)
+        self.assertTrue(sorted(os.listdir(dirPath)) == sorted(t + ".parquet" for t in pdf.all_tables))
+        self.assertTrue(pdf._same_data(panDat, pdf.parquet.create_pan_dat(dirPath)))
+        self.assertTrue(pdf._same_data(panDat, pdf.parquet.create_pan_dat(dirPath, memory_map=True, max_workers=3)))
+        pdf2 = PanDatFactory(**{t:'*' for t in pdf.all_tables})
+        self.assertTrue(pdf._same_data(panDat, pdf2.parquet.create_pan_dat(dirPath)))
+
+        # only the columns of the schema are read
+        pdf2 = PanDatFactory(foods=[["name"], []], categories=[["name"], ["maxNutrition"]])
+        panDat2 = pdf2.parquet.create_pan_dat(dirPath)
+        self.assertTrue(list(panDat2.foods.columns) == ["name"] and len(panDat2.foods) == len(panDat.foods))
+        self.assertTrue(list(panDat2.categories.columns) == ["name", "maxNutrition"])
+
+        pdf2 = PanDatFactory(categories=[["name"], ["maxNutrition", "Not There"]])
+        self.assertTrue(self.firesException(lambda: pdf2.parquet.create_pan_dat(dirPath)))
+        panDat2 = pdf2.parquet.create_pan_dat(dirPath, fill_missing_fields=True)
+        self.assertTrue(set(panDat2.categories["Not There"]) == {0})
+
+        ticDat2 = tdf.parquet.create_tic_dat(dirPath, freeze_it=True)
+        self.assertTrue(tdf._same_data(ticDat, ticDat2))
+        self.assertFalse(tdf.parquet.find_duplicates(dirPath))
+        dirPath = os.path.join(_scratchDir, "diet_tdf.parquet")
+        tdf.parquet.write_directory(ticDat, dirPath, case_space_table_names=True)
+        self.assertTrue(tdf._same_data(ticDat, tdf.parquet.create_tic_dat(dirPath)))
+        dirPath = os.path.join(_scratchDir, "diet_overwrite.parquet")
+        tdf.parquet.write_directory(ticDat, dirPath)
+        self.assertTrue(self.firesException(lambda: tdf.parquet.write_directory(ticDat, dirPath)))
+        tdf.parquet.write_directory(ticDat, dirPath, allow_overwrite=True, compression="gzip")
+        self.assertTrue(tdf._same_data(ticDat, tdf.parquet.create_tic_dat(dirPath)))
+
+    def testMetadata(self):
+        if not self.can_run:
+            return
+        tdf = TicDatFactory(**netflowSchema())
+        addNetflowForeignKeys = lambda f: f.add_foreign_key("arcs", "nodes", ["source", "name"])
+        pdf = PanDatFactory(**netflowSchema())
+        for f in [tdf, pdf]:
+            addNetflowForeignKeys(f)
+            f.set_data_type("arcs", "capacity", max=float("inf"), inclusive_max=True)
+            f.set_infinity_io_flag(999999999)
+        ticDat = tdf.TicDat(**{t:getattr(netflowData(),t) for t in tdf.primary_key_fields})
+        ticDat.arcs["Detroit", "Boston"] = float("inf")
+        dirPath = os.path.join(_scratchDir, "netflow.parquet")
+        tdf.parquet.write_directory(ticDat, dirPath)
+        for t in pdf.all_tables:
+            metadata = json.loads(pq.read_schema(os.path.join(dirPath, t + ".parquet")).metadata[_metadata_key])
+            self.assertTrue(metadata["table"] == t)
+            pdf2 = PanDatFactory.create_from_full_schema(metadata["schema"])
+            self.assertTrue(pdf2.schema(include_ancillary_info=True) == pdf.schema(include_ancillary_info=True))
+            self.assertTrue(pdf2.infinity_io_flag == 999999999)
+        self.assertTrue(pq.read_table(os.path.join(dirPath, "arcs.parquet")).to_pandas()["capacity"].max()
+                        == 999999999)
+        ticDat2 = tdf.parquet.create_tic_dat(dirPath)
+        self.assertTrue(tdf._same_data(ticDat, ticDat2) and ticDat2.arcs["Detroit", "Boston"]["capacity"]
+                        == float("inf"))
+        panDat = pdf.parquet.create_pan_dat(dirPath)
+        self.assertTrue(tdf._same_data(ticDat, pdf.copy_to_tic_dat(panDat)))
+
+    def testMixedColumns(self):
+        if not self.can_run:
+            return
+        tdf = TicDatFactory(**spacesSchema())
+        ticDat = tdf.TicDat(**{
+        "a_table" : {1 : [1, 2, "3"],
+                     22.2 : (12, 0.12, "something"),
+                     0.23 : (11, 12, "thirt")},
+        "b_table" : {(1, 2, "foo") : 1, (1012.22, 4, "0012") : 12},
+        "c_table" : (("this", 2, 3, 4), ("that", 102.212, 3, 5.5),
+                      ("another",5, 12.5, 24) )})
+        dirPath = os.path.join(_scratchDir, "spaces.parquet")
+        tdf.parquet.write_directory(ticDat, dirPath)
+        self.assertTrue(tdf._same_data(ticDat, tdf.parquet.create_tic_dat(dirPath)))
+        pdf = PanDatFactory(**spacesSchema())
+        panDat = pdf.parquet.create_pan_dat(dirPath)
+        self.assertTrue(pdf._same_data(panDat, pan_dat_maker(spacesSchema(), ticDat)))
+
+        tdf = TicDatFactory(table=[["a"], ["b"]])
+        ticDat = tdf.TicDat(table=[[1, "x"], [2, 3.5], [3, None]])
+        dirPath = os.path.join(_scratchDir, "mixed.parquet")
+        tdf.parquet.write_directory(ticDat, dirPath)
+        metadata = json.loads(pq.read_schema(os.path.join(dirPath, "table.parquet")).metadata[_metadata_key])
+        self.assertTrue(metadata["json_columns"] == ["b"])
+        self.assertTrue(tdf._same_data(ticDat, tdf.parquet.create_tic_dat(dirPath)))
+
+_scratchDir = TestParquet.__name__ + "_scratch"
+
+# Run the tests.
+if __name__ == "__main__":
+    if not _can_unit_test :
+        print("!!!!!!!!!FAILING PARQUET UNIT TESTS DUE TO FAILURE TO LOAD PYARROW LIBRARIES!!!!!!!!")
+    else:
+        TestParquet.can_run = True
+    unittest.main()
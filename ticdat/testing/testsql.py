@@ -86,6 +86,11 @@ class TestSql(unittest.TestCase):
         tdf2.sql.write_db_data(td, f)
         dups = tdf.sql.find_duplicates(f)
         self.assertTrue(dups ==  {'three': {(1, 2, 2): 2}, 'two': {(1, 2): 3}, 'one': {1: 3, 2: 2}})
+        dat, dups_2 = tdf.sql.create_tic_dat(f, duplicates="report")
+        self.assertTrue(dups_2 == dups and len(dat.one) == 3 and dat.one[1]["c"] == 2 and dat.one[2]["b"] == 2)
+        self.assertTrue(tdf._same_data(dat, tdf.sql.create_tic_dat(f)))
+        self.assertTrue(firesException(lambda: tdf.sql.create_tic_dat(f, duplicates="raise")))
+        self.assertTrue(firesException(lambda: tdf.sql.create_tic_dat(f, duplicates="first_wins")))
 
     def testDiet(self):
         if not self.can_run:
@@ -465,6 +470,102 @@ class TestSql(unittest.TestCase):
         dat_2 = tdf.sql.create_tic_dat_from_sql(path)
         self.assertTrue(tdf._same_data(dat_1, dat_2, nans_are_same_for_data_rows=True))
 
+    def testTableDiscovery(self):
+        if not self.can_run:
+            return
+        tdf = TicDatFactory(a_very_long_table_name_with_lots_of_underscores=[["k_1"], ["d_1", "d 2"]],
+                            fancy_view=[["k_1"], ["d_1"]], generic_table="*", missing=[["m"], []])
+        filePath = makeCleanPath(os.path.join(_scratchDir, "discovery.db"))
+        with sql.connect(filePath) as con:
+            con.execute("Create TABLE [A VERY long_TABLE name with_lots_of underscores] ([k_1], [D_1], [d 2])")
+            con.execute("Insert into [A VERY long_TABLE name with_lots_of underscores] values (1, 2, 3)")
+            con.execute("Create VIEW [Fancy View] as Select [k_1], [d_1] from "
+                        "[A VERY long_TABLE name with_lots_of underscores]")
+            con.execute("Create TABLE [generic table] (x, y)")
+            con.execute("Insert into [generic table] values ('a', 'b')")
+        dat = tdf.sql.create_tic_dat(filePath)
+        self.assertTrue(dict(dat.a_very_long_table_name_with_lots_of_underscores[1]) == {"d_1": 2, "d 2": 3})
+        self.assertTrue(dict(dat.fancy_view[1]) == {"d_1": 2})
+        self.assertTrue(list(dat.generic_table.columns) == ["x", "y"] and len(dat.generic_table) == 1)
+        self.assertFalse(dat.missing)
+        with sql.connect(filePath) as con:
+            statements = []
+            con.set_trace_callback(statements.append)
+            self.assertTrue(utils.sqlite_table_names(con, tdf.all_tables) ==
+                            {"a_very_long_table_name_with_lots_of_underscores":
+                                 ["a very long_table name with_lots_of underscores"],
+                             "fancy_view": ["fancy view"], "generic_table": ["generic table"], "missing": []})
+            self.assertTrue(len(statements) == 2)
+            con.execute("Create TABLE [generic_table] (z)")
+        self.assertTrue(self.firesException(lambda: tdf.sql.create_tic_dat(filePath)))
+
+    def testWriteDbData(self):
+        if not self.can_run:
+            return
+        tdf = TicDatFactory(pk_table=[["name"], ["size", "when"]], no_pk_table=[[], ["a", "b"]])
+        tdf.set_data_type("pk_table", "size", max=float("inf"), inclusive_max=True)
+        tdf.set_data_type("pk_table", "when", datetime=True, nullable=True)
+        tdf.set_data_type("no_pk_table", "a", min=-float("inf"), inclusive_min=True)
+        tdf.set_infinity_io_flag(999999999)
+        dat = tdf.TicDat(pk_table=[["a", 1, datetime.datetime(2020, 1, 1, 12, 30)], ["b", float("inf"), None],
+                                   ["c", 2.5, datetime.datetime(1999, 12, 31)]],
+                         no_pk_table=[[-float("inf"), "x"], [1, "x"], [1, "x"], [2, True]])
+        filePath = makeCleanPath(os.path.join(_scratchDir, "write_db_data.db"))
+        tdf.sql.write_db_data(dat, filePath)
+        dat_2 = tdf.sql.create_tic_dat(filePath)
+        self.assertTrue(tdf._same_data(dat, dat_2))
+        self.assertTrue(isinstance(dat_2.pk_table["a"]["when"], datetime.datetime) and
+                        dat_2.pk_table["b"]["when"] is None)
+        self.assertTrue([tuple(r.values()) for r in dat_2.no_pk_table] ==
+                        [(-float("inf"), "x"), (1, "x"), (1, "x"), (2, True)])
+        with sql.connect(filePath) as con:
+            self.assertTrue(con.execute("Select size from pk_table where name = 'b'").fetchone()[0] == 999999999)
+            self.assertTrue(con.execute("Select count(*) from no_pk_table").fetchone()[0] == 4)
+            self.assertTrue(con.execute("Select min(a) from no_pk_table").fetchone()[0] == -999999999)
+
+        # writing into an existing file, both with and without allow_overwrite
+        dat.pk_table["d"] = [3, datetime.datetime(2001, 1, 1)]
+        self.assertTrue(self.firesException(lambda: tdf.sql.write_db_data(dat, filePath)))
+        self.assertTrue(tdf._same_data(dat_2, tdf.sql.create_tic_dat(filePath)))
+        tdf.sql.write_db_data(dat, filePath, allow_overwrite=True)
+        self.assertTrue(tdf._same_data(dat, tdf.sql.create_tic_dat(filePath)))
+
+        tdf_none = TicDatFactory.create_from_full_schema(tdf.schema(include_ancillary_info=True))
+        tdf_none.set_infinity_io_flag(None)
+        tdf_none.sql.write_db_data(dat, filePath, allow_overwrite=True)
+        with sql.connect(filePath) as con:
+            self.assertTrue(con.execute("Select size from pk_table where name = 'b'").fetchone()[0] is None)
+            self.assertTrue(con.execute("Select a from no_pk_table").fetchone()[0] is None)
+        self.assertTrue(tdf_none._same_data(dat, tdf_none.sql.create_tic_dat(filePath)))
+
+    def testRowsPerInsert(self):
+        if not self.can_run:
+            return
+        tdf = TicDatFactory(**dietSchema())
+        tdf.set_infinity_io_flag(999999999)
+        ticDat = tdf.TicDat(**{t:getattr(dietData(),t) for t in tdf.primary_key_fields})
+        filePath = makeCleanPath(os.path.join(_scratchDir, "rows_per_insert.sql"))
+        tdf.sql.write_sql_file(ticDat, filePath)
+        single_row_size = os.path.getsize(filePath)
+        for rows_per_insert in [2, 5, 1000]:
+            tdf.sql.write_sql_file(ticDat, filePath, allow_overwrite=True, rows_per_insert=rows_per_insert)
+            self.assertTrue(os.path.getsize(filePath) < single_row_size)
+            self.assertTrue(tdf._same_data(ticDat, tdf.sql.create_tic_dat_from_sql(filePath)))
+            tdf.sql.write_sql_file(ticDat, filePath, include_schema=True, allow_overwrite=True,
+                                   rows_per_insert=rows_per_insert)
+            self.assertTrue(tdf._same_data(ticDat, tdf.sql.create_tic_dat_from_sql(filePath, includes_schema=True)))
+        with open(filePath) as f:
+            statements = f.read()
+        self.assertTrue(statements.count("INSERT INTO") == 3 and "BEGIN;" in statements and "COMMIT;" in statements)
+        self.assertTrue(self.firesException(lambda: tdf.sql.write_sql_file(ticDat, filePath, allow_overwrite=True,
+                                                                            rows_per_insert=0)))
+
+        tdf = TicDatFactory(stuff="*")
+        dat = tdf.TicDat(stuff=utils.DataFrame({"a": range(7), "b": ["x'y", "z"]*3 + ["q"]}))
+        tdf.sql.write_sql_file(dat, filePath, allow_overwrite=True, rows_per_insert=3)
+        dat_2 = tdf.sql.create_tic_dat_from_sql(filePath, includes_schema=True)
+        self.assertTrue(dat.stuff.values.tolist() == dat_2.stuff[["a", "b"]].values.tolist())
+
 _scratchDir = TestSql.__name__ + "_scratch"
 
 # Run the tests.
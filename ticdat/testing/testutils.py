@@ -1456,6 +1456,169 @@ class TestUtils(unittest.TestCase):
         postgresql.stop()
         sys.modules.pop(funky_diet.solve.__module__)
 
+    def testThirtyOne(self):
+        tdf = TicDatFactory(**netflowSchema())
+        addNetflowForeignKeys(tdf)
+        tdf.set_data_type("cost", "cost", max=float("inf"), inclusive_max=True)
+        self.assertTrue(self.firesException(lambda: tdf.set_columnar_tables(["boger"])))
+        tdf.set_columnar_tables(["cost", "arcs", "nodes"])
+        self.assertTrue(set(tdf.columnar_tables) == {"cost", "arcs", "nodes"})
+        orig_dat = netflowData()
+        plain_tdf = TicDatFactory(**netflowSchema())
+        plain_dat = plain_tdf.TicDat(**{t: getattr(orig_dat, t) for t in plain_tdf.all_tables})
+        dat = tdf.TicDat(**{t: getattr(orig_dat, t) for t in tdf.all_tables})
+        self.assertTrue(tdf.good_tic_dat_object(dat) and tdf._same_data(dat, plain_dat))
+        self.assertFalse(tdf.find_foreign_key_failures(dat))
+        self.assertTrue(dat.cost["Pencils", "Detroit", "Boston"]["cost"] == 10)
+        self.assertTrue(dat.cost["Pencils", "Detroit", "Boston"].values() == (10,))
+
+        dat.cost["Pencils", "Detroit", "Boston"]["cost"] = 10.5
+        dat.cost["Pencils", "Detroit", "Seattle"] = {"cost": 4.5}
+        dat.cost["Pencils", "Denver", "Boston"] = 7.5
+        self.assertTrue(dat.cost["Pencils", "Detroit", "Boston"]["cost"] == 10.5)
+        self.assertTrue(dat.arcs["Detroit", "Boston"]["capacity"] == 100)
+        self.assertTrue(self.firesException(lambda: dat.cost["Pencils", "Detroit"].values()))
+        self.assertTrue(self.firesException(lambda: dat.cost["Pencils", "Detroit", "Boston"]["boger"]))
+        self.assertTrue(dat.cost.pop(("Pencils", "Denver", "Boston"))["cost"] == 7.5)
+        self.assertFalse(("Pencils", "Denver", "Boston") in dat.cost or
+                         dat.cost.get(("Pencils", "Denver", "Boston")))
+        dat.nodes["Atlantis"] # creates an empty row, same as a regular table
+        del dat.cost["Pencils", "Detroit", "Seattle"]
+        dat.cost["Pencilz", "Detroit", "Seattle"] = 4
+        self.assertTrue(len(dat.cost) == len(plain_dat.cost) - 1 and len(dat.nodes) == len(plain_dat.nodes) + 1)
+        self.assertTrue(set(tdf.find_foreign_key_failures(dat)) ==
+                        {fk for fk in tdf.foreign_keys if fk.native_table == "cost" and
+                         fk.foreign_table == "commodities"})
+        tdf.remove_foreign_key_failures(dat)
+        self.assertTrue(len(dat.cost) == len(plain_dat.cost) - 2)
+
+        tdf.freeze_me(dat)
+        def edit_cost():
+            dat.cost["Pencils", "Detroit", "Boston"]["cost"] = 11
+        self.assertTrue(self.firesException(edit_cost))
+        self.assertTrue(self.firesException(lambda: dat.cost.pop(("Pencils", "Detroit", "Boston"))))
+        self.assertTrue(firesException(lambda: dat.cost["Pencils", "Denver", "Boston"]))
+        self.assertTrue(tdf._same_data(dat, tdf.copy_tic_dat(dat)))
+        self.assertTrue(tdf._same_data(dat, tdf.TicDat(**tdf.as_dict(dat))))
+
+        tdf = tdf.clone()
+        self.assertTrue(set(tdf.columnar_tables) == {"cost", "arcs", "nodes"})
+        tdf.enable_foreign_key_links()
+        self.assertTrue(self.firesException(lambda: tdf.TicDat(**{t: getattr(orig_dat, t)
+                                                                  for t in tdf.all_tables})))
+
+    def testThirtyTwo(self):
+        tdf = TicDatFactory(**netflowSchema())
+        addNetflowForeignKeys(tdf)
+        orig_dat = tdf.copy_tic_dat(netflowData())
+        dat = tdf.copy_tic_dat(orig_dat)
+        row = dat.cost["Pencils", "Detroit", "Boston"]
+        self.assertFalse(hasattr(row, "__dict__") or hasattr(row, "_links"))
+        self.assertTrue(type(row) is type(dat.cost["Pencils", "Denver", "Boston"]))
+        self.assertTrue(list(row.keys()) == ["cost"] and dict(row.items()) == {"cost": row["cost"]})
+        dat.cost["Pencils", "Detroit", "Boston"]["cost"] = 11
+        self.assertTrue(dat.cost["Pencils", "Detroit", "Boston"]["cost"] == 11)
+        self.assertFalse(tdf._same_data(dat, orig_dat))
+        self.assertTrue(self.firesException(lambda: row.__setitem__("boger", 1)))
+        self.assertTrue(self.firesException(lambda: dat.cost.__setitem__(("a", "b", "c"), {"boger": 1})))
+
+        tdf.freeze_me(dat)
+        self.assertTrue(self.firesException(lambda: row.__setitem__("cost", 12)))
+        self.assertTrue(self.firesException(lambda: setattr(row, "boger", 12)))
+        # rows added after the fact share the frozen state of their table
+        self.assertTrue(self.firesException(lambda : dat.cost.__setitem__(("a", "b", "c"), 1)))
+        self.assertTrue(self.firesException(lambda: dat.nodes["Detroit"].__setitem__("boger", 12)))
+        # each TicDat object has its own row classes, so freezing one doesn't freeze another
+        orig_dat.cost["Pencils", "Detroit", "Boston"]["cost"] = 12
+        self.assertTrue(orig_dat.cost["Pencils", "Detroit", "Boston"]["cost"] == 12)
+
+        tdf = TicDatFactory(parent=[["name"], ["size"]], child=[["name", "parent"], ["weight"]])
+        tdf.add_foreign_key("child", "parent", ["parent", "name"])
+        tdf.enable_foreign_key_links()
+        dat = tdf.TicDat(parent={"a": 1, "b": 2}, child={("x", "a"): 3, ("y", "a"): 4})
+        self.assertTrue(set(dat.parent["a"].child) == {"x", "y"} and not dat.parent["b"].child)
+        self.assertTrue(dat.parent["a"].child["x"] is dat.child["x", "a"])
+        self.assertFalse(hasattr(dat.child["x", "a"], "_links") or hasattr(dat.child["x", "a"], "parent"))
+        self.assertTrue(hasattr(dat.parent["a"], "child") and not hasattr(dat.parent["a"], "boger"))
+        tdf.freeze_me(dat)
+        self.assertTrue(self.firesException(lambda: setattr(dat.parent["a"], "child", None)))
+        self.assertTrue(self.firesException(lambda: dat.parent["a"].__setitem__("size", 13)))
+
+    def testThirtyThree(self):
+        tdf = TicDatFactory(**dietSchema())
+        addDietForeignKeys(tdf)
+        dat = tdf.copy_tic_dat(dietData())
+        def columns(t):
+            fields = tdf.primary_key_fields[t] + tdf.data_fields[t]
+            rows = [(k if utils.containerish(k) else (k,)) + tuple(r[f] for f in tdf.data_fields[t])
+                    for k,r in getattr(dat, t).items()]
+            return {f: [r[i] for r in rows] for i,f in enumerate(fields)}
+        trusted_dat = tdf.TicDat.from_trusted_columns(**{t: columns(t) for t in tdf.all_tables})
+        self.assertTrue(tdf._same_data(dat, trusted_dat))
+        self.assertTrue(tdf.good_tic_dat_object(trusted_dat))
+        self.assertFalse(tdf.find_foreign_key_failures(trusted_dat))
+        trusted_dat.foods["pizza"]["cost"] = 100
+        self.assertFalse(tdf._same_data(dat, trusted_dat))
+        tdf.freeze_me(trusted_dat)
+        self.assertTrue(self.firesException(lambda: trusted_dat.foods["pizza"].__setitem__("cost", 101)))
+        self.assertTrue(tdf._same_data(tdf.TicDat.from_trusted_columns(), tdf.TicDat()))
+
+        bad_columns = columns("foods")
+        bad_columns["cost"].pop()
+        self.assertTrue(self.firesException(lambda: tdf.TicDat.from_trusted_columns(foods=bad_columns)))
+        bad_columns = columns("foods")
+        bad_columns.pop("cost")
+        self.assertTrue(self.firesException(lambda: tdf.TicDat.from_trusted_columns(foods=bad_columns)))
+        self.assertTrue(self.firesException(lambda: tdf.TicDat.from_trusted_columns(boger=columns("foods"))))
+        self.assertTrue(self.firesException(lambda: tdf.TicDat.from_trusted_columns(foods=dat.foods)))
+
+        tdf = TicDatFactory(pk_only=[["a", "b"], []], no_pk=[[], ["c", "d"]], gen=[[], ["e"]], generic="*")
+        tdf.set_generator_tables(["gen"])
+        dat = tdf.TicDat.from_trusted_columns(pk_only={"a": [1, 1], "b": [2, 3]}, no_pk={"c": [4, 4], "d": [5, 5]},
+                                              gen={"e": [6, 7]}, generic={"x": [8], "y": [9]})
+        self.assertTrue(set(dat.pk_only) == {(1, 2), (1, 3)} and not any(dat.pk_only.values()))
+        self.assertTrue([tuple(r.values()) for r in dat.no_pk] == [(4, 5)] * 2)
+        self.assertTrue([r["e"] for r in dat.gen()] == [6, 7])
+        self.assertTrue(list(dat.generic.columns) == ["x", "y"] and len(dat.generic) == 1)
+
+        tdf = TicDatFactory(pk_only=[["a"], []], cost=[["a", "b"], ["c"]])
+        tdf.set_columnar_tables(["pk_only", "cost"])
+        dat = tdf.TicDat.from_trusted_columns(pk_only={"a": [1, 2]}, cost={"a": [1, 2], "b": [3, 4], "c": [5, 6]})
+        self.assertTrue(set(dat.pk_only) == {1, 2} and not any(map(len, dat.pk_only.values())))
+        self.assertTrue(dat.cost[2, 4]["c"] == 6)
+        self.assertTrue(tdf._same_data(dat, tdf.TicDat(pk_only=[[1], [2]], cost=[[1, 3, 5], [2, 4, 6]])))
+
+    def testThirtyFour(self):
+        from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+        jobs = [(i, j) for i in range(20) for j in range(3)]
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            self.assertTrue(utils.map_jobs(pow, jobs, executor) == utils.map_jobs(pow, jobs) ==
+                            [pow(*job) for job in jobs])
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            self.assertTrue(self.firesException(lambda: utils.map_jobs(pow, jobs, executor)))
+
+    def testThirtyFive(self):
+        import itertools, datetime
+        TD = utils.TypeDictionary
+        tds = [TD.safe_creator(*args) for args in itertools.product(
+                [True, False], [True, False], [True, False], [-float("inf"), 0, 1.5], [float("inf"), 10, 1.5],
+                [True, False], ["*", ("a", "b"), ()], [True, False]) if args[4] >= args[3]]
+        tds += [TD.safe_creator(0, 0, 0, 0, 0, 0, "*", nullable, datetime=True) for nullable in [True, False]]
+        values = [None, float("nan"), 0, 1, 1.5, 2, 2.0, 10, 10.0, -1, float("inf"), -float("inf"), "a", "c", "",
+                  True, False, "2020-01-01", datetime.datetime(2020, 1, 1), 1e20]
+        for td in tds:
+            valid_data = td.valid_data_function()
+            self.assertTrue(all(valid_data(v) == td.valid_data(v) for v in values))
+        if not utils.pd:
+            return
+        pd = utils.pd
+        columns = [pd.Series([0, 1, 2, 10, -5]), pd.Series([0., 1.5, float("nan"), 10., float("inf"), -float("inf")]),
+                   pd.Series(["a", "c", None, 1, 2.5, float("nan")]), pd.Series(pd.to_datetime(["2020-01-01", None])),
+                   pd.Series([True, False])]
+        for td, column in itertools.product(tds, columns):
+            self.assertTrue(list(td.valid_data_mask(column)) ==
+                            [td.valid_data(None if pd.isnull(x) else x) for x in column])
+
 _scratchDir = TestUtils.__name__ + "_scratch"
 
 
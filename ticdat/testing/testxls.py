@@ -283,6 +283,9 @@ class TestXls(unittest.TestCase):
         rowCount = tdf.xls.find_duplicates(filePath)
         self.assertTrue(set(rowCount) == {'a', 'b'} and set(rowCount["a"]) == {1} and rowCount["a"][1]==3)
         self.assertTrue(set(rowCount["b"]) == {(1,20,30)} and rowCount["b"][1,20,30]==2)
+        ticDatMan, rowCount_2 = tdf.xls.create_tic_dat(filePath, duplicates="report")
+        self.assertTrue(rowCount_2 == rowCount and len(ticDatMan.b) == 3 and ticDatMan.b[1,20,30]["bData"] == 12)
+        self.assertTrue(self.firesException(lambda : tdf.xls.create_tic_dat(filePath, duplicates="raise")))
 
     def testSpacey(self):
         if not self.can_run:
@@ -591,6 +594,52 @@ class TestXls(unittest.TestCase):
         # my hands are sort of tied here, xlrd has a disturbing tendency to read data as floats when it reads numbers
         # that said, not sure I really need to do more, since these two tests pass.
 
+    def testXlsxStreaming(self):
+        import xlsxwriter
+        from ticdat.xls import _XlsxBook
+        file_path = os.path.join(_scratchDir, "streaming.xlsx")
+        book = xlsxwriter.Workbook(file_path)
+        sheet = book.add_worksheet("Some Table")
+        for j, f in enumerate(["b", "junk", "A"]):
+            sheet.write(0, j, f)
+        sheet.write_row(1, 0, ["x", "junk", 1])
+        sheet.write_row(3, 0, ["y", None, 2.5]) # row 2 is blank
+        sheet.write_rich_string(4, 0, "ri", book.add_format({"bold": 1}), "ch")
+        sheet.write(4, 2, True)
+        sheet.write(5, 2, "inf")
+        book.add_worksheet("ignored").write(0, 0, "whatever")
+        book.close()
+
+        self.assertTrue([_.name for _ in _XlsxBook(file_path).sheets()] == ["Some Table", "ignored"])
+        self.assertTrue(list(_XlsxBook(file_path).sheets()[0].rows(1, 3)) ==
+                        [["x", "junk", 1.0], ["", "", ""], ["y", "", 2.5], ["rich", "", 1], ["", "", "inf"]])
+        tdf = TicDatFactory(some_table=[["a"], ["b"]])
+        dat, dups = tdf.xls.create_tic_dat(file_path, duplicates="report")
+        # the True cell is read as 1, and duplicates the first row
+        self.assertTrue({k: dict(v) for k, v in dat.some_table.items()} ==
+                        {1: {"b": "rich"}, "": {"b": ""}, 2.5: {"b": "y"}, float("inf"): {"b": ""}})
+        self.assertTrue(dups == {"some_table": {1: 2}} and tdf.xls.find_duplicates(file_path) == dups)
+        dat = tdf.xls.create_tic_dat(file_path, row_offsets={"some_table": 3}, headers_present=False)
+        self.assertTrue({k: dict(v) for k, v in dat.some_table.items()} ==
+                        {"y": {"b": ""}, "rich": {"b": ""}, "": {"b": ""}})
+
+    def testXlsxWriteRows(self):
+        tdf = TicDatFactory(cost=[["a", "b"], ["c", "d"]], other=[[], ["x", "y"]], parameters=[["k"], ["v"]])
+        dat = tdf.TicDat(cost={(i, "k%s" % i): [i * 1.5, None if i % 7 else "s"] for i in range(50)},
+                         other=[[i, float("inf") if i % 2 else -float("inf")] for i in range(50)],
+                         parameters=[["p", 1], ["q", "text"]])
+        file_path = os.path.join(_scratchDir, "write_rows.xlsx")
+        tdf.xls.write_file(dat, file_path)
+        dat_ = tdf.xls.create_tic_dat(file_path)
+        self.assertTrue(tdf._same_data(tdf.TicDat(other=dat.other, parameters=dat.parameters),
+                                       tdf.TicDat(other=dat_.other, parameters=dat_.parameters)))
+        self.assertTrue({k: dict(v) for k, v in dat_.cost.items()} ==
+                        {k: {"c": v["c"], "d": v["d"] or ""} for k, v in dat.cost.items()})
+        tdf.set_infinity_io_flag(999)
+        tdf.xls.write_file(dat, file_path, allow_overwrite=True)
+        self.assertTrue([dict(_) for _ in tdf.xls.create_tic_dat(file_path).other][:2] ==
+                        [{"x": 0, "y": -float("inf")}, {"x": 1, "y": float("inf")}])
+
 _scratchDir = TestXls.__name__ + "_scratch"
 
 # Run the tests.
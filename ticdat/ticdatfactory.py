@@ -10,12 +10,14 @@ from ticdat.utils import dictish, containerish, deep_freeze, lupish, safe_apply
 from ticdat.utils import ForeignKey, ForeignKeyMapping, TypeDictionary, RowPredicateInfo
 from string import ascii_uppercase as uppercase
 from itertools import count
+from operator import itemgetter
 import ticdat.xls as xls
 import ticdat.csvtd as csv
 import ticdat.sqlitetd as sql
 import ticdat.mdb as mdb
 import ticdat.jsontd as json
 from ticdat.pgtd import PostgresTicFactory
+from ticdat.parquettd import ParquetTicFactory
 import sys
 import math
 try:
@@ -141,6 +143,9 @@ class TicDatFactory(freezable_factory(object, "_isFrozen", {"opl_prepend", "ampl
     def generator_tables(self):
         return deep_freeze(self._generator_tables)
     @property
+    def columnar_tables(self):
+        return deep_freeze(self._columnar_tables)
+    @property
     def default_values(self):
         return deep_freeze(self._default_values)
     @property
@@ -275,7 +280,7 @@ class TicDatFactory(freezable_factory(object, "_isFrozen", {"opl_prepend", "ampl
         if predicate_name is None:
             predicate_name = next(i for i in count() if i not in self._data_row_predicates[table])
         self._data_row_predicates[table][predicate_name] = RowPredicateInfo(predicate, predicate_kwargs_maker,
-                                                                            predicate_failure_response)
+                                                                            predicate_failure_response, False)
 
     def add_parameter(self, name, default_value, number_allowed = True,
                       inclusive_min = True, inclusive_max = False, min = 0, max = float("inf"),
@@ -394,6 +399,27 @@ class TicDatFactory(freezable_factory(object, "_isFrozen", {"opl_prepend", "ampl
         verify(not any(self.primary_key_fields.get(t) for t in g),
                "Can not make generators from tables with primary keys")
         self._generator_tables[:] = [_ for _ in g]
+    def set_columnar_tables(self, g):
+        """
+        sets which tables are to be columnar tables. Columnar tables store their rows as one column per data field
+        along with a primary key index, rather than as one row object per record. The dat.table[pk]["field"] API is
+        unchanged (rows are rendered as lightweight views onto the columns) but far less memory is used.
+        Columnar tables are appropriate for truly massive data tables with a primary key. They are not compatible
+        with foreign key links.
+
+        :param g: An iterable of table name.
+
+        :return:
+        """
+        verify(not self._has_been_used,
+               "The columnar tables can't be changed after a TicDatFactory has been used.")
+        verify(containerish(g) and set(g).issubset(self.all_tables),
+               "Columnar tables should be a container of table names")
+        verify(not set(g).intersection(self.generic_tables),
+               "Columnar tables cannot refer to generic tables.")
+        verify(all(self.primary_key_fields.get(t) for t in g),
+               "Can only make columnar tables from tables with primary keys")
+        self._columnar_tables[:] = [_ for _ in g]
     def clear_foreign_keys(self, native_table = None):
         """
         create a TicDatFactory
@@ -609,6 +635,7 @@ class TicDatFactory(freezable_factory(object, "_isFrozen", {"opl_prepend", "ampl
         self._data_types = clt.defaultdict(dict)
         self._data_row_predicates = clt.defaultdict(dict)
         self._generator_tables = []
+        self._columnar_tables = []
         self._foreign_keys = clt.defaultdict(set)
         self.all_tables = frozenset(init_fields)
         # using list for truthiness to work around freezing headaches
@@ -616,17 +643,28 @@ class TicDatFactory(freezable_factory(object, "_isFrozen", {"opl_prepend", "ampl
 
         datarowfactory = lambda t :  utils.td_row_factory(t, self.primary_key_fields.get(t, ()),
                         self.data_fields.get(t, ()), self.default_values.get(t, {}))
+        columnartablefactory = lambda t : utils.td_columnar_table_factory(t, self.primary_key_fields[t],
+                        self.data_fields.get(t, ()), self.default_values.get(t, {}), self.data_types.get(t, {}))
 
         goodticdattable = self._good_tic_dat_table_for_init
         superself = self
         def ticdattablefactory(alldatadicts, tablename, primarykey = (), rowfactory_ = None) :
             assert tablename not in self.generic_tables
             assert containerish(primarykey)
+            if not (primarykey or rowfactory_) and tablename in self._columnar_tables:
+                class TicDatColumnarDict(columnartablefactory(tablename)):
+                    # columnar tables verify (and store) the raw rows themselves
+                    _rowfactory = staticmethod(lambda x : x)
+                    def __init__(self, *_args, **_kwargs):
+                        super(TicDatColumnarDict, self).__init__(*_args, **_kwargs)
+                        alldatadicts.append(self)
+                return TicDatColumnarDict
             primarykey = primarykey or  self.primary_key_fields.get(tablename, ())
             keylen = len(primarykey)
             rowfactory = rowfactory_ or datarowfactory(tablename)
             if keylen > 0 :
                 class TicDatDict (FreezeableDict) :
+                    _rowfactory = staticmethod(rowfactory)
                     def __init__(self, *_args, **_kwargs):
                         super(TicDatDict, self).__init__(*_args, **_kwargs)
                         alldatadicts.append(self)
@@ -642,6 +680,7 @@ class TicDatFactory(freezable_factory(object, "_isFrozen", {"opl_prepend", "ampl
                 assert dictish(TicDatDict)
                 return TicDatDict
             class TicDatDataList(clt.abc.MutableSequence):
+                _rowfactory = staticmethod(rowfactory)
                 def __init__(self, *_args):
                     self._list = list()
                     self.extend(list(_args))
@@ -670,7 +709,14 @@ class TicDatFactory(freezable_factory(object, "_isFrozen", {"opl_prepend", "ampl
                 for t in set(superself.all_tables).difference(superself.generic_tables):
                     _t = getattr(self, t)
                     if utils.dictish(_t) or utils.containerish(_t) :
-                        for v in getattr(_t, "values", lambda : _t)() :
+                        # the rows of a columnar table are views that share the table's frozen state, and
+                        # the slotted rows of a table with data fields share a class level frozen state
+                        rowfactory = getattr(_t, "_rowfactory", None)
+                        if hasattr(rowfactory, "_freeze_rows"):
+                            rowfactory._freeze_rows()
+                        for v in (getattr(_t, "values", lambda : _t)()
+                                  if not (t in superself._columnar_tables or hasattr(rowfactory, "_freeze_rows"))
+                                  else ()):
                             if not getattr(v, "_dataFrozen", False) :
                                 v._dataFrozen =True
                                 v._attributesFrozen = True
@@ -712,14 +758,12 @@ class TicDatFactory(freezable_factory(object, "_isFrozen", {"opl_prepend", "ampl
                         v = DataFrame(v)
                         v.rename(columns = {v.columns[0] : superself.data_fields[t][0]}, inplace=True)
                     if DataFrame and isinstance(v, DataFrame):
-                      row_dict = lambda r : {df:r[df] for df in superself.data_fields.get(t, ())}
-                      setattr(self, t, ticdattablefactory(self._all_data_dicts, t)())
-                      if superself.primary_key_fields.get(t) :
-                          def add_row(r):
-                              getattr(self, t)[r.name] = row_dict(r)
-                          v.apply(add_row, axis=1)
-                      else :
-                          v.apply(lambda r : getattr(self, t).append(row_dict(r)), axis=1)
+                      # the shape was verified above, so the columns are read once and zipped into rows.
+                      # (DataFrame.apply never visited the rows of a DataFrame without columns, and we preserve
+                      # that behavior)
+                      self._set_trusted_rows(t, (v.index.tolist() if len(v.columns) else [])
+                                                if superself.primary_key_fields.get(t) else None,
+                                             [v[df].tolist() for df in superself.data_fields.get(t, ())])
                     elif superself.primary_key_fields.get(t) and not utils.dictish(v):
                          pklen = len(superself.primary_key_fields[t])
                          def handle_row_dict(r):
@@ -727,8 +771,9 @@ class TicDatFactory(freezable_factory(object, "_isFrozen", {"opl_prepend", "ampl
                                  return r
                              return [r.get(k, 0) for k in superself.primary_key_fields[t] +
                                       superself.data_fields.get(t,[])]
-                         drf = datarowfactory(t) # lots of verification inside the datarowfactory
-                         setattr(self, t, ticdattablefactory(self._all_data_dicts, t)(
+                         tdt = ticdattablefactory(self._all_data_dicts, t)
+                         drf = tdt._rowfactory # lots of verification inside the datarowfactory
+                         setattr(self, t, tdt(
                              {r if not utils.containerish(r) else
                               (r[0] if pklen == 1 else tuple(r[:pklen])):
                               drf([] if not utils.containerish(r) else r[pklen:])
@@ -740,8 +785,9 @@ class TicDatFactory(freezable_factory(object, "_isFrozen", {"opl_prepend", "ampl
                                 (len(_k) == len(superself.primary_key_fields.get(t, ())) > 1)
                                 or len(superself.primary_key_fields.get(t, ())) == 1),
                            "Unexpected number of primary key fields for %s"%t)
-                     drf = datarowfactory(t) # lots of verification inside the datarowfactory
-                     setattr(self, t, ticdattablefactory(self._all_data_dicts, t)(
+                     tdt = ticdattablefactory(self._all_data_dicts, t)
+                     drf = tdt._rowfactory # lots of verification inside the datarowfactory
+                     setattr(self, t, tdt(
                                     {_k : drf(v[_k] if utils.dictish(v) else ()) for _k in v}))
                     elif t in superself.generator_tables :
                         setattr(self, t, generatorfactory(v, t))
@@ -757,12 +803,78 @@ class TicDatFactory(freezable_factory(object, "_isFrozen", {"opl_prepend", "ampl
                         setattr(self, t, ticdattablefactory(self._all_data_dicts, t)())
                 if init_tables :
                     self._try_make_foreign_links()
+            @classmethod
+            def from_trusted_columns(cls, **table_columns):
+                """
+                Bulk constructor for data that is already known to be well formed, such as the data
+                produced by the ticdat file readers. The shape of each table is verified once, after
+                which the rows are built without any per-row verification.
+
+                :param table_columns: keyword arguments mapping table names to dictionaries of
+                                      field name -> column (i.e. a list of the values for that field).
+                                      The columns of a table need to be of equal length, and every
+                                      field of a non-generic table needs to be present. The rows of a
+                                      primary key table are assumed to have unique primary keys
+                                      (if not, the last row wins). A generator table can also be passed
+                                      in the same manner as with the standard initializer.
+
+                :return: a TicDat object
+                """
+                for t, columns in table_columns.items():
+                    verify(t in superself.all_tables, "Unexpected table name %s"%t)
+                    if t in superself.generator_tables and not dictish(columns):
+                        continue
+                    verify(dictish(columns) and all(containerish(c) for c in columns.values()),
+                           "%s needs to be a dictionary of field name -> column of values"%t)
+                    if t not in superself.generic_tables:
+                        fields = superself.primary_key_fields.get(t, ()) + superself.data_fields.get(t, ())
+                        verify(set(columns) == set(fields),
+                               "The columns for %s need to match the fields %s"%(t, fields))
+                    verify(len({len(c) for c in columns.values()}) <= 1,
+                           "The columns for %s need to be of equal length"%t)
+                rtn = cls()
+                for t, columns in table_columns.items():
+                    rtn._set_trusted_table(t, columns)
+                if table_columns:
+                    rtn._try_make_foreign_links()
+                return rtn
+            def _set_trusted_table(self, t, columns):
+                if t in superself.generic_tables:
+                    setattr(self, t, DataFrame(columns))
+                    return
+                pks = superself.primary_key_fields.get(t, ())
+                dfs = superself.data_fields.get(t, ())
+                if t in superself.generator_tables:
+                    setattr(self, t, generatorfactory(columns if not dictish(columns) else
+                                                      list(zip(*(columns[f] for f in dfs))), t))
+                    return
+                keys = (columns[pks[0]] if len(pks) == 1 else list(zip(*(columns[f] for f in pks)))) \
+                       if pks else None
+                self._set_trusted_rows(t, keys, [columns[f] for f in dfs])
+            def _set_trusted_rows(self, t, keys, data_columns):
+                # keys is None for a table without a primary key
+                tdt = ticdattablefactory(self._all_data_dicts, t)
+                rowfactory = tdt._rowfactory
+                if data_columns and hasattr(rowfactory, "_from_trusted"):
+                    rows = map(rowfactory._from_trusted, map(list, zip(*data_columns)))
+                elif data_columns:
+                    rows = map(rowfactory, zip(*data_columns))
+                else:
+                    # the empty row, as with TicDatDict.__getitem__ (and as accepted by columnar tables)
+                    rows = (rowfactory({}) for _ in keys)
+                if keys is None:
+                    rtn = tdt()
+                    rtn._list.extend(rows)
+                else:
+                    rtn = tdt(zip(keys, rows))
+                setattr(self, t, rtn)
             def _try_make_foreign_links(self):
                 if not superself._foreign_key_links_enabled:
                     return
                 verify(not superself._complex_fks(), ("complex foreign key between %s and %s " +
                        "prevents foreign_key_links")%((superself._complex_fks() or [(None,)*3])[0][:2]))
                 assert not self._made_foreign_links, "call once"
+                verify(not superself._columnar_tables, "foreign key links are not supported for columnar tables")
                 self._made_foreign_links = True
                 can_link_w_me = lambda t : t not in superself.generator_tables and \
                                            superself.primary_key_fields.get(t)
@@ -819,6 +931,7 @@ class TicDatFactory(freezable_factory(object, "_isFrozen", {"opl_prepend", "ampl
         self.mdb = mdb.MdbTicFactory(self)
         self.json = json.JsonTicFactory(self)
         self.pgsql = PostgresTicFactory(self)
+        self.parquet = ParquetTicFactory(self)
         self._prepends = {}
         self._parameters = {}
         self._infinity_io_flag = ["N/A"]
@@ -883,6 +996,44 @@ class TicDatFactory(freezable_factory(object, "_isFrozen", {"opl_prepend", "ampl
         if x is None and self.infinity_io_flag is None and utils.numericish(self._none_as_infinity_bias(t, f)):
             return float("inf") * self._none_as_infinity_bias(t, f)
         return x
+    def _general_read_cell_function(self, t, f):
+        """
+        we expect other routines inside ticdat to access this routine, even though it starts with _
+        :param t: table name
+        :param f: field name
+        :return: a one argument function that is equivalent to lambda x: self._general_read_cell(t, f, x)
+                 but resolves the (t, f) specific logic just once, or None if _general_read_cell would
+                 never change a cell of this field. Useful for reading many rows.
+        """
+        if t == "parameters":
+            return None
+        none_rtn = None
+        if self.infinity_io_flag is None:
+            try:
+                bias = self._none_as_infinity_bias(t, f)
+            except utils.TicDatError:
+                # leave it to the individual cells to throw the exception
+                return lambda x: self._general_read_cell(t, f, x)
+            if utils.numericish(bias):
+                none_rtn = float("inf") * bias
+        datetime = bool(self._data_types.get(t, {}).get(f) and self.data_types[t][f].datetime)
+        flag = self.infinity_io_flag if utils.numericish(self.infinity_io_flag) else None
+        if none_rtn is None and not datetime and flag is None:
+            return None
+        def rtn(x):
+            if x is None:
+                return none_rtn
+            if datetime and utils.stringish(x):
+                adjusted = utils.dateutil_adjuster(x)
+                if adjusted is not None:
+                    return adjusted
+            if flag is not None and utils.numericish(x):
+                if x >= flag:
+                    return float("inf")
+                if x <= -flag:
+                    return float("-inf")
+            return x
+        return rtn
     def _infinity_flag_write_cell(self, t, f, x):
         """
         we expect other routines inside ticdat to access this routine, even though it starts with _
@@ -899,6 +1050,30 @@ class TicDatFactory(freezable_factory(object, "_isFrozen", {"opl_prepend", "ampl
         if utils.numericish(self.infinity_io_flag) and utils.numericish(x):
             return max(min(x, self.infinity_io_flag), -self.infinity_io_flag)
         return x
+    def _infinity_flag_write_cell_function(self, t, f):
+        """
+        we expect other routines inside ticdat to access this routine, even though it starts with _
+        :param t: table name
+        :param f: field name
+        :return: a one argument function that is equivalent to lambda x: self._infinity_flag_write_cell(t, f, x)
+                 but resolves the (t, f) specific logic just once. Useful for writing many rows.
+        """
+        if t == "parameters" and self.parameters:
+            return lambda x: self._infinity_flag_write_cell(t, f, x)
+        if self.infinity_io_flag is None:
+            try:
+                bias = self._none_as_infinity_bias(t, f)
+            except utils.TicDatError:
+                # leave it to the individual cells to throw the exception
+                return lambda x: self._infinity_flag_write_cell(t, f, x)
+            if not bias:
+                return lambda x: x
+            inf = bias * float("inf")
+            return lambda x: None if inf == x else x
+        if utils.numericish(self.infinity_io_flag):
+            flag = self.infinity_io_flag
+            return lambda x: max(min(x, flag), -flag) if utils.numericish(x) else x
+        return lambda x: x
     def _none_as_infinity_bias(self, t, f):
         if self.infinity_io_flag is not None:
             return None
@@ -1160,6 +1335,7 @@ class TicDatFactory(freezable_factory(object, "_isFrozen", {"opl_prepend", "ampl
         full_schema = utils.clone_a_anchillary_info_schema(self.schema(include_ancillary_info=True), table_restrictions)
         rtn = TicDatFactory.create_from_full_schema(full_schema)
         rtn.set_generator_tables(self.generator_tables)
+        rtn.set_columnar_tables([t for t in self.columnar_tables if t in rtn.all_tables])
         for tbl, row_predicates in self._data_row_predicates.items():
             if table_restrictions is None or tbl in table_restrictions:
                 for pn, rpi in row_predicates.items():
@@ -1426,50 +1602,53 @@ class TicDatFactory(freezable_factory(object, "_isFrozen", {"opl_prepend", "ampl
         assert self.good_tic_dat_object(tic_dat), "tic_dat not a good object for this factory"
         rtn_values, rtn_pks = clt.defaultdict(set), clt.defaultdict(set)
 
-        def getcell(tblname, native_pk, native_data_row, field_name):
-             assert field_name in self.primary_key_fields.get(tblname, ()) + \
-                                  self.data_fields.get(tblname, ())
-             if [field_name] == list(self.primary_key_fields.get(tblname, ())):
-                 return native_pk
-             if field_name in native_data_row:
-                 return native_data_row[field_name]
-             return native_pk[self.primary_key_fields[tblname].index(field_name)]
+        # the columns and the parent key sets are each built once, and shared across all the foreign keys
+        table_columns = {}
+        def get_column(tblname, field_name):
+            if (tblname, field_name) not in table_columns:
+                assert field_name in self.primary_key_fields.get(tblname, ()) + \
+                                     self.data_fields.get(tblname, ())
+                tbl = getattr(tic_dat, tblname)
+                pks = self.primary_key_fields.get(tblname, ())
+                if [field_name] == list(pks):
+                    table_columns[tblname, field_name] = list(tbl)
+                elif field_name in pks:
+                    table_columns[tblname, field_name] = list(map(itemgetter(pks.index(field_name)), tbl))
+                else:
+                    table_columns[tblname, field_name] = [r[field_name] for r in
+                                                          (tbl.values() if dictish(tbl) else tbl)]
+            return table_columns[tblname, field_name]
 
-        table_data = defaultdict(set)
+        table_data = {}
         def get_table_data(tblname, fields):
             if fields == self.primary_key_fields.get(tblname, ()):
                 return getattr(tic_dat, tblname)
             if (tblname, fields) not in table_data:
-                add_here = table_data[tblname, fields]
-                tbl = getattr(tic_dat, tblname)
-                for k,v in (tbl.items() if dictish(tbl) else enumerate(tbl)):
-                    add_here.add(tuple(getcell(tblname, k, v, f) for f in fields))
+                table_data[tblname, fields] = frozenset(zip(*(get_column(tblname, f) for f in fields)))
             return table_data[tblname, fields]
 
         for native, fks in self._foreign_keys_by_native().items():
-            def getcell_(native_pk, native_data_row, field_name):
-                 return getcell(native, native_pk, native_data_row, field_name)
+            native_tbl = getattr(tic_dat, native)
+            native_pks = list(native_tbl) if dictish(native_tbl) else range(len(native_tbl))
             for fk in fks:
                 foreign_to_native = fk.foreigntonativemapping()
-                for native_pk, native_data_row in (getattr(tic_dat, native).items()
-                            if dictish(getattr(tic_dat, native))
-                            else enumerate(getattr(tic_dat, native))):
-                    ffs = tuple(_ff for _ff in self.primary_key_fields.get(fk.foreign_table, ()) +
-                                self.data_fields.get(fk.foreign_table, ())
-                                if _ff in foreign_to_native)
-                    foreign_look_up = tuple(getcell_(native_pk, native_data_row, foreign_to_native[_ff])
-                                        for _ff in ffs)
-                    if ffs == self.primary_key_fields.get(fk.foreign_table) and len(ffs)==1:
-                        foreign_look_up = foreign_look_up[0]
-                    foreign_look_into = get_table_data(fk.foreign_table, ffs)
-                    if foreign_look_up not in foreign_look_into:
-                        rtn_pks[fk].add(native_pk)
-                        if type(fk.mapping) is ForeignKeyMapping :
-                            rtn_values[fk].add(getcell_(native_pk, native_data_row,
-                                                        fk.mapping.native_field))
-                        else:
-                            rtn_values[fk].add(tuple(getcell_(native_pk,
-                                                native_data_row, _.native_field) for _ in fk.mapping))
+                ffs = tuple(_ff for _ff in self.primary_key_fields.get(fk.foreign_table, ()) +
+                            self.data_fields.get(fk.foreign_table, ()) if _ff in foreign_to_native)
+                if ffs == self.primary_key_fields.get(fk.foreign_table) and len(ffs)==1:
+                    foreign_look_ups = get_column(native, foreign_to_native[ffs[0]])
+                else:
+                    foreign_look_ups = zip(*(get_column(native, foreign_to_native[_ff]) for _ff in ffs))
+                foreign_look_into = get_table_data(fk.foreign_table, ffs)
+                failed = [i for i, foreign_look_up in enumerate(foreign_look_ups)
+                          if foreign_look_up not in foreign_look_into]
+                if failed:
+                    rtn_pks[fk].update(native_pks[i] for i in failed)
+                    if type(fk.mapping) is ForeignKeyMapping :
+                        native_column = get_column(native, fk.mapping.native_field)
+                        rtn_values[fk].update(native_column[i] for i in failed)
+                    else:
+                        native_columns = [get_column(native, _.native_field) for _ in fk.mapping]
+                        rtn_values[fk].update(tuple(c[i] for c in native_columns) for i in failed)
         assert set(rtn_pks) == set(rtn_values)
         RtnType = namedtuple("ForeignKeyFailures", ("native_values", "native_pks"))
 
@@ -1572,18 +1751,21 @@ class TicDatFactory(freezable_factory(object, "_isFrozen", {"opl_prepend", "ampl
 
         for table, type_row in tmp_tdf._data_types.items():
             _table = getattr(tic_dat, table)
-            if dictish(_table):
-                for pk  in _table:
-                    full_row = self._get_full_row(tic_dat, table, pk)
-                    for field, data_type in type_row.items():
-                        if not data_type.valid_data(full_row[field]) :
-                            rtn_values[(table, field)].add(full_row[field])
-                            rtn_pks[(table, field)].add(pk)
-            elif containerish(_table):
-                for pk, data_row in enumerate(_table):
-                    for field, data_type in type_row.items():
-                        if not data_type.valid_data(data_row[field]) :
-                            rtn_values[(table, field)].add(data_row[field])
+            pks = self.primary_key_fields.get(table, ())
+            def getter(field):
+                if field not in pks:
+                    return lambda pk, data_row: data_row[field]
+                if len(pks) == 1:
+                    return lambda pk, data_row: pk
+                return lambda pk, data_row, i=pks.index(field): pk[i]
+            checkers = [(field, data_type.valid_data_function(), getter(field))
+                        for field, data_type in type_row.items()]
+            if dictish(_table) or containerish(_table):
+                for pk, data_row in (_table.items() if dictish(_table) else enumerate(_table)):
+                    for field, valid_data, get in checkers:
+                        data = get(pk, data_row)
+                        if not valid_data(data) :
+                            rtn_values[(table, field)].add(data)
                             rtn_pks[(table, field)].add(pk)
         assert set(rtn_values).issuperset(set(rtn_pks))
         TableField = clt.namedtuple("TableField", ["table", "field"])
@@ -1688,11 +1870,47 @@ class TicDatFactory(freezable_factory(object, "_isFrozen", {"opl_prepend", "ampl
             predicate_name = next(make_name(i) for i in count() if make_name(i) not in
                                   self._data_row_predicates.get("parameters", {}))
             data_row_predicates["parameters"] = data_row_predicates.get("parameters", {})
-            data_row_predicates["parameters"][predicate_name] = RowPredicateInfo(good_parameter, None, "Boolean")
+            data_row_predicates["parameters"][predicate_name] = RowPredicateInfo(good_parameter, None, "Boolean", False)
 
         predicate_kwargs_maker_results = {}
         rtn = clt.defaultdict(set)
         PKEM = clt.namedtuple("PrimaryKeyErrorMessage", ["primary_key", "error_message"])
+        def check_predicate(tbl, pn, rpi, predicate_kwargs):
+            failures = set()
+            if not isinstance(predicate_kwargs, dict):
+                return PKEM('*', predicate_kwargs
+                               if (isinstance(predicate_kwargs, str) and "Exception<" in predicate_kwargs)
+                               else f"predicate_kwargs_maker failed to return a dict")
+            if rpi.predicate_failure_response == "Boolean":
+                def _p(row):
+                    try:
+                        return rpi.predicate(row, **predicate_kwargs)
+                    except:
+                        return False
+            else:
+                def _p(row):
+                    try:
+                        return rpi.predicate(row, **predicate_kwargs)
+                    except Exception as e:
+                        return f"Exception<{e}>"
+            if exception_handling == "Unhandled":
+                _p = lambda row: rpi.predicate(row, **predicate_kwargs)
+            _table = getattr(tic_dat, tbl)
+            def handle_full_row(pk, full_row):
+                if rpi.predicate_failure_response == "Boolean" and not _p(full_row):
+                    failures.add(pk)
+                if rpi.predicate_failure_response == "Error Message":
+                    _ = _p(full_row)
+                    if not _ is True:
+                        failures.add(PKEM(pk, str(_)))
+            if dictish(_table):
+                for pk  in _table:
+                    full_row = self._get_full_row(tic_dat, tbl, pk)
+                    handle_full_row(pk, full_row)
+            else:
+                for i, data_row in enumerate(_table):
+                    handle_full_row(i, data_row)
+            return failures
         for tbl, row_predicates in data_row_predicates.items():
             for pn, rpi in row_predicates.items():
                 predicate_kwargs = {}
@@ -1707,40 +1925,9 @@ class TicDatFactory(freezable_factory(object, "_isFrozen", {"opl_prepend", "ampl
                             _predicate_kwargs = rpi.predicate_kwargs_maker(tic_dat)
                         predicate_kwargs_maker_results[rpi.predicate_kwargs_maker] = _predicate_kwargs
                     predicate_kwargs = predicate_kwargs_maker_results[rpi.predicate_kwargs_maker]
-                if not isinstance(predicate_kwargs, dict):
-                    rtn[tbl, pn] = PKEM('*', predicate_kwargs
-                                        if (isinstance(predicate_kwargs, str) and "Exception<" in predicate_kwargs)
-                                        else f"predicate_kwargs_maker failed to return a dict")
-                else:
-                    if rpi.predicate_failure_response == "Boolean":
-                        def _p(row):
-                            try:
-                                return rpi.predicate(row, **predicate_kwargs)
-                            except:
-                                return False
-                    else:
-                        def _p(row):
-                            try:
-                                return rpi.predicate(row, **predicate_kwargs)
-                            except Exception as e:
-                                return f"Exception<{e}>"
-                    if exception_handling == "Unhandled":
-                        _p = lambda row: rpi.predicate(row, **predicate_kwargs)
-                    _table = getattr(tic_dat, tbl)
-                    def handle_full_row(pk, full_row):
-                        if rpi.predicate_failure_response == "Boolean" and not _p(full_row):
-                            rtn[tbl, pn].add(pk)
-                        if rpi.predicate_failure_response == "Error Message":
-                            _ = _p(full_row)
-                            if not _ is True:
-                                rtn[tbl, pn].add(PKEM(pk, str(_)))
-                    if dictish(_table):
-                        for pk  in _table:
-                            full_row = self._get_full_row(tic_dat, tbl, pk)
-                            handle_full_row(pk, full_row)
-                    else:
-                        for i, data_row in enumerate(_table):
-                            handle_full_row(i, data_row)
+                failures = check_predicate(tbl, pn, rpi, predicate_kwargs)
+                if failures:
+                    rtn[tbl, pn] = failures
         TPN = clt.namedtuple("TablePredicateName", ["table", "predicate_name"])
 
         return {TPN(*k):(v if isinstance(v, PKEM) else tuple(v)) for k,v in rtn.items()}
@@ -4,7 +4,10 @@ PEP8
 """
 from numbers import Number
 from itertools import chain, combinations
-from collections import defaultdict
+from collections import defaultdict, Counter
+from collections.abc import MutableMapping
+from functools import lru_cache
+from array import array
 import ticdat
 import getopt
 import sys
@@ -27,6 +30,11 @@ try:
     import ocp_ticdat_drm as drm
 except:
     drm = None
+
+try:
+    import orjson
+except:
+    orjson = None
 import inspect
 
 def dat_restricted(table_list):
@@ -177,6 +185,38 @@ class TypeDictionary(namedtuple("TypeDictionary",
             assert containerish(self.strings_allowed)
             return data in self.strings_allowed
         return False
+    def valid_data_function(self):
+        """
+        :return: a function that is equivalent to valid_data, but is specialized (once) for this data type.
+                 Use it when checking many values.
+        """
+        return _compile_valid_data(self)
+    def valid_data_mask(self, values):
+        """
+        :param values: a pandas Series (or a one dimensional numpy array) of data values
+
+        :return: a numpy boolean array that is True for the values for which valid_data returns True
+                 (treating nan as Null). Numeric and datetime64 columns are checked with array operations.
+        """
+        verify(numpy, "numpy needs to be installed to use valid_data_mask")
+        arr = values.to_numpy() if hasattr(values, "to_numpy") else numpy.asarray(values)
+        kind = arr.dtype.kind
+        if kind == "M":
+            return numpy.where(numpy.isnat(arr), bool(self.nullable), bool(self.datetime))
+        if kind in "iuf" and not self.datetime:
+            nulls = numpy.isnan(arr) if kind == "f" else numpy.zeros(len(arr), dtype=bool)
+            if not self.number_allowed:
+                return nulls & bool(self.nullable)
+            with numpy.errstate(invalid="ignore"):
+                good = (arr >= self.min) if self.inclusive_min else (arr > self.min)
+                good &= (arr <= self.max) if self.inclusive_max else (arr < self.max)
+                if self.must_be_int and kind == "f":
+                    good &= (numpy.isfinite(arr) & (numpy.floor(arr) == arr)) | \
+                            ((arr == self.max) & (self.max == float("inf")) & bool(self.inclusive_max))
+            return numpy.where(nulls, bool(self.nullable), good)
+        check = self.valid_data_function()
+        values = values.tolist() if hasattr(values, "tolist") else list(values)
+        return numpy.fromiter(map(check, values), dtype=bool, count=len(values))
     @staticmethod
     def safe_creator(number_allowed, inclusive_min, inclusive_max, min, max,
                       must_be_int, strings_allowed, nullable, datetime=False):
@@ -202,6 +242,38 @@ class TypeDictionary(namedtuple("TypeDictionary",
                               min=0, max=float("inf"), inclusive_min=True, inclusive_max=True, must_be_int=False,
                               datetime=False)
 
+@lru_cache(maxsize=None)
+def _compile_valid_data(type_dictionary):
+    td = type_dictionary
+    nullable = bool(td.nullable)
+    if td.datetime:
+        return lambda data: nullable if data is None else td.valid_data(data)
+    any_string = td.strings_allowed == "*"
+    strings_allowed = frozenset(td.strings_allowed if not any_string else ())
+    number_allowed, must_be_int = td.number_allowed, td.must_be_int
+    lo, hi, inclusive_min, inclusive_max = td.min, td.max, td.inclusive_min, td.inclusive_max
+    inf_ok = hi == float("inf") and inclusive_max
+    def check_number(data): # data is an int or a float that isn't nan
+        if not number_allowed or data < lo or data > hi:
+            return False
+        if (data == lo and not inclusive_min) or (data == hi and not inclusive_max):
+            return False
+        if must_be_int and type(data) is float and not data.is_integer():
+            return inf_ok and data == hi
+        return True
+    def rtn(data):
+        t = type(data)
+        if t is str:
+            return any_string or data in strings_allowed
+        if t is int:
+            return check_number(data)
+        if t is float:
+            return nullable if data != data else check_number(data)
+        if data is None:
+            return nullable
+        return td.valid_data(data)
+    return rtn
+
 class ForeignKey(namedtuple("ForeignKey", ("native_table", "foreign_table", "mapping", "cardinality"))) :
     def nativefields(self):
         return (self.mapping.native_field,) if type(self.mapping) is ForeignKeyMapping \
@@ -259,6 +331,9 @@ def standard_main(input_schema, solution_schema, solve):
 
     --> ending in ".json" imply reading/writing .json files
 
+    --> directories ending in ".parquet" imply reading/writing a directory of Apache Parquet files
+        (one .parquet file per table)
+
     --> otherwise, the assumption is that an input/output directory is being specified,
         which will be used for reading/writing .csv files.
         (Recall that .csv format is implemented as one-csv-file-per-table, so an entire
@@ -412,26 +487,25 @@ def standard_main(input_schema, solution_schema, solve):
         print(f"{action_func} failed to return anything!")
 
 def _get_dat_object(tdf, create_routine, file_path, file_or_directory, check_for_dups):
+    # duplicates are found by the (single pass) TicDat readers themselves
+    kwargs = {"duplicates": "raise"} if check_for_dups else {}
     def inner_f():
         if os.path.isfile(file_path) and file_or_directory == "file":
             if file_path.endswith(".json"):
-                assert not (check_for_dups and tdf.json.find_duplicates(file_path)), "duplicate rows found"
-                return getattr(tdf.json, create_routine)(file_path)
+                return getattr(tdf.json, create_routine)(file_path, **kwargs)
             if file_path.endswith(".xls") or file_path.endswith(".xlsx"):
-                assert not (check_for_dups and tdf.xls.find_duplicates(file_path)), "duplicate rows found"
-                return getattr(tdf.xls, create_routine)(file_path)
+                return getattr(tdf.xls, create_routine)(file_path, **kwargs)
             if file_path.endswith(".db"):
-                assert not (check_for_dups and tdf.sql.find_duplicates(file_path)), "duplicate rows found"
-                return getattr(tdf.sql, create_routine)(file_path)
+                return getattr(tdf.sql, create_routine)(file_path, **kwargs)
             if file_path.endswith(".sql"):
                 # no way to check a .sql file for duplications
                 return tdf.sql.create_tic_dat_from_sql(file_path) # only TicDat objects handle .sql files
             if file_path.endswith(".mdb") or file_path.endswith(".accdb"):
-                assert not (check_for_dups and tdf.mdb.find_duplicates(file_path)), "duplicate rows found"
-                return tdf.mdb.create_tic_dat(file_path)
+                return tdf.mdb.create_tic_dat(file_path, **kwargs)
         elif os.path.isdir(file_path) and file_or_directory == "directory":
-            assert not (check_for_dups and tdf.csv.find_duplicates(file_path)), "duplicate rows found"
-            return getattr(tdf.csv, create_routine)(file_path)
+            if file_path.endswith(".parquet"):
+                return getattr(tdf.parquet, create_routine)(file_path, **kwargs)
+            return getattr(tdf.csv, create_routine)(file_path, **kwargs)
     dat = inner_f()
     verify(dat, f"Failed to read from and/or recognize {file_path}{_extra_input_file_check_str(file_path)}")
     return dat
@@ -449,6 +523,8 @@ def _get_write_function_and_kwargs(tdf, file_path, file_or_directory):
             write_func = tdf.sql.write_sql_file
         if file_path.endswith(".mdb") or file_path.endswith(".accdb"):
             write_func = tdf.mdb.write_file
+    elif file_path.endswith(".parquet"):
+        write_func = tdf.parquet.write_directory
     else:
         write_func = tdf.csv.write_directory
     verify(write_func, f"Unable to resolve write function for {file_path}")
@@ -566,6 +642,59 @@ def find_duplicates(td, tdf_for_dups):
             del(rtn[t])
     return rtn
 
+def verify_duplicates_option(duplicates):
+    verify(duplicates in ("last_wins", "raise", "report"),
+           "duplicates needs to be one of 'last_wins', 'raise' or 'report'")
+
+def primary_keys_from_columns(tdf, columns):
+    """
+    :param tdf: a TicDatFactory
+    :param columns: a dictionary of table name to {field : list of values}, as per TicDat.from_trusted_columns
+    :return: a dictionary of primary key table name to the list of primary key values, in row order
+    """
+    rtn = {}
+    for t, c in columns.items():
+        pks = tdf.primary_key_fields.get(t)
+        if pks and dictish(c):
+            rtn[t] = c[pks[0]] if len(pks) == 1 else list(zip(*(c[f] for f in pks)))
+    return rtn
+
+def primary_keys_from_rows(tdf, table_rows):
+    """
+    :param tdf: a TicDatFactory
+    :param table_rows: a dictionary of table name to the list of rows, as per the TicDat constructor
+    :return: a dictionary of primary key table name to the list of primary key values, in row order
+    """
+    rtn = {}
+    for t, rows in table_rows.items():
+        pks = tdf.primary_key_fields.get(t)
+        if pks and not dictish(rows) and containerish(rows):
+            rtn[t] = []
+            for r in rows:
+                if dictish(r):
+                    r = [r.get(f, 0) for f in pks]
+                rtn[t].append(r if not containerish(r) else (r[0] if len(pks) == 1 else tuple(r[:len(pks)])))
+    return rtn
+
+def duplicates_read_result(dat, duplicates, table_keys):
+    """
+    resolve the duplicates argument of a TicDat reader.
+    :param dat: the TicDat object that was read. The last row read for a duplicated primary key wins.
+    :param duplicates: one of "last_wins", "raise", "report"
+    :param table_keys: a dictionary of primary key table name to the primary key values read, in row order
+    :return: dat for "last_wins" and "raise", the pair of dat and the find_duplicates style dictionary for "report"
+    """
+    if duplicates == "last_wins":
+        return dat
+    rtn = {}
+    for t, keys in table_keys.items():
+        dups = {k: v for k, v in Counter(keys).items() if v > 1}
+        if dups:
+            rtn[t] = dups
+    verify(not (duplicates == "raise" and rtn), "duplicate rows found : %s" %
+           {t: sorted(v, key=repr)[:10] for t, v in rtn.items()})
+    return (dat, rtn) if duplicates == "report" else dat
+
 def find_duplicates_from_dict_ticdat(tdf, dict_ticdat):
      assert isinstance(tdf, ticdat.TicDatFactory)
      assert dictish(dict_ticdat) and all(map(stringish, dict_ticdat)) and \
@@ -731,6 +860,34 @@ def all_underscore_replacements(s):
         rtn.append(s_)
     return rtn
 
+def sqlite_table_names(con, tables):
+    """
+    Find the SQLite tables (or views) that match the table names, as per all_underscore_replacements
+    and SQLite's case insensitivity. Uses a single sqlite_master introspection, as opposed to probing
+    each of the all_underscore_replacements candidates with a query.
+    :param con: a sqlite3 connection (or a connection object with a compatible execute)
+    :param tables: the table names to look for
+    :return: a dictionary mapping each of the tables to the list of matching all_underscore_replacements candidates
+    """
+    normalized = lambda name: name.lower().replace(" ", "_")
+    sql_names = defaultdict(set)
+    for master in ["sqlite_master", "sqlite_temp_master"]:
+        try:
+            rows = list(con.execute("Select name from %s where type in ('table', 'view')"%master))
+        except Exception: # i.e. the same as if every probe query failed
+            rows = []
+        for row in rows:
+            sql_names[normalized(row[0])].add(row[0].lower())
+    def candidate(table, sql_name):
+        if len(table) == len(sql_name) and \
+           all(a == b or (a == "_" and b == " ") for a,b in zip(table.lower(), sql_name)):
+            return "".join(" " if b == " " else a for a,b in zip(table, sql_name))
+    rtn = {}
+    for table in tables:
+        candidates = {candidate(table, _) for _ in sql_names.get(normalized(table), ())}
+        rtn[table] = sorted(candidates.difference([None]))
+    return rtn
+
 def all_subsets(my_set):
     return [set(subset) for l in range(len(my_set)+1) for subset in combinations(my_set, l)]
 
@@ -748,6 +905,62 @@ def safe_apply(f) :
             return None
     return _rtn
 
+def map_jobs(f, jobs, executor=None):
+    """
+    :param f: a function
+    :param jobs: an iterable of argument tuples for f
+    :param executor: None or a concurrent.futures.Executor that is not a ProcessPoolExecutor
+    :return: the list [f(*job) for job in jobs], computed in parallel by executor (if provided)
+    """
+    if executor is None:
+        return [f(*job) for job in jobs]
+    from concurrent.futures import Executor, ProcessPoolExecutor
+    # the jobs are typically closures over a TicDat or PanDat object, and thus can't be pickled
+    verify(isinstance(executor, Executor) and not isinstance(executor, ProcessPoolExecutor),
+           "executor needs to be a concurrent.futures.Executor that runs in process (i.e. a ThreadPoolExecutor)")
+    return list(executor.map(lambda job: f(*job), jobs))
+
+def verify_max_workers_option(max_workers):
+    verify(max_workers is None or (isinstance(max_workers, int) and not isinstance(max_workers, bool)
+                                   and max_workers > 0), "max_workers needs to be None or a positive integer")
+
+def map_jobs_with_workers(f, jobs, max_workers=None):
+    """
+    :param f: a function
+    :param jobs: an iterable of argument tuples for f
+    :param max_workers: None or a positive integer. If greater than 1, a ThreadPoolExecutor with this many
+                        threads is used for the duration of the call
+    :return: the list [f(*job) for job in jobs] (i.e. in the order of jobs, regardless of max_workers)
+    """
+    verify_max_workers_option(max_workers)
+    if max_workers is None or max_workers == 1:
+        return map_jobs(f, jobs)
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers) as executor:
+        return map_jobs(f, jobs, executor)
+
+def json_loads(s):
+    """
+    :param s: a JSON string (or bytes)
+    :return: the parsed object. Uses orjson when it is installed, falling back to the json module for the
+             JSON that orjson rejects (i.e. NaN and Infinity literals).
+    """
+    if orjson:
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError:
+            pass
+    import json
+    return json.loads(s)
+
+def json_load_file(path):
+    """
+    :param path: path to a JSON file
+    :return: the parsed object, as per json_loads
+    """
+    with open(path, "rb" if orjson else "r") as f:
+        return json_loads(f.read())
+
 def dictish(x): return all(hasattr(x, _) for _ in
                            ("__getitem__", "keys", "values", "items", "__contains__", "__len__"))
 def stringish(x): return all(hasattr(x, _) for _ in ("lower", "upper", "strip"))
@@ -775,6 +988,7 @@ def baseConverter(number, base):
 def freezable_factory(baseClass, freezeAttr, alwaysEditable = None) :
     alwaysEditable = alwaysEditable or set()
     class _Freezeable(baseClass) :
+        __slots__ = () # subclasses without __slots__ still get a __dict__
         def __setattr__(self, key, value):
             if key in alwaysEditable or not getattr(self, freezeAttr, False):
                 return super(_Freezeable, self).__setattr__(key, value)
@@ -835,29 +1049,59 @@ def td_row_factory(table, key_field_names, data_field_names, default_values={}):
             verify(containerish(x) and len(x) == 0, "Attempting to add non-empty data to %s"%table)
             return FreezeableDict()
         return makefreezeabledict
+    # this metadata is shared by all the rows of the table
     fieldtoindex = {x:data_field_names.index(x) for x in data_field_names}
-    indextofield = {v:k for k,v in fieldtoindex.items()}
+    fields = tuple(data_field_names)
+    # since ticDat targeting numerical analysis, 0 is good default default
+    defaults = [default_values.get(f, 0) for f in fields]
     class TicDatDataRow(freezable_factory(object, "_attributesFrozen")) :
+        # no per-row __dict__. The foreign key link attributes are kept in a dict that is only allocated
+        # for the rows that receive them
+        __slots__ = ("_data", "_links")
+        # the frozen state is kept on the class, and thus shared by all the rows of a table
+        _dataFrozen = False
+        _attributesFrozen = False
+        @classmethod
+        def _freeze_rows(cls):
+            cls._dataFrozen = True
+            cls._attributesFrozen = True
+        @classmethod
+        def _from_trusted(cls, data):
+            # no verification - data needs to be a list with one entry per data field
+            rtn = object.__new__(cls)
+            object.__setattr__(rtn, "_data", data)
+            return rtn
+        def __getattr__(self, item):
+            links = getattr(self, "_links", None) if item != "_links" else None
+            if links and item in links:
+                return links[item]
+            raise AttributeError("%s has no attribute %s"%(self.__class__.__name__, item))
+        def __setattr__(self, key, value):
+            if self._attributesFrozen :
+                raise TicDatError("can't set attributes to a frozen " + self.__class__.__name__)
+            if key in TicDatDataRow.__slots__ :
+                return object.__setattr__(self, key, value)
+            if getattr(self, "_links", None) is None:
+                object.__setattr__(self, "_links", {})
+            self._links[key] = value
         def __init__(self, x):
-            # since ticDat targeting numerical analysis, 0 is good default default
-            self._data = [0] * len(fieldtoindex)
-            if dictish(x) :
+            if type(x) in (list, tuple) and len(x) == len(fields):
+                data = list(x)
+            elif dictish(x) :
                 verify(set(x.keys()).issubset(fieldtoindex),
                        "Applying inappropriate data field names to %s"%table)
-                for f,i in fieldtoindex.items():
-                    if f in default_values :
-                        self._data[i] = default_values[f]
+                data = list(defaults)
                 for f,_d in x.items():
-                    self[f] = _d
+                    data[fieldtoindex[f]] = _d
             elif containerish(x) :
-                verify(len(x) == len(self), "%s requires each row to have %s data values"%
-                       (table, len(self)))
-                for i in range(len(self)):
-                    self._data[i] = x[i]
+                verify(len(x) == len(fields), "%s requires each row to have %s data values"%
+                       (table, len(fields)))
+                data = [x[i] for i in range(len(fields))]
             else:
-                verify(len(self) ==1, "%s requires each row to have %s data values"%
-                       (table, len(self)))
-                self._data[0] = x
+                verify(len(fields) ==1, "%s requires each row to have %s data values"%
+                       (table, len(fields)))
+                data = [x]
+            object.__setattr__(self, "_data", data)
         def __getitem__(self, item):
             try :
                 return self._data[fieldtoindex[item]]
@@ -866,26 +1110,196 @@ def td_row_factory(table, key_field_names, data_field_names, default_values={}):
         def __setitem__(self, key, value):
             verify(key in fieldtoindex, "Key error : %s not data field name for table %s"%
                    (key, table))
-            if getattr(self, "_dataFrozen", False) :
+            if self._dataFrozen :
                 raise TicDatError("Can't edit a frozen TicDatDataRow")
             self._data[fieldtoindex[key]] = value
         def keys(self):
-            return tuple(indextofield[i] for i in range(len(self)))
+            return fields
         def values(self):
             return tuple(self._data)
         def items(self):
-            return zip(self.keys(), self.values())
+            return zip(fields, self.values())
         def __contains__(self, item):
             return item in fieldtoindex
         def __iter__(self):
-            return iter(fieldtoindex)
+            return iter(fields)
         def __len__(self):
-            return len(self._data)
+            return len(fields)
         def __repr__(self):
             return "_td:" + {k:v for k,v in self.items()}.__repr__()
     assert dictish(TicDatDataRow)
     return TicDatDataRow
 
+def td_columnar_table_factory(table, key_field_names, data_field_names, default_values={}, data_types={}):
+    """
+    creates a dict-of-dicts table class that stores its rows column-wise (one column per data field) along with
+    a primary key hash index. The rows handed out are lightweight views onto the columns, so table[pk]["field"]
+    reads and writes work as they do for an ordinary TicDat table, at a fraction of the memory.
+    Float-only columns (as per data_types) are kept as array('d') until a non-float is stored in them.
+    """
+    assert dictish(default_values) and set(default_values).issubset(data_field_names)
+    assert key_field_names and not set(key_field_names).intersection(data_field_names)
+    keylen = len(key_field_names)
+    fieldtoindex = {x:i for i,x in enumerate(data_field_names)}
+    defaults = [default_values.get(f, 0) for f in data_field_names]
+    def float_only(f):
+        dt = data_types.get(f)
+        return bool(dt and dt.number_allowed and not (dt.nullable or dt.must_be_int or dt.datetime or
+                                                      dt.strings_allowed))
+    typed = tuple(map(float_only, data_field_names))
+    detached_row = td_row_factory(table, key_field_names, data_field_names, default_values)
+
+    def row_values(x):
+        if not data_field_names:
+            verify(containerish(x) and len(x) == 0, "Attempting to add non-empty data to %s"%table)
+            return []
+        if type(x) in (list, tuple) and len(x) == len(fieldtoindex):
+            return list(x)
+        if dictish(x):
+            verify(set(x.keys()).issubset(fieldtoindex), "Applying inappropriate data field names to %s"%table)
+            rtn = list(defaults)
+            for f,_d in x.items():
+                rtn[fieldtoindex[f]] = _d
+            return rtn
+        if containerish(x):
+            verify(len(x) == len(fieldtoindex), "%s requires each row to have %s data values"%
+                   (table, len(fieldtoindex)))
+            return list(x)
+        verify(len(fieldtoindex) == 1, "%s requires each row to have %s data values"%(table, len(fieldtoindex)))
+        return [x]
+
+    class TicDatColumnarRow(object):
+        __slots__ = ("_table", "_key")
+        def __init__(self, table_, key):
+            self._table = table_
+            self._key = key
+        @property
+        def _dataFrozen(self):
+            return getattr(self._table, "_dataFrozen", False)
+        @property
+        def _attributesFrozen(self):
+            return True
+        def __getitem__(self, item):
+            try :
+                i = fieldtoindex[item]
+            except :
+                raise TicDatError("Key error : %s not data field name for table %s"% (item, table))
+            return self._table._columns[i][self._table._slot(self._key)]
+        def __setitem__(self, key, value):
+            verify(key in fieldtoindex, "Key error : %s not data field name for table %s"%(key, table))
+            if self._dataFrozen :
+                raise TicDatError("Can't edit a frozen TicDatDataRow")
+            self._table._set_cell(fieldtoindex[key], self._table._slot(self._key), value)
+        def keys(self):
+            return tuple(data_field_names)
+        def values(self):
+            slot = self._table._slot(self._key)
+            return tuple(c[slot] for c in self._table._columns)
+        def items(self):
+            return zip(self.keys(), self.values())
+        def __contains__(self, item):
+            return item in fieldtoindex
+        def __iter__(self):
+            return iter(fieldtoindex)
+        def __len__(self):
+            return len(fieldtoindex)
+        def __repr__(self):
+            return "_td:" + {k:v for k,v in self.items()}.__repr__()
+    assert dictish(TicDatColumnarRow)
+
+    class TicDatColumnarDict(freezable_factory(MutableMapping, "_attributesFrozen")):
+        def __init__(self, *_args, **_kwargs):
+            self._index = {}
+            self._columns = [array("d") if t else [] for t in typed]
+            self._size = 0
+            self._vacant = 0
+            for k,v in dict(*_args, **_kwargs).items():
+                self[k] = v
+        def _check_not_frozen(self):
+            if getattr(self, "_dataFrozen", False) :
+                raise TicDatError("Can't edit a frozen " + self.__class__.__name__)
+        def _slot(self, key):
+            try:
+                return self._index[key]
+            except KeyError:
+                raise TicDatError("%s is no longer a row of %s"%(key, table))
+        def _set_cell(self, i, slot, value):
+            col = self._columns[i]
+            if type(col) is array and type(value) is not float:
+                col = self._columns[i] = list(col)
+            col[slot] = value
+        def __setitem__(self, key, value):
+            verify((keylen == len(key) > 1) if type(key) is tuple else
+                   (containerish(key) == (keylen > 1) and (keylen == 1 or keylen == len(key))),
+                   "inconsistent key length for %s"%table)
+            self._check_not_frozen()
+            row = row_values(value)
+            slot = self._index.get(key)
+            if slot is None:
+                self._index[key] = self._size
+                self._size += 1
+                for i,(col, v) in enumerate(zip(self._columns, row)):
+                    if type(col) is array and type(v) is not float:
+                        col = self._columns[i] = list(col)
+                    col.append(v)
+            else:
+                for i,v in enumerate(row):
+                    self._set_cell(i, slot, v)
+        def __getitem__(self, item):
+            if item not in self._index:
+                if getattr(self, "_dataFrozen", False):
+                    raise KeyError(item)
+                self[item] = {}
+            return TicDatColumnarRow(self, item)
+        def __delitem__(self, key):
+            self._check_not_frozen()
+            slot = self._index.pop(key)
+            for col in self._columns:
+                if type(col) is list:
+                    col[slot] = None # release the reference until the next compaction
+            self._vacant += 1
+            if self._vacant > max(1000, len(self._index)):
+                self._compact()
+        def _compact(self):
+            slots = list(self._index.values())
+            self._columns = [array("d", (col[s] for s in slots)) if type(col) is array else [col[s] for s in slots]
+                             for col in self._columns]
+            self._index = {k:i for i,k in enumerate(self._index)}
+            self._size = len(slots)
+            self._vacant = 0
+        def __contains__(self, item):
+            return item in self._index
+        def __iter__(self):
+            return iter(self._index)
+        def __len__(self):
+            return len(self._index)
+        def get(self, key, default=None):
+            return TicDatColumnarRow(self, key) if key in self._index else default
+        def setdefault(self, key, default=None):
+            if key not in self._index:
+                self[key] = default
+            return TicDatColumnarRow(self, key)
+        def pop(self, key, *args):
+            if key not in self._index:
+                if args:
+                    return args[0]
+                raise KeyError(key)
+            rtn = detached_row(list(TicDatColumnarRow(self, key).values())) if data_field_names else \
+                  FreezeableDict()
+            del self[key]
+            return rtn
+        def popitem(self):
+            if not self._index:
+                raise KeyError("popitem(): %s is empty"%table)
+            key = next(reversed(self._index))
+            return key, self.pop(key)
+        def clear(self):
+            self._check_not_frozen()
+            TicDatColumnarDict.__init__(self)
+        def __repr__(self):
+            return "td:" + {k:v for k,v in self.items()}.__repr__()
+    assert dictish(TicDatColumnarDict)
+    return TicDatColumnarDict
 
 class Sloc(object):
     """
@@ -1070,8 +1484,9 @@ def per_error(x1, x2) :
 def nearly_same(x1, x2, epsilon) :
     return per_error(x1, x2) < epsilon
 
+# vectorized defaults to False so that three argument construction continues to work
 RowPredicateInfo = namedtuple("RowPredicateInfo", ["predicate", "predicate_kwargs_maker",
-                                                   "predicate_failure_response"])
+                                                   "predicate_failure_response", "vectorized"], defaults=[False])
 
 def does_new_fk_complete_circle(native_tbl, foreign_tbl, tdf):
     fks = defaultdict(set)
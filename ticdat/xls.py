@@ -5,6 +5,10 @@ PEP8
 import ticdat.utils as utils
 from ticdat.utils import freezable_factory, TicDatError, verify, containerish, case_space_to_pretty, FrozenDict
 import os
+import re
+import zipfile
+import posixpath
+from xml.etree import ElementTree
 from collections import defaultdict
 from itertools import product
 from ticdat.pandatfactory import PanDatFactory
@@ -28,6 +32,246 @@ _can_unit_test = xlrd and xlwt and xlsx
 # the xlsxwriter doesn't handle infinity as seamlessly as xls
 _longest_sheet = 30
 
+# the error codes xlrd uses for error cells
+_xlsx_error_codes = {"#NULL!": 0x00, "#DIV/0!": 0x07, "#VALUE!": 0x0F, "#REF!": 0x17, "#NAME?": 0x1D,
+                     "#NUM!": 0x24, "#N/A": 0x2A}
+_xlsx_escape = re.compile(r'_x[0-9A-Fa-f]{4}_')
+
+def _xlsx_column_index(cell_name):
+    # "A1" => 0, "AB12" => 27
+    letters = cell_name.rstrip("0123456789").replace("$", "")
+    if len(letters) == 1:
+        return ord(letters) - 65
+    rtn = 0
+    for c in letters:
+        rtn = rtn * 26 + ord(c) - 64
+    return rtn - 1
+
+def _xlsx_text(elem):
+    t = elem.text
+    if t is None:
+        return ""
+    if elem.get("{http://www.w3.org/XML/1998/namespace}space") != "preserve":
+        t = t.strip("\t\n \r")
+    return _xlsx_escape.sub(lambda m: chr(int(m.group(0)[2:6], 16)), t) if "_" in t else t
+
+def _xlsx_rich_text(elem, ns):
+    # the text of a shared string (si) or inline string (is) element. Phonetic runs are ignored.
+    rtn = []
+    for child in elem:
+        if child.tag == ns + "t":
+            rtn.append(_xlsx_text(child))
+        elif child.tag == ns + "r":
+            rtn.extend(_xlsx_text(t) for t in child if t.tag == ns + "t")
+    return "".join(rtn)
+
+def _xml_local_name(name):
+    return name.rsplit("}", 1)[-1]
+
+class _XlsxBook(object):
+    """
+    A read only view of an .xlsx file that streams the rows of each sheet out of the zipped xml, as opposed to
+    xlrd.open_workbook, which materializes the entire workbook. The cell values are those of xlrd.
+    """
+    def __init__(self, file_path):
+        self._file_path = file_path
+        with zipfile.ZipFile(file_path) as zf:
+            workbook_path = [r["Target"] for r in self._relationships(zf, "")
+                             if r["Type"].endswith("/officeDocument")][0]
+            workbook = ElementTree.fromstring(zf.read(workbook_path))
+            relationships = {r["Id"]: r for r in self._relationships(zf, workbook_path)}
+        self.datemode = 0
+        self._shared_strings_path = next((r["Target"] for r in relationships.values()
+                                          if r["Type"].endswith("/sharedStrings")), None)
+        self._shared_strings = None
+        self._sheets = []
+        for elem in workbook.iter():
+            if _xml_local_name(elem.tag) == "workbookPr":
+                self.datemode = 1 if elem.get("date1904") in ("1", "true", "on") else 0
+            if _xml_local_name(elem.tag) == "sheet":
+                r_id = next(v for k, v in elem.attrib.items() if _xml_local_name(k) == "id")
+                if relationships[r_id]["Type"].endswith("/worksheet"): # chart sheets are skipped, as per xlrd
+                    self._sheets.append(_XlsxSheet(self, elem.get("name"), relationships[r_id]["Target"]))
+    @staticmethod
+    def _relationships(zf, part_path):
+        # the relationships of a part, with the targets resolved to paths within the zip file
+        directory, name = posixpath.split(part_path)
+        rels_path = posixpath.join(directory, "_rels", name + ".rels")
+        if rels_path not in zf.namelist():
+            return []
+        rtn = []
+        for elem in ElementTree.fromstring(zf.read(rels_path)):
+            r = dict(elem.attrib)
+            target = r.get("Target", "")
+            r["Target"] = target.lstrip("/") if target.startswith("/") else \
+                          posixpath.normpath(posixpath.join(directory, target))
+            rtn.append(r)
+        return rtn
+    def sheets(self):
+        return list(self._sheets)
+    def _open(self, path):
+        zf = zipfile.ZipFile(self._file_path)
+        try:
+            return zf, zf.open(path)
+        except:
+            zf.close()
+            raise
+    def shared_strings(self):
+        if self._shared_strings is None:
+            self._shared_strings = []
+            if self._shared_strings_path:
+                zf, stream = self._open(self._shared_strings_path)
+                with zf, stream:
+                    ns = None
+                    for event, elem in ElementTree.iterparse(stream, events=("start", "end")):
+                        if ns is None:
+                            ns = elem.tag[:elem.tag.index("}") + 1] if "}" in elem.tag else ""
+                        elif event == "end" and elem.tag == ns + "si":
+                            self._shared_strings.append(_xlsx_rich_text(elem, ns))
+                            elem.clear()
+        return self._shared_strings
+
+class _XlsxSheetTarget(object):
+    """
+    An ElementTree.XMLParser target for the xml of a sheet. Whenever a row with at least one non blank
+    cell is parsed, the pair of its row index and cell values is appended to rows. No xml elements are built.
+    """
+    _xml_space = "{http://www.w3.org/XML/1998/namespace}space"
+    def __init__(self, shared_strings, sheet_name):
+        self.rows = []
+        self._shared_strings, self._sheet_name = shared_strings, sheet_name
+        self._local_names = {}
+        self._rowx, self._values, self._colx = -1, [], -1
+        self._cell_type = self._v = self._inline = self._text = None
+        self._preserve_space = self._in_phonetic = False
+    def _local_name(self, tag):
+        rtn = self._local_names[tag] = _xml_local_name(tag)
+        return rtn
+    def start(self, tag, attrib):
+        name = self._local_names.get(tag) or self._local_name(tag)
+        if name == "c":
+            self._colx = _xlsx_column_index(attrib["r"]) if "r" in attrib else self._colx + 1
+            self._cell_type, self._v, self._inline = attrib.get("t", "n"), None, None
+        elif name == "v" or (name == "t" and self._inline is not None and not self._in_phonetic):
+            self._text, self._preserve_space = [], attrib.get(self._xml_space) == "preserve"
+        elif name == "row":
+            self._rowx = int(attrib["r"]) - 1 if "r" in attrib else self._rowx + 1
+            self._values, self._colx = [], -1
+        elif name == "is":
+            self._inline = []
+        elif name == "rPh":
+            self._in_phonetic = True
+    def data(self, data):
+        if self._text is not None:
+            self._text.append(data)
+    def _cooked_text(self):
+        t, self._text = "".join(self._text), None
+        if not self._preserve_space:
+            t = t.strip("\t\n \r")
+        return _xlsx_escape.sub(lambda m: chr(int(m.group(0)[2:6], 16)), t) if "_" in t else t
+    def end(self, tag):
+        name = self._local_names.get(tag) or self._local_name(tag)
+        if name == "v":
+            self._v = self._cooked_text() if self._cell_type == "str" else "".join(self._text)
+            self._text = None
+        elif name == "t" and self._text is not None:
+            self._inline.append(self._cooked_text())
+        elif name == "c":
+            cell_type, v = self._cell_type, self._v
+            if cell_type == "n":
+                if not v:
+                    return
+                v = float(v)
+            elif cell_type == "s":
+                if not v:
+                    return
+                v = self._shared_strings[int(v)]
+            elif cell_type == "b":
+                v = 1 if v in ("1", "true", "on") else 0
+            elif cell_type == "e":
+                v = _xlsx_error_codes[v or "#N/A"]
+            elif cell_type == "inlineStr":
+                v = "".join(self._inline) if self._inline is not None else v
+                if not v:
+                    return
+            elif cell_type != "str":
+                raise TicDatError("Unknown cell type %s in sheet %s" % (cell_type, self._sheet_name))
+            values, colx = self._values, self._colx
+            if colx >= len(values):
+                values.extend([""] * (colx - len(values)))
+                values.append(v)
+            else:
+                values[colx] = v
+        elif name == "row":
+            if self._values:
+                self.rows.append((self._rowx, self._values))
+        elif name == "rPh":
+            self._in_phonetic = False
+    def close(self):
+        pass
+
+class _XlsxSheet(object):
+    def __init__(self, book, name, path):
+        self._book, self.name, self._path = book, name, path
+    def _value_rows(self):
+        # generates (row index, cell values) for the rows that have at least one non blank cell
+        target = _XlsxSheetTarget(self._book.shared_strings(), self.name)
+        parser = ElementTree.XMLParser(target=target)
+        zf, stream = self._book._open(self._path)
+        with zf, stream:
+            while True:
+                chunk = stream.read(1<<16)
+                if chunk:
+                    parser.feed(chunk)
+                else:
+                    parser.close()
+                rows, target.rows = target.rows, []
+                for row in rows:
+                    yield row
+                if not chunk:
+                    return
+    def rows(self, start=0, width=0):
+        """
+        :param start: the index of the first row to generate
+        :param width: the rows are padded with empty strings to at least this length
+        :return: a generator of the row value lists, as per xlrd.Sheet.row_values
+        """
+        next_rowx = 0
+        for rowx, values in self._value_rows():
+            for _ in range(max(next_rowx, start), rowx):
+                yield [""] * width
+            if rowx >= start:
+                if len(values) < width:
+                    values.extend([""] * (width - len(values)))
+                yield values
+            next_rowx = rowx + 1
+    def row_values_at(self, rowx):
+        # the row values at index rowx, or None if the sheet has fewer rows
+        rows = self.rows(rowx)
+        try:
+            return next(rows, None)
+        finally:
+            rows.close()
+    def shape(self):
+        nrows, ncols = 0, 0
+        for rowx, values in self._value_rows():
+            nrows, ncols = rowx + 1, max(ncols, len(values))
+        return nrows, ncols
+
+def _row_width(field_indicies):
+    return max(field_indicies.values()) + 1 if field_indicies else 0
+
+class _XlrdSheet(object):
+    # an xlrd.Sheet with the _XlsxSheet interface
+    def __init__(self, sheet):
+        self._sheet, self.name = sheet, sheet.name
+    def rows(self, start=0, width=0):
+        return (self._sheet.row_values(i) for i in range(self._sheet.nrows)[start:])
+    def row_values_at(self, rowx):
+        return self._sheet.row_values(rowx) if rowx < self._sheet.nrows else None
+    def shape(self):
+        return self._sheet.nrows, self._sheet.ncols
+
 class XlsTicFactory(freezable_factory(object, "_isFrozen")) :
     """
     Primary class for reading/writing Excel files with TicDat objects.
@@ -50,7 +294,7 @@ class XlsTicFactory(freezable_factory(object, "_isFrozen")) :
         self._isFrozen = True
     def create_tic_dat(self, xls_file_path, row_offsets=None, headers_present = True,
                        treat_inf_as_infinity = True,
-                       freeze_it = False):
+                       freeze_it = False, duplicates="last_wins"):
         """
         Create a TicDat object from an Excel file
 
@@ -68,7 +312,13 @@ class XlsTicFactory(freezable_factory(object, "_isFrozen")) :
 
         :param freeze_it: boolean. should the returned object be frozen?
 
-        :return: a TicDat object populated by the matching sheets.
+        :param duplicates: how to handle rows with duplicated primary keys, which are found while reading.
+                           "last_wins" : the last row read wins, and no duplicate checking is performed.
+                           "raise" : raise a TicDatError if any duplicates are found.
+                           "report" : return the pair of the TicDat object (for which the last row read wins)
+                                      and a find_duplicates style dictionary.
+
+        :return: a TicDat object populated by the matching sheets (or a pair, see the duplicates argument).
 
         caveats: Missing sheets resolve to an empty table, but missing fields
                  on matching sheets throw an Exception.
@@ -97,7 +347,10 @@ class XlsTicFactory(freezable_factory(object, "_isFrozen")) :
             verify(headers_present and treat_inf_as_infinity and not row_offsets,
                    "headers_present, treat_inf_as_infinity and row_offsets must all be at default values\n" +
                    "to use generic tables")
-        rtn = self._create_tic_dat_dict(xls_file_path, row_offsets or {}, headers_present, treat_inf_as_infinity)
+        utils.verify_duplicates_option(duplicates)
+        table_keys = {} if duplicates != "last_wins" else None
+        rtn = self._create_tic_dat_dict(xls_file_path, row_offsets or {}, headers_present, treat_inf_as_infinity,
+                                        table_keys)
         if self.tic_dat_factory.generic_tables:
             if xls_file_path.endswith(".xls"):
                 print("** Warning : pandas doesn't always play well with older Excel formats.")
@@ -107,8 +360,8 @@ class XlsTicFactory(freezable_factory(object, "_isFrozen")) :
                 rtn[t] = getattr(pandat, t)
         rtn = tdf._parameter_table_post_read_adjustment(tdf.TicDat(**rtn))
         if freeze_it:
-            return self.tic_dat_factory.freeze_me(rtn)
-        return rtn
+            rtn = self.tic_dat_factory.freeze_me(rtn)
+        return utils.duplicates_read_result(rtn, duplicates, table_keys)
     def _verify_differentiable_sheet_names(self):
         rtn = defaultdict(set)
         for t in self.tic_dat_factory.all_tables:
@@ -121,11 +374,14 @@ class XlsTicFactory(freezable_factory(object, "_isFrozen")) :
         verify(utils.stringish(xls_file_path) and os.path.exists(xls_file_path),
                "xls_file_path argument %s is not a valid file path."%xls_file_path)
         try :
-            book = xlrd.open_workbook(xls_file_path)
+            # .xlsx files are streamed, rather than loaded into memory by xlrd
+            book = _XlsxBook(xls_file_path) if zipfile.is_zipfile(xls_file_path) else \
+                   xlrd.open_workbook(xls_file_path)
         except Exception as e:
             raise TicDatError("Unable to open %s as xls file : %s"%(xls_file_path, e))
         sheets = defaultdict(list)
-        for table, sheet in product(all_tables, book.sheets()) :
+        for table, sheet in product(all_tables, [_ if isinstance(book, _XlsxBook) else _XlrdSheet(_)
+                                                 for _ in book.sheets()]) :
             if table.lower()[:_longest_sheet] == sheet.name.lower().replace(' ', '_')[:_longest_sheet]:
                 sheets[table].append(sheet)
         duplicated_sheets = tuple(_t for _t,_s in sheets.items() if len(_s) > 1)
@@ -154,15 +410,15 @@ class XlsTicFactory(freezable_factory(object, "_isFrozen")) :
             sheets, field_indicies, datemode = self._get_sheets_and_fields(xlsFilePath,
                                         (table,), {table:row_offset}, headers_present)
             if table in sheets :
-                sheet = sheets[table]
-                table_len = min(len(sheet.col_values(field_indicies[table][field]))
-                               for field in tdf.data_fields[table])
-                for x in (sheet.row_values(i) for i in range(table_len)[row_offset+ho:]):
-                    yield self._sub_tuple(table, tdf.data_fields[table],
-                                          field_indicies[table], treat_inf_as_infinity, datemode)(x)
+                sub_tuple = self._sub_tuple(table, tdf.data_fields[table], field_indicies[table],
+                                            treat_inf_as_infinity, datemode)
+                for x in sheets[table].rows(row_offset+ho, _row_width(field_indicies[table])):
+                    yield sub_tuple(x)
         return tableObj
 
-    def _create_tic_dat_dict(self, xls_file_path, row_offsets, headers_present, treat_inf_as_infinity):
+    def _create_tic_dat_dict(self, xls_file_path, row_offsets, headers_present, treat_inf_as_infinity,
+                             table_keys=None):
+        # if table_keys is a dict, it will be populated with the primary keys read for each table, in row order
         tiai = treat_inf_as_infinity
         verify(utils.dictish(row_offsets) and
                set(row_offsets).issubset(self.tic_dat_factory.all_tables) and
@@ -179,21 +435,22 @@ class XlsTicFactory(freezable_factory(object, "_isFrozen")) :
             fields = tdf.primary_key_fields.get(tbl, ()) + tdf.data_fields.get(tbl, ())
             assert fields or tbl in self.tic_dat_factory.generic_tables
             indicies = field_indicies[tbl]
-            table_len = min(len(sheet.col_values(indicies[field]))
-                            for field in (fields or indicies))
+            if tbl in tdf.generic_tables:
+                continue # will be read via PanDatFactory
+            data_tuple = self._sub_tuple(tbl, tdf.data_fields.get(tbl, ()), indicies, tiai, dm)
+            rows = sheet.rows(row_offsets[tbl]+ho, _row_width(indicies))
             if tdf.primary_key_fields.get(tbl, ()) :
-                tableObj = {self._sub_tuple(tbl, tdf.primary_key_fields[tbl], indicies, tiai, dm)(x):
-                            self._sub_tuple(tbl, tdf.data_fields.get(tbl, ()), indicies, tiai, dm)(x)
-                            for x in (sheet.row_values(i) for i in
-                                        range(table_len)[row_offsets[tbl]+ho:])}
-            elif tbl in tdf.generic_tables:
-                tableObj = None # will be read via PanDatFactory
+                pk_tuple = self._sub_tuple(tbl, tdf.primary_key_fields[tbl], indicies, tiai, dm)
+                tableObj = {}
+                keys = table_keys.setdefault(tbl, []) if table_keys is not None else None
+                for x in rows:
+                    pk = pk_tuple(x)
+                    tableObj[pk] = data_tuple(x)
+                    if keys is not None:
+                        keys.append(pk)
             else :
-                tableObj = [self._sub_tuple(tbl, tdf.data_fields.get(tbl, ()), indicies, tiai, dm)(x)
-                            for x in (sheet.row_values(i) for i in
-                                        range(table_len)[row_offsets[tbl]+ho:])]
-            if tableObj is not None:
-                rtn[tbl] = tableObj
+                tableObj = [data_tuple(x) for x in rows]
+            rtn[tbl] = tableObj
         for tbl in tdf.generator_tables :
             rtn[tbl] = self._create_generator_obj(xls_file_path, tbl, row_offsets[tbl],
                                                     headers_present, tiai)
@@ -237,12 +494,11 @@ class XlsTicFactory(freezable_factory(object, "_isFrozen")) :
                                         row_offsets, headers_present)
         ho = 1 if headers_present else 0
         for table, sheet in sheets.items() :
-            fields = tdf.primary_key_fields[table] + tdf.data_fields.get(table, ())
             indicies = fieldIndicies[table]
-            table_len = min(len(sheet.col_values(indicies[field])) for field in fields)
-            for x in (sheet.row_values(i) for i in range(table_len)[row_offsets[table]+ho:]) :
-                rtn[table][self._sub_tuple(table, tdf.primary_key_fields[table],
-                                           indicies, treat_inf_as_infinity=True, datemode=dm)(x)] += 1
+            pk_tuple = self._sub_tuple(table, tdf.primary_key_fields[table], indicies,
+                                       treat_inf_as_infinity=True, datemode=dm)
+            for x in sheet.rows(row_offsets[table]+ho, _row_width(indicies)) :
+                rtn[table][pk_tuple(x)] += 1
         for t in list(rtn.keys()):
             rtn[t] = {k:v for k,v in rtn[t].items() if v > 1}
             if not rtn[t]:
@@ -253,51 +509,60 @@ class XlsTicFactory(freezable_factory(object, "_isFrozen")) :
         if self.tic_dat_factory.infinity_io_flag != "N/A" or \
             (table == "parameters" and self.tic_dat_factory.parameters):
             treat_inf_as_infinity = False
-        def _read_cell(x, field):
-            # reminder - data fields have a default default of zero, primary keys don't get a default default
-            dv = self.tic_dat_factory.default_values.get(table, {}).get(field, ["LIST", "NOT", "POSSIBLE"])
-            dt = self.tic_dat_factory.data_types.get(table, {}).get(field)
-            rtn = x[field_indicies[field]]
-            if rtn == "" and ((dt and dt.nullable) or (not dt and dv is None)):
+        read_cells = [self._read_cell_function(table, field, field_indicies[field], treat_inf_as_infinity, datemode)
+                      for field in fields]
+        if len(fields) == 1 :
+            return read_cells[0]
+        return lambda x: tuple(read_cell(x) for read_cell in read_cells)
+    def _read_cell_function(self, table, field, index, treat_inf_as_infinity, datemode):
+        # a function that reads the field's cell from a row of values, with the (table, field) specific logic
+        # resolved just once
+        # reminder - data fields have a default default of zero, primary keys don't get a default default
+        dv = self.tic_dat_factory.default_values.get(table, {}).get(field, ["LIST", "NOT", "POSSIBLE"])
+        dt = self.tic_dat_factory.data_types.get(table, {}).get(field)
+        empty_is_none = bool((dt and dt.nullable) or (not dt and dv is None))
+        must_be_int, is_datetime = bool(dt and dt.must_be_int), bool(dt and dt.datetime)
+        general_read_cell = self.tic_dat_factory._general_read_cell_function(table, field) or (lambda x: x)
+        def rtn(x):
+            rtn = x[index]
+            if rtn == "" and empty_is_none:
                 return None
-            if treat_inf_as_infinity and utils.stringish(rtn) and rtn.lower() in ["inf", "-inf"]:
+            if treat_inf_as_infinity and isinstance(rtn, str) and rtn.lower() in ["inf", "-inf"]:
                 return float(rtn.lower())
-            if utils.numericish(rtn) and utils.safe_apply(int)(rtn) == rtn and dt and dt.must_be_int:
+            if must_be_int and utils.numericish(rtn) and utils.safe_apply(int)(rtn) == rtn:
                 rtn = int(rtn)
             if rtn == "":
-                try_rtn = self.tic_dat_factory._general_read_cell(table, field, None) # None as infinity flagging
+                try_rtn = general_read_cell(None) # None as infinity flagging
                 if utils.numericish(try_rtn):
                     return try_rtn
-            if utils.numericish(rtn) and dt and dt.datetime:
+            if is_datetime and utils.numericish(rtn):
                 rtn = utils.safe_apply(lambda : xlrd.xldate_as_tuple(rtn, datemode))()
                 if rtn is not None:
                     f = datetime.datetime
                     if utils.pd:
                         f = utils.pd.Timestamp
                     return f(year=rtn[0], month=rtn[1], day=rtn[2], hour=rtn[3], minute=rtn[4], second=rtn[5])
-            return self.tic_dat_factory._general_read_cell(table, field, rtn)
-        def rtn(x) :
-            if len(fields) == 1 :
-                return _read_cell(x, fields[0])
-            return tuple(_read_cell(x, field) for field in fields)
+            return general_read_cell(rtn)
         return rtn
 
     def _get_field_indicies(self, table, sheet, row_offset, headers_present) :
         fields = self.tic_dat_factory.primary_key_fields.get(table, ()) + \
                  self.tic_dat_factory.data_fields.get(table, ())
         if not headers_present:
-            row_len = len(sheet.row_values(row_offset)) if sheet.nrows > 0  else len(fields)
+            nrows, ncols = sheet.shape()
+            row_len = ncols if nrows > 0  else len(fields)
             return ({f : i for i,f in enumerate(fields) if i < row_len},
                     [f for i,f in enumerate(fields) if i >= row_len], [])
-        if sheet.nrows - row_offset <= 0 :
+        header_row = sheet.row_values_at(row_offset)
+        if header_row is None :
             return {}, fields, []
         if table in self.tic_dat_factory.generic_tables:
             temp_rtn = defaultdict(list)
-            for ind, val in enumerate(sheet.row_values(row_offset)):
+            for ind, val in enumerate(header_row):
                 temp_rtn[val].append(ind)
         else:
             temp_rtn =  {field:list() for field in fields}
-            for field, (ind, val) in product(fields, enumerate(sheet.row_values(row_offset))) :
+            for field, (ind, val) in product(fields, enumerate(header_row)) :
                 if field == val or (all(map(utils.stringish, (field, val))) and
                                     field.lower() == val.lower()):
                     temp_rtn[field].append(ind)
@@ -382,28 +647,31 @@ class XlsTicFactory(freezable_factory(object, "_isFrozen")) :
         tdf = self.tic_dat_factory
         if os.path.exists(file_path):
             os.remove(file_path)
-        book = xlsx.Workbook(file_path)
-        def clean_for_write(t, f, x):
+        # constant_memory flushes each row to disk as soon as the next row is started, which works since
+        # every sheet is written row by row
+        book = xlsx.Workbook(file_path, {"constant_memory": True})
+        def clean_for_write_function(t, f):
             if self.tic_dat_factory.infinity_io_flag != "N/A" or \
                (t == "parameters" and self.tic_dat_factory.parameters):
-                return self.tic_dat_factory._infinity_flag_write_cell(t, f, x)
-            if x in [float("inf"), -float("inf")] or isinstance(x, datetime.datetime):
-                return str(x)
-            return x
+                return self.tic_dat_factory._infinity_flag_write_cell_function(t, f)
+            infinities = [float("inf"), -float("inf")]
+            return lambda x: str(x) if x in infinities or isinstance(x, datetime.datetime) else x
         for t in sorted(sorted(tdf.all_tables),
                          key=lambda x: len(tdf.primary_key_fields.get(x, ()))) :
             all_flds = self.tic_dat_factory.primary_key_fields.get(t, ()) + self.tic_dat_factory.data_fields.get(t, ())
+            data_flds = tdf.data_fields.get(t, ())
+            cleaners = [clean_for_write_function(t, f) for f in all_flds]
+            pk_cleaners = cleaners[:len(all_flds) - len(data_flds)]
+            data_cleaners = list(zip(cleaners[len(pk_cleaners):], data_flds))
             sheet = book.add_worksheet(tbl_name_mapping[t][:_longest_sheet])
-            for i,f in enumerate(tdf.primary_key_fields.get(t,()) + tdf.data_fields.get(t, ())) :
-                sheet.write(0, i, f)
+            sheet.write_row(0, 0, all_flds)
             _t = getattr(tic_dat, t)
             if utils.dictish(_t) :
                 for row_ind, (p_key, data) in enumerate(_t.items()) :
-                    for field_ind, cell in enumerate( (p_key if containerish(p_key) else (p_key,)) +
-                                        tuple(data[_f] for _f in tdf.data_fields.get(t, ()))):
-                        sheet.write(row_ind+1, field_ind, clean_for_write(t, all_flds[field_ind], cell))
+                    row = [clean(x) for clean, x in zip(pk_cleaners, p_key if containerish(p_key) else (p_key,))]
+                    row.extend(clean(data[_f]) for clean, _f in data_cleaners)
+                    sheet.write_row(row_ind+1, 0, row)
             else :
                 for row_ind, data in enumerate(_t if containerish(_t) else _t()) :
-                    for field_ind, cell in enumerate(tuple(data[_f] for _f in tdf.data_fields[t])) :
-                        sheet.write(row_ind+1, field_ind, clean_for_write(t, all_flds[field_ind], cell))
+                    sheet.write_row(row_ind+1, 0, [clean(data[_f]) for clean, _f in data_cleaners])
         book.close()